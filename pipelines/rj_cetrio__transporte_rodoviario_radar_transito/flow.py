@@ -11,13 +11,13 @@ from typing import Optional
 
 from iplanrio.pipelines_templates.dump_db.tasks import (
     dump_upload_batch_task,
-    format_partitioned_query_task,
     get_database_username_and_password_from_secret_task,
     parse_comma_separated_string_to_list_task,
 )
 from iplanrio.pipelines_utils.env import inject_bd_credentials_task
 from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow
+from prefect_rj_iplanrio.dump_db import format_range_partitioned_query_task
 
 
 @flow(log_prints=True)
@@ -44,6 +44,8 @@ def rj_cetrio__transporte_rodoviario_radar_transito(
     biglake_table: bool = True,
     log_number_of_batches: int = 100,
     max_concurrency: int = 1,
+    range_column: Optional[str] = None,
+    range_count: int = 8,
     only_staging_dataset: bool = False,
     add_timestamp_column: bool = True,
 ):
@@ -76,6 +78,9 @@ def rj_cetrio__transporte_rodoviario_radar_transito(
         biglake_table: Se deve criar tabela BigLake (padrão: True)
         log_number_of_batches: Número de batches para logging (padrão: 100)
         max_concurrency: Concorrência máxima (padrão: 1)
+        range_column: Coluna numérica (ex.: chave primária) ou de data usada para dividir
+            a query em faixas extraídas em paralelo. None mantém a query única
+        range_count: Número de faixas (e de conexões simultâneas) quando range_column é informado
         only_staging_dataset: Se deve usar apenas dataset staging (padrão: False)
         add_timestamp_column: Se deve adicionar coluna de timestamp (padrão: True)
     """
@@ -86,7 +91,7 @@ def rj_cetrio__transporte_rodoviario_radar_transito(
     )
     partition_columns_list = parse_comma_separated_string_to_list_task(text=partition_columns)
 
-    formated_query = format_partitioned_query_task(
+    formated_query = format_range_partitioned_query_task(
         query=execute_query,
         dataset_id=dataset_id,
         table_id=table_id,
@@ -97,6 +102,13 @@ def rj_cetrio__transporte_rodoviario_radar_transito(
         break_query_start=break_query_start,
         break_query_end=break_query_end,
         break_query_frequency=break_query_frequency,
+        range_column=range_column,
+        range_count=range_count,
+        hostname=db_host,
+        port=db_port,
+        user=secrets["DB_USERNAME"],
+        password=secrets["DB_PASSWORD"],
+        database=db_database,
     )
 
     dump_upload_batch_task(
@@ -117,7 +129,7 @@ def rj_cetrio__transporte_rodoviario_radar_transito(
         password=secrets["DB_PASSWORD"],
         database=db_database,
         charset=db_charset,
-        max_concurrency=max_concurrency,
+        max_concurrency=max(max_concurrency, range_count) if range_column else max_concurrency,
         only_staging_dataset=only_staging_dataset,
         add_timestamp_column=add_timestamp_column,
     )
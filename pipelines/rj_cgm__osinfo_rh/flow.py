@@ -7,13 +7,13 @@ from typing import Optional
 
 from iplanrio.pipelines_templates.dump_db.tasks import (
     dump_upload_batch_task,
-    format_partitioned_query_task,
     get_database_username_and_password_from_secret_task,
     parse_comma_separated_string_to_list_task,
 )
 from iplanrio.pipelines_utils.env import inject_bd_credentials_task
 from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow
+from prefect_rj_iplanrio.dump_db import format_range_partitioned_query_task
 
 
 @flow(log_prints=True)
@@ -40,6 +40,8 @@ def rj_cgm__osinfo_rh(
     biglake_table: bool = True,
     log_number_of_batches: int = 100,
     max_concurrency: int = 1,
+    range_column: Optional[str] = None,
+    range_count: int = 8,
     only_staging_dataset: bool = False,
     add_timestamp_column: bool = True,
 ):
@@ -48,7 +50,7 @@ def rj_cgm__osinfo_rh(
     secrets = get_database_username_and_password_from_secret_task(infisical_secret_path=infisical_secret_path)
     partition_columns_list = parse_comma_separated_string_to_list_task(text=partition_columns)
 
-    formated_query = format_partitioned_query_task(
+    formated_query = format_range_partitioned_query_task(
         query=execute_query,
         dataset_id=dataset_id,
         table_id=table_id,
@@ -59,6 +61,13 @@ def rj_cgm__osinfo_rh(
         break_query_start=break_query_start,
         break_query_end=break_query_end,
         break_query_frequency=break_query_frequency,
+        range_column=range_column,
+        range_count=range_count,
+        hostname=db_host,
+        port=db_port,
+        user=secrets["DB_USERNAME"],
+        password=secrets["DB_PASSWORD"],
+        database=db_database,
     )
 
     dump_upload_batch_task(
@@ -79,7 +88,7 @@ def rj_cgm__osinfo_rh(
         password=secrets["DB_PASSWORD"],
         database=db_database,
         charset=db_charset,
-        max_concurrency=max_concurrency,
+        max_concurrency=max(max_concurrency, range_count) if range_column else max_concurrency,
         only_staging_dataset=only_staging_dataset,
         add_timestamp_column=add_timestamp_column,
     )
@@ -33,6 +33,7 @@ def rj_cor__meteorologia_inmet(
     dump_mode: str = "append",
     data_inicio: Optional[str] = "",
     data_fim: Optional[str] = "",
+    window_days: int = 31,
 ):
     """
     Flow principal para coleta e carga de dados meteorológicos do INMET no BigQuery.
@@ -55,6 +56,7 @@ def rj_cor__meteorologia_inmet(
         dump_mode: Modo de dump ('append' ou 'overwrite'). Padrão: 'append'
         data_inicio: Data de início no formato 'YYYY-MM-DD'. Vazio usa ontem
         data_fim: Data de fim no formato 'YYYY-MM-DD'. Vazio usa hoje
+        window_days: Tamanho, em dias, das janelas em que backfills longos são divididos
         materialize_after_dump: Se True, executa materialização dbt após o dump
 
     Returns:
@@ -88,7 +90,7 @@ def rj_cor__meteorologia_inmet(
     data_inicio_, data_fim_, backfill = get_dates_task(data_inicio, data_fim)
 
     # Download dos dados da API do INMET
-    dados = download_meteorological_data_task(data_inicio_, data_fim_)
+    dados = download_meteorological_data_task(data_inicio_, data_fim_, window_days=window_days)
 
     # Transformar e limpar os dados
     dados = transform_meteorological_data_task(dados, backfill)
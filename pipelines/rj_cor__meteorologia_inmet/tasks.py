@@ -4,21 +4,16 @@ Tasks para coleta e processamento de dados meteorológicos do INMET.
 """
 
 import json
-import os
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
 import pandas as pd
 import pendulum
 import requests
 from iplanrio.pipelines_utils.env import getenv_or_action
 from prefect import task
-
-from pipelines.rj_cor__meteorologia_inmet.utils import (
-    parse_date_columns,
-    to_partitions,
-)
+from prefect_rj_iplanrio import parse_date_columns, to_partitions
 
 
 @task
@@ -62,8 +57,62 @@ def get_dates_task(data_inicio: str, data_fim: str) -> Tuple[str, str, bool]:
     return data_inicio, data_fim, backfill
 
 
+INMET_BASE_URL = "https://apitempo.inmet.gov.br/token/estacao"
+
+# Lista com as estações da cidade do Rio de Janeiro
+ESTACOES_RJ = [
+    "A602",
+    "A621",
+    "A636",
+    "A651",
+    "A652",
+    "A653",
+    "A654",
+    "A655",
+    "A656",
+]
+
+
+def split_date_range(data_inicio: str, data_fim: str, window_days: int) -> List[Tuple[str, str]]:
+    """
+    Divide o período [data_inicio, data_fim] em janelas consecutivas de até `window_days` dias.
+
+    Examples:
+        >>> split_date_range("2026-01-01", "2026-01-10", 4)
+        [("2026-01-01", "2026-01-04"), ("2026-01-05", "2026-01-08"), ("2026-01-09", "2026-01-10")]
+    """
+    inicio = pendulum.parse(data_inicio).date()
+    fim = pendulum.parse(data_fim).date()
+
+    windows = []
+    while inicio <= fim:
+        fim_janela = min(inicio.add(days=window_days - 1), fim)
+        windows.append((inicio.format("YYYY-MM-DD"), fim_janela.format("YYYY-MM-DD")))
+        inicio = fim_janela.add(days=1)
+    return windows
+
+
+def _fetch_station_window(
+    session: requests.Session, token: str, id_estacao: str, data_inicio: str, data_fim: str
+) -> list:
+    url = f"{INMET_BASE_URL}/{data_inicio}/{data_fim}/{id_estacao}/{token}"
+    print(f"Coletando dados da estação {id_estacao} para o período {data_inicio} a {data_fim}...")
+    res = session.get(url, timeout=30)
+
+    if res.status_code != requests.codes.ok:
+        print(f"Problema ao coletar dados da estação {id_estacao}: {res.status_code}, {data_inicio} a {data_fim}")
+        return []
+
+    return json.loads(res.text)
+
+
 @task(retries=3, retry_delay_seconds=10)
-def download_meteorological_data_task(data_inicio: str, data_fim: str) -> pd.DataFrame:
+def download_meteorological_data_task(
+    data_inicio: str,
+    data_fim: str,
+    window_days: int = 31,
+    max_workers: int = 9,
+) -> pd.DataFrame:
     """
     Faz o download dos dados meteorológicos da API do INMET.
 
@@ -74,53 +123,42 @@ def download_meteorological_data_task(data_inicio: str, data_fim: str) -> pd.Dat
     Args:
         data_inicio: Data de início no formato 'YYYY-MM-DD'
         data_fim: Data de fim no formato 'YYYY-MM-DD'
+        window_days: Tamanho máximo, em dias, de cada janela requisitada à API
+        max_workers: Número de requisições simultâneas
 
     Returns:
         DataFrame com os dados meteorológicos brutos de todas as estações
 
     Raises:
-        requests.HTTPError: Se houver erro na requisição HTTP
+        requests.RequestException: Se houver erro de conexão com a API
         ValueError: Se a resposta não puder ser convertida para DataFrame
 
     Notes:
         - A API do INMET requer autenticação via token
         - Os dados são retornados em UTC
         - Estações monitoradas: A602, A621, A636, A651, A652, A653, A654, A655, A656
+        - Backfills longos são divididos em janelas de `window_days` dias; cada par
+          estação/janela é uma requisição e todas são feitas em paralelo sobre a
+          mesma sessão HTTP
         - Se uma estação não retornar dados, apenas loga o problema e continua
     """
-    # Lista com as estações da cidade do Rio de Janeiro
-    estacoes_unicas = [
-        "A602",
-        "A621",
-        "A636",
-        "A651",
-        "A652",
-        "A653",
-        "A654",
-        "A655",
-        "A656",
-    ]
-
     token = getenv_or_action("INMET_API")
 
-    # Constante para HTTP status code de sucesso
-    http_ok = 200
-    raw = []
-    for id_estacao in estacoes_unicas:
-        base_url = "https://apitempo.inmet.gov.br/token/estacao"
-        url = f"{base_url}/{data_inicio}/{data_fim}/{id_estacao}/{token}"
-        print(f"Coletando dados da estação {id_estacao} para o período {data_inicio} a {data_fim}...")
-        res = requests.get(url, timeout=30)
-
-        if res.status_code != http_ok:
-            print(f"Problema ao coletar dados da estação {id_estacao}: {res.status_code}, {url}")
-            continue
+    windows = split_date_range(data_inicio, data_fim, window_days)
+    requisicoes = [(id_estacao, inicio, fim) for id_estacao in ESTACOES_RJ for inicio, fim in windows]
+    print(f"{len(requisicoes)} requisições ({len(ESTACOES_RJ)} estações x {len(windows)} janelas)")
 
-        raw.append(json.loads(res.text))
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        session.mount("https://", adapter)
 
-    # Faz um flat da lista de listas
-    flat_list = [item for sublist in raw for item in sublist]
-    raw = flat_list.copy()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            raw = executor.map(
+                lambda requisicao: _fetch_station_window(session, token, *requisicao),
+                requisicoes,
+            )
+            # Faz um flat da lista de listas
+            raw = [item for sublist in raw for item in sublist]
 
     # Converte para DataFrame
     dados = pd.DataFrame(raw)
@@ -157,24 +195,6 @@ def transform_meteorological_data_task(dados: pd.DataFrame, backfill: bool = Fal
         - Mantém apenas as 20 variáveis meteorológicas principais
     """
 
-    def converte_timezone(data: str, horario: str) -> Tuple[str, str]:
-        """
-        Converte data e hora de UTC para timezone America/Sao_Paulo.
-
-        Args:
-            data: Data no formato 'YYYY-MM-DD'
-            horario: Horário no formato 'HH:mm:SS'
-
-        Returns:
-            Tupla com (data, horario) convertidos para America/Sao_Paulo
-        """
-        datahora = pendulum.from_format(data + " " + horario, "YYYY-MM-DD HH:mm:SS", tz="UTC")
-        datahora = datahora.in_tz("America/Sao_Paulo")
-
-        data = datahora.format("YYYY-MM-DD")
-        horario = datahora.format("HH:mm:SS")
-        return data, horario
-
     # Remove colunas que já temos os dados em outras tabelas ou são redundantes
     drop_cols = [
         "DC_NOME",
@@ -219,14 +239,15 @@ def transform_meteorological_data_task(dados: pd.DataFrame, backfill: bool = Fal
 
     dados = dados.rename(columns=rename_cols)
 
-    # Converte coluna de horas de 2300 para 23:00:00
-    dados["horario"] = pd.to_datetime(dados.horario, format="%H%M")
-    dados["horario"] = dados.horario.apply(lambda x: datetime.strftime(x, "%H:%M:%S"))
-
-    # Converte horário de UTC para America/Sao_Paulo
-    dados[["data", "horario"]] = dados[["data", "horario"]].apply(
-        lambda x: converte_timezone(x.data, x.horario), axis=1, result_type="expand"
+    # Converte data e hora (2300) de UTC para America/Sao_Paulo de forma vetorizada
+    datahora = (
+        pd.to_datetime(dados["data"] + " " + dados["horario"], format="%Y-%m-%d %H%M")
+        .dt.tz_localize("UTC")
+        .dt.tz_convert("America/Sao_Paulo")
+        .dt.tz_localize(None)
     )
+    dados["data"] = datahora.dt.normalize()
+    dados["horario"] = datahora.dt.time
 
     # Ordenamento de variáveis
     chaves_primarias = ["id_estacao", "data", "horario"]
@@ -256,9 +277,6 @@ def transform_meteorological_data_task(dados: pd.DataFrame, backfill: bool = Fal
     ]
     dados[float_cols] = dados[float_cols].astype(float)
 
-    dados["horario"] = pd.to_datetime(dados.horario, format="%H:%M:%S").dt.time
-    dados["data"] = pd.to_datetime(dados.data, format="%Y-%m-%d")
-
     # Pegar o dia no nosso timezone como partição
     br_timezone = pendulum.now("America/Sao_Paulo").format("YYYY-MM-DD")
 
@@ -324,7 +342,7 @@ def save_data_to_partitions_task(dados: pd.DataFrame) -> Path:
     prepath.mkdir(parents=True, exist_ok=True)
 
     partition_column = "data"
-    dataframe, partitions = parse_date_columns(dados, partition_column)
+    dataframe, partitions = parse_date_columns(dados, partition_column, scheme="data")
 
     # Cria partições a partir da data
     to_partitions(
@@ -332,6 +350,7 @@ def save_data_to_partitions_task(dados: pd.DataFrame) -> Path:
         partition_columns=partitions,
         savepath=prepath,
         data_type="csv",
+        append=True,
     )
 
     print(f"Arquivos salvos em: {prepath}")
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Coletor assíncrono de dados horários do REDEMET.
+
+Cada par (estação, datahora) é uma requisição independente ao endpoint
+/aerodromos/info. Em backfills isso significa milhares de requisições, então elas são
+disparadas em paralelo sobre uma única sessão HTTP, respeitando um limite de
+requisições por segundo, com retentativas por horário e um cache em disco dos
+horários já obtidos para que uma execução interrompida (ou a retentativa da task)
+continue de onde parou.
+"""
+
+import asyncio
+import json
+import random
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+import pendulum
+
+REDEMET_INFO_URL = "https://api-redemet.decea.mil.br/aerodromos/info"
+
+# Estações (aeródromos) dentro da cidade do Rio de Janeiro
+RJ_STATIONS = [
+    "SBAF",  # Campo dos Afonsos
+    "SBGL",  # Galeão - Tom Jobim
+    "SBJR",  # Jacarepaguá
+    "SBRJ",  # Santos Dumont
+    "SBSC",  # Santa Cruz
+]
+
+REQUEST_TIMEOUT_SECONDS = 30
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+# Horários recentes ainda podem ser publicados; só guardamos "sem dados" para horários antigos
+EMPTY_SLOT_MIN_AGE_HOURS = 24
+
+
+class RedemetSlotCache:
+    """
+    Cache em disco dos horários já consultados, em JSON Lines (um horário por linha).
+
+    O arquivo é apenas acrescido, de modo que uma interrupção no meio da escrita perde no
+    máximo a última linha. Horários sem dados ficam registrados com payload null.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Dict[Tuple[str, str], Optional[dict]] = {}
+        self._file = None
+
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._entries[(entry["localidade"], entry["datahora"])] = entry["data"]
+
+    def __contains__(self, slot: Tuple[str, str]) -> bool:
+        return slot in self._entries
+
+    def __getitem__(self, slot: Tuple[str, str]) -> Optional[dict]:
+        return self._entries[slot]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, slot: Tuple[str, str], payload: Optional[dict]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+
+        station, datahora = slot
+        self._file.write(json.dumps({"localidade": station, "datahora": datahora, "data": payload}) + "\n")
+        self._file.flush()
+        self._entries[slot] = payload
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _RateLimiter:
+    """Espaça o início das requisições para no máximo `rate` por segundo."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def build_slots(stations: List[str], first_date: str, last_date: str) -> List[Tuple[str, str]]:
+    """Lista os pares (estação, datahora YYYYMMDDHH) de todas as horas entre as datas (inclusive)."""
+    period = pendulum.interval(pendulum.parse(first_date).date(), pendulum.parse(last_date).date())
+    days = [day.format("YYYYMMDD") for day in period.range("days")]
+    return [(station, f"{day}{hora:02}") for station in stations for day in days for hora in range(24)]
+
+
+def _is_old_slot(datahora: str, now: pendulum.DateTime) -> bool:
+    slot_time = pendulum.from_format(datahora, "YYYYMMDDHH", tz="UTC")
+    return (now - slot_time).in_hours() >= EMPTY_SLOT_MIN_AGE_HOURS
+
+
+async def _fetch_slot(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    limiter: _RateLimiter,
+    token: str,
+    slot: Tuple[str, str],
+    max_retries: int,
+) -> Tuple[Tuple[str, str], Optional[dict], bool]:
+    """
+    Consulta um horário de uma estação.
+
+    Returns:
+        Tupla (slot, payload, definitivo). `definitivo` indica que a resposta pode ir
+        para o cache (dados ou ausência confirmada de dados); falhas nunca são cacheadas.
+    """
+    station, datahora = slot
+    params = {"api_key": token, "localidade": station, "datahora": datahora}
+
+    async with semaphore:
+        for attempt in range(max_retries + 1):
+            await limiter.wait()
+            try:
+                async with session.get(REDEMET_INFO_URL, params=params) as res:
+                    if res.status not in RETRY_STATUS_CODES:
+                        if res.status != 200:
+                            print(f"Problema no id: {station}, status: {res.status}, datahora: {datahora}")
+                            return slot, None, False
+                        res_data = await res.json(content_type=None)
+                        break
+                    error = f"status {res.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = repr(exc)
+
+            if attempt == max_retries:
+                print(f"Falha no id: {station}, datahora: {datahora} após {max_retries + 1} tentativas: {error}")
+                return slot, None, False
+
+            backoff = min(RETRY_BACKOFF_SECONDS * 2**attempt, MAX_BACKOFF_SECONDS)
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+
+    if res_data.get("status") is not True:
+        print(f"Problema no id: {station}, mensagem: {res_data.get('message')}")
+        return slot, None, False
+
+    if "data" not in res_data["data"]:
+        # Sem dados para esse horário
+        return slot, None, True
+
+    return slot, res_data["data"], True
+
+
+async def iter_redemet_records(
+    token: str,
+    first_date: str,
+    last_date: str,
+    stations: Optional[List[str]] = None,
+    cache_path: Optional[Path] = None,
+    max_concurrency: int = 8,
+    requests_per_second: float = 10.0,
+    max_retries: int = 3,
+) -> AsyncIterator[dict]:
+    """
+    Produz os registros horários do REDEMET à medida que as respostas chegam.
+
+    Horários presentes no cache são devolvidos sem nova requisição; os demais são
+    consultados em paralelo e gravados no cache assim que respondidos.
+
+    Args:
+        token: Chave da API do REDEMET
+        first_date: Data de início no formato 'YYYY-MM-DD'
+        last_date: Data de fim no formato 'YYYY-MM-DD' (inclusive)
+        stations: Estações a consultar (padrão: RJ_STATIONS)
+        cache_path: Arquivo JSON Lines do cache; None desativa o cache
+        max_concurrency: Máximo de requisições simultâneas
+        requests_per_second: Limite de requisições iniciadas por segundo (0 = sem limite)
+        max_retries: Retentativas por horário em falhas transitórias (timeout, 429, 5xx)
+
+    Yields:
+        O objeto "data" de cada resposta com medição
+    """
+    slots = build_slots(stations or RJ_STATIONS, first_date, last_date)
+    cache = RedemetSlotCache(cache_path) if cache_path else None
+    now = pendulum.now("UTC")
+
+    pending = []
+    for slot in slots:
+        if cache is not None and slot in cache:
+            if cache[slot] is not None:
+                yield cache[slot]
+        else:
+            pending.append(slot)
+
+    print(f"Horários a consultar: {len(pending)} de {len(slots)} ({len(slots) - len(pending)} em cache)")
+    if not pending:
+        return
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limiter = _RateLimiter(requests_per_second)
+    connector = aiohttp.TCPConnector(limit=max_concurrency)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            tasks = [
+                asyncio.create_task(_fetch_slot(session, semaphore, limiter, token, slot, max_retries))
+                for slot in pending
+            ]
+            try:
+                for completed in asyncio.as_completed(tasks):
+                    slot, payload, definitive = await completed
+                    if cache is not None and definitive and (payload is not None or _is_old_slot(slot[1], now)):
+                        cache.put(slot, payload)
+                    if payload is not None:
+                        yield payload
+            finally:
+                for pending_task in tasks:
+                    pending_task.cancel()
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def collect_redemet_records(token: str, first_date: str, last_date: str, **kwargs) -> List[dict]:
+    """Versão síncrona de `iter_redemet_records`, para uso dentro das tasks."""
+
+    async def _collect() -> List[dict]:
+        return [record async for record in iter_redemet_records(token, first_date, last_date, **kwargs)]
+
+    return asyncio.run(_collect())
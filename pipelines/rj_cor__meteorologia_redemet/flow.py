@@ -29,6 +29,8 @@ def rj_cor__meteorologia_redemet(
     table_id: str = "meteorologia_redemet",
     first_date: Optional[str] = None,
     last_date: Optional[str] = None,
+    max_concurrency: int = 8,
+    requests_per_second: float = 10.0,
 ):
     """
     Flow principal para coleta e carga de dados meteorológicos do REDEMET no BigQuery.
@@ -48,6 +50,8 @@ def rj_cor__meteorologia_redemet(
         table_id: ID da tabela no BigQuery (padrão: 'meteorologia_redemet')
         first_date: Data de início no formato 'YYYY-MM-DD'. None usa ontem
         last_date: Data de fim no formato 'YYYY-MM-DD'. None usa hoje
+        max_concurrency: Máximo de requisições simultâneas à API do REDEMET
+        requests_per_second: Limite de requisições por segundo à API do REDEMET
 
     Returns:
         None
@@ -80,7 +84,12 @@ def rj_cor__meteorologia_redemet(
     first_date_, last_date_, backfill = get_dates_task(first_date, last_date)
 
     # Download dos dados da API do REDEMET
-    dataframe = download_meteorological_data_task(first_date_, last_date_)
+    dataframe = download_meteorological_data_task(
+        first_date_,
+        last_date_,
+        max_concurrency=max_concurrency,
+        requests_per_second=requests_per_second,
+    )
 
     # Transformar e limpar os dados
     dataframe = transform_meteorological_data_task(dataframe, backfill)
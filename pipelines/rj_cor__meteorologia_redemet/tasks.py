@@ -3,22 +3,17 @@
 Tasks para coleta e processamento de dados meteorológicos do REDEMET.
 """
 
-import json
-import os
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 import pandas as pd
 import pendulum
-import requests
 from iplanrio.pipelines_utils.env import getenv_or_action
 from prefect import task
+from prefect_rj_iplanrio import parse_date_columns, to_partitions
 from unidecode import unidecode
 
-from pipelines.rj_cor__meteorologia_redemet.utils import (
-    parse_date_columns,
-    to_partitions,
-)
+from pipelines.rj_cor__meteorologia_redemet.collector import collect_redemet_records
 
 
 @task
@@ -61,7 +56,13 @@ def get_dates_task(first_date: str, last_date: str) -> Tuple[str, str, bool]:
 
 
 @task(retries=3, retry_delay_seconds=10)
-def download_meteorological_data_task(first_date: str, last_date: str) -> pd.DataFrame:
+def download_meteorological_data_task(
+    first_date: str,
+    last_date: str,
+    cache_dir: Optional[str] = "/tmp/meteorologia_redemet_cache/",
+    max_concurrency: int = 8,
+    requests_per_second: float = 10.0,
+) -> pd.DataFrame:
     """
     Faz o download dos dados meteorológicos da API do REDEMET.
 
@@ -71,68 +72,40 @@ def download_meteorological_data_task(first_date: str, last_date: str) -> pd.Dat
     Args:
         first_date: Data de início no formato 'YYYY-MM-DD'
         last_date: Data de fim no formato 'YYYY-MM-DD'
+        cache_dir: Pasta do cache de horários já consultados. None desativa o cache
+        max_concurrency: Máximo de requisições simultâneas à API
+        requests_per_second: Limite de requisições por segundo à API
 
     Returns:
         DataFrame com os dados meteorológicos brutos de todas as estações
 
-    Raises:
-        requests.HTTPError: Se houver erro na requisição HTTP
-
     Notes:
         - A API do REDEMET requer autenticação via token
         - Os dados são retornados em UTC
         - Estações monitoradas: SBAF, SBGL, SBJR, SBRJ, SBSC
-        - Se uma estação não retornar dados, apenas loga o problema e continua
+        - Cada par estação/hora é uma requisição; elas são feitas em paralelo
+          (ver `collector.py`) com retentativas por horário em falhas transitórias
+        - Se um horário não retornar dados, apenas loga o problema e continua
+        - Os horários obtidos ficam no cache em disco, então a retentativa da task
+          (ou uma nova execução no mesmo ambiente) não repete requisições
     """
-    # Estações (aeródromos) dentro da cidade do Rio de Janeiro
-    rj_stations = [
-        "SBAF",  # Campo dos Afonsos
-        "SBGL",  # Galeão - Tom Jobim
-        "SBJR",  # Jacarepaguá
-        "SBRJ",  # Santos Dumont
-        "SBSC",  # Santa Cruz
-    ]
-
     redemet_token = getenv_or_action("REDEMET_TOKEN")
-    # Constante para HTTP status code de sucesso
-    http_ok = 200
-
-    # Converte datas em int para cálculo de faixas
-    first_date_int = int(first_date.replace("-", ""))
-    last_date_int = int(last_date.replace("-", ""))
-
-    raw = []
-    for id_estacao in rj_stations:
-        base_url = f"https://api-redemet.decea.mil.br/aerodromos/info?api_key={redemet_token}"
-
-        for data in range(first_date_int, last_date_int + 1):
-            for hora in range(24):
-                url = f"{base_url}&localidade={id_estacao}&datahora={data:06}{hora:02}"
-                print(f"Requisitando dados para estação {id_estacao} - Data: {data}, Hora: {hora}")
-                res = requests.get(url, timeout=30)
 
-                if res.status_code != http_ok:
-                    print(f"Problema no id: {id_estacao}, status: {res.status_code}")
-                    print(f"Data: {data}, Hora: {hora}")
-                    continue
-
-                res_data = json.loads(res.text)
-
-                if res_data["status"] is not True:
-                    print(f"Problema no id: {id_estacao}, mensagem: {res_data['message']}")
-                    continue
-
-                if "data" not in res_data["data"]:
-                    # Sem dataframe para esse horário
-                    continue
-
-                raw.append(res_data)
+    cache_path = None
+    if cache_dir:
+        cache_path = Path(cache_dir) / f"{first_date}_{last_date}.jsonl"
+
+    raw = collect_redemet_records(
+        redemet_token,
+        first_date,
+        last_date,
+        cache_path=cache_path,
+        max_concurrency=max_concurrency,
+        requests_per_second=requests_per_second,
+    )
 
     print(f"Tamanho dos dados brutos: {len(raw)}")
 
-    # Extrai objetos de dataframe
-    raw = [res_data["data"] for res_data in raw]
-
     # Converte para dataframe
     dataframe = pd.DataFrame(raw)
 
@@ -265,7 +238,7 @@ def save_data_to_partitions_task(
     prepath = Path("/tmp/meteorologia_redemet/")
     prepath.mkdir(parents=True, exist_ok=True)
 
-    dataframe, partitions = parse_date_columns(dataframe, partition_column)
+    dataframe, partitions = parse_date_columns(dataframe, partition_column, scheme="ano_mes_dia")
 
     # Cria partições a partir da data
     to_partitions(
@@ -273,6 +246,7 @@ def save_data_to_partitions_task(
         partition_columns=partitions,
         savepath=prepath,
         data_type="csv",
+        filename="dados",
     )
 
     print(f"Arquivos salvos em: {prepath}")
@@ -11,13 +11,9 @@ import pendulum
 import requests
 from iplanrio.pipelines_utils.env import getenv_or_action
 from prefect import task
+from prefect_rj_iplanrio import parse_date_columns, to_partitions
 from unidecode import unidecode
 
-from pipelines.rj_cor__meteorologia_redemet_estacoes.utils import (
-    parse_date_columns,
-    to_partitions,
-)
-
 
 @task
 def download_stations_data_task() -> pd.DataFrame:
@@ -163,7 +159,7 @@ def save_data_to_partitions_task(
     prepath = Path("/tmp/meteorologia_redemet_estacoes/")
     prepath.mkdir(parents=True, exist_ok=True)
 
-    dataframe, partitions = parse_date_columns(dataframe, partition_column)
+    dataframe, partitions = parse_date_columns(dataframe, partition_column, scheme="ano_mes_dia")
 
     # Cria partições a partir da data
     to_partitions(
@@ -171,6 +167,7 @@ def save_data_to_partitions_task(
         partition_columns=partitions,
         savepath=prepath,
         data_type="csv",
+        filename="dados",
     )
 
     print(f"Arquivos salvos em: {prepath}")
@@ -15,6 +15,9 @@ from prefect import flow
 
 from pipelines.rj_cor__precipitacao_alertario.tasks import (
     download_alertario_data_task,
+    filter_new_readings_task,
+    load_alertario_state_task,
+    save_alertario_state_task,
     save_data_to_partitions_task,
     transform_meteorological_data_task,
     transform_pluviometric_data_task,
@@ -29,6 +32,8 @@ def rj_cor__precipitacao_alertario(
     table_id_meteorological: Optional[str] = None,
     dump_mode_pluviometric: Optional[str] = "append",
     dump_mode_meteorological: Optional[str] = "append",
+    state_bucket: str = "rj-iplanrio",
+    ignore_state: bool = False,
 ):
     """
     Flow para coleta de dados de precipitação e meteorologia do AlertaRio.
@@ -50,6 +55,8 @@ def rj_cor__precipitacao_alertario(
             ("append" ou "overwrite").
         dump_mode_meteorological: Modo de salvamento para dados meteorológicos
             ("append" ou "overwrite").
+        state_bucket: Bucket onde ficam os validadores HTTP e os watermarks por estação.
+        ignore_state: Se True, ignora o estado salvo e grava todas as leituras da página.
 
     Returns:
         None
@@ -66,7 +73,9 @@ def rj_cor__precipitacao_alertario(
 
     Notes:
         - O AlertaRio fornece dados em tempo real de pluviômetros e estações
-        - Os dados vêm em formato HTML e são parseados com BeautifulSoup
+        - Os dados vêm em formato HTML e são parseados com lxml em uma única passada
+        - Páginas não modificadas (ETag/Last-Modified ou SHA-256) não são reprocessadas
+        - Apenas leituras com data_medicao posterior ao watermark da estação são gravadas
         - Schedule recomendado: A cada 2 minutos (dados em tempo real)
         - Dados pluviométricos incluem acumulados de chuva em diversos intervalos
         - Dados meteorológicos incluem temperatura, umidade, pressão e vento
@@ -74,29 +83,53 @@ def rj_cor__precipitacao_alertario(
     inject_bd_credentials_task(environment="prod")
     print("🌧️  Iniciando coleta de dados do AlertaRio...")
 
+    # O estado é separado por combinação de tabelas de destino (cada schedule tem o seu)
+    targets = [
+        f"{dataset_id}.{table_id}"
+        for dataset_id, table_id in (
+            (dataset_id_pluviometric, table_id_pluviometric),
+            (dataset_id_meteorological, table_id_meteorological),
+        )
+        if dataset_id is not None
+    ]
+    state_blob = f"state/rj_cor__precipitacao_alertario/{'__'.join(targets)}.json"
+    state = {} if ignore_state else load_alertario_state_task(state_bucket, state_blob)
+    watermarks = state.get("watermarks", {})
+
     # Step 1: Download dos dados do AlertaRio (retorna 2 DataFrames)
     print("📥 Fazendo download dos dados do AlertaRio..")
-    dfr_pluviometric, dfr_meteorological = download_alertario_data_task()
+    dfr_pluviometric, dfr_meteorological, http_state = download_alertario_data_task(state.get("http"))
+
+    if dfr_pluviometric is None:
+        print("⏭️  Página do AlertaRio inalterada desde a última execução. Flow encerrado.")
+        return
 
     if dataset_id_pluviometric is not None:
         rename_current_flow_run_task(new_name=f"{dataset_id_pluviometric}.{table_id_pluviometric}")
         print("🔄 Transformando dados pluviométricos...")
         dfr_pluviometric_transformed = transform_pluviometric_data_task(dfr_pluviometric)
-        print("💾 Salvando dados pluviométricos em partições...")
-        prepath_pluviometric = save_data_to_partitions_task(
-            dfr=dfr_pluviometric_transformed,
-            data_name="pluviometric",
-            partition_column="data_medicao",
+        dfr_pluviometric_transformed, watermarks["pluviometric"] = filter_new_readings_task(
+            dfr_pluviometric_transformed, watermarks.get("pluviometric", {})
         )
 
-        print(f"☁️  Fazendo upload dos dados pluviométricos para BigQuery ({dataset_id_pluviometric}.{table_id_pluviometric})")
-        create_table_and_upload_to_gcs_task(
-            data_path=str(prepath_pluviometric),
-            dataset_id=dataset_id_pluviometric,
-            table_id=table_id_pluviometric,
-            dump_mode=dump_mode_pluviometric,
-        )
-        print(f"   - Dados pluviométricos salvos em: {dataset_id_pluviometric}.{table_id_pluviometric}")
+        if dfr_pluviometric_transformed.empty:
+            print("⏭️  Nenhuma leitura pluviométrica nova. Pulando upload.")
+        else:
+            print("💾 Salvando dados pluviométricos em partições...")
+            prepath_pluviometric = save_data_to_partitions_task(
+                dfr=dfr_pluviometric_transformed,
+                data_name="pluviometric",
+                partition_column="data_medicao",
+            )
+
+            print(f"☁️  Fazendo upload dos dados pluviométricos para BigQuery ({dataset_id_pluviometric}.{table_id_pluviometric})")
+            create_table_and_upload_to_gcs_task(
+                data_path=str(prepath_pluviometric),
+                dataset_id=dataset_id_pluviometric,
+                table_id=table_id_pluviometric,
+                dump_mode=dump_mode_pluviometric,
+            )
+            print(f"   - Dados pluviométricos salvos em: {dataset_id_pluviometric}.{table_id_pluviometric}")
     else:
         print("⚠️  dataset_id_pluviometric não fornecido. Pulando upload dos dados pluviométricos para BigQuery.")
 
@@ -105,24 +138,33 @@ def rj_cor__precipitacao_alertario(
         rename_current_flow_run_task(new_name=f"{dataset_id_pluviometric}.{table_id_pluviometric}")
         print("🔄 Transformando dados meteorológicos...")
         dfr_meteorological_transformed = transform_meteorological_data_task(dfr_meteorological)
-        print("💾 Salvando dados meteorológicos em partições...")
-        prepath_meteorological = save_data_to_partitions_task(
-            dfr=dfr_meteorological_transformed,
-            data_name="meteorological",
-            partition_column="data_medicao",
+        dfr_meteorological_transformed, watermarks["meteorological"] = filter_new_readings_task(
+            dfr_meteorological_transformed, watermarks.get("meteorological", {})
         )
 
-        # Step 4b: Fazer upload para BigQuery (dados meteorológicos)
-        print(f"☁️  Fazendo upload dos dados meteorológicos para BigQuery ({dataset_id_meteorological}.{table_id_meteorological})...")
-        create_table_and_upload_to_gcs_task(
-            data_path=str(prepath_meteorological),
-            dataset_id=dataset_id_meteorological,
-            table_id=table_id_meteorological,
-            dump_mode=dump_mode_meteorological,
-        )
-
-        print(f"  - Dados meteorológicos salvos em: {dataset_id_meteorological}.{table_id_meteorological}")
+        if dfr_meteorological_transformed.empty:
+            print("⏭️  Nenhuma leitura meteorológica nova. Pulando upload.")
+        else:
+            print("💾 Salvando dados meteorológicos em partições...")
+            prepath_meteorological = save_data_to_partitions_task(
+                dfr=dfr_meteorological_transformed,
+                data_name="meteorological",
+                partition_column="data_medicao",
+            )
+
+            # Step 4b: Fazer upload para BigQuery (dados meteorológicos)
+            print(f"☁️  Fazendo upload dos dados meteorológicos para BigQuery ({dataset_id_meteorological}.{table_id_meteorological})...")
+            create_table_and_upload_to_gcs_task(
+                data_path=str(prepath_meteorological),
+                dataset_id=dataset_id_meteorological,
+                table_id=table_id_meteorological,
+                dump_mode=dump_mode_meteorological,
+            )
+
+            print(f"  - Dados meteorológicos salvos em: {dataset_id_meteorological}.{table_id_meteorological}")
     else:
         print("⚠️ dataset_id_meteorological não fornecido. Pulando upload dos dados meteorológicos para BigQuery.")
 
+    save_alertario_state_task({"http": http_state, "watermarks": watermarks}, state_bucket, state_blob)
+
     print("✅ Flow concluído com sucesso!")
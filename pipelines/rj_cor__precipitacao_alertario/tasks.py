@@ -3,27 +3,27 @@
 Tasks para coleta e processamento de dados de precipitação do AlertaRio.
 """
 
-import os
-from io import StringIO
+import hashlib
 from pathlib import Path
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
-import lxml
 import pandas as pd
 import pendulum
 import requests
-from bs4 import BeautifulSoup
 from iplanrio.pipelines_utils.env import getenv_or_action
 from prefect import task
+from prefect_rj_iplanrio import load_state, parse_date_columns, save_state, to_partitions
 
 from pipelines.rj_cor__precipitacao_alertario.utils import (
-    parse_date_columns,
-    to_partitions,
+    filter_new_readings,
+    parse_html_tables,
 )
 
 
 @task(retries=3, retry_delay_seconds=10)
-def download_alertario_data_task() -> Tuple[pd.DataFrame, pd.DataFrame]:
+def download_alertario_data_task(
+    http_state: Optional[dict] = None,
+) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], dict]:
     """
     Faz o download dos dados do AlertaRio.
 
@@ -31,10 +31,18 @@ def download_alertario_data_task() -> Tuple[pd.DataFrame, pd.DataFrame]:
     - Pluviômetros (medição de chuva)
     - Estações meteorológicas (temperatura, umidade, pressão, vento)
 
+    A requisição é condicional (If-None-Match/If-Modified-Since) e o corpo é comparado
+    pelo SHA-256 com o da última execução; se a página não mudou, nada é parseado.
+
+    Args:
+        http_state: Validadores da última resposta processada
+            (etag, last_modified, content_sha256).
+
     Returns:
         Tupla contendo:
-            - DataFrame com dados pluviométricos
-            - DataFrame com dados meteorológicos
+            - DataFrame com dados pluviométricos (None se a página não mudou)
+            - DataFrame com dados meteorológicos (None se a página não mudou)
+            - Validadores da resposta atual
 
     Notes:
         - Os dados vêm em formato HTML com múltiplas tabelas
@@ -44,31 +52,41 @@ def download_alertario_data_task() -> Tuple[pd.DataFrame, pd.DataFrame]:
     # Obter URL da API do AlertaRio via variável de ambiente
     # Em produção, usar: get_infisical_secret_task(secret_path="/", secret_name="ALERTARIO_API")["ALERTARIO_API"]
     url = getenv_or_action("ALERTARIO_API")
+    http_state = http_state or {}
 
     http_ok = 200
+    http_not_modified = 304
 
-    try:
-        response = requests.get(url, timeout=30, verify=False)
+    headers = {}
+    if http_state.get("etag"):
+        headers["If-None-Match"] = http_state["etag"]
+    if http_state.get("last_modified"):
+        headers["If-Modified-Since"] = http_state["last_modified"]
 
-        if response.status_code == http_ok:
-            soup = BeautifulSoup(response.text, "html.parser")
+    try:
+        response = requests.get(url, headers=headers, timeout=30, verify=False)
+    except requests.RequestException as e:
+        print(f"Erro durante a solicitação: {e}")
+        raise
 
-            # Pega todas as tabelas da estrutura HTML
-            tables = soup.find_all("table")
+    if response.status_code == http_not_modified:
+        print("Página do AlertaRio não modificada (304). Nada a processar.")
+        return None, None, http_state
 
-            # Os dados vêm em formato brasileiro e têm quebras de linha extras
-            tables = [str(table).replace(",", ".").replace("\n", "") for table in tables]
+    if response.status_code != http_ok:
+        print(f"Erro ao fazer a solicitação. Código de status: {response.status_code}")
+        raise requests.HTTPError(f"Status code: {response.status_code}")
 
-            # Converte tabela HTML para DataFrame pandas
-            dfr = pd.read_html(StringIO(str(tables)), decimal=",")
-            ()
-        else:
-            print(f"Erro ao fazer a solicitação. Código de status: {response.status_code}")
-            raise requests.HTTPError(f"Status code: {response.status_code}")
+    new_http_state = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_sha256": hashlib.sha256(response.content).hexdigest(),
+    }
+    if new_http_state["content_sha256"] == http_state.get("content_sha256"):
+        print("Conteúdo do AlertaRio idêntico ao da última execução. Nada a processar.")
+        return None, None, new_http_state
 
-    except requests.RequestException as e:
-        print(f"Erro durante a solicitação: {e}")
-        raise
+    dfr = parse_html_tables(response.content, encoding=response.encoding or response.apparent_encoding)
 
     dfr_pluviometric = dfr[0]
     dfr_meteorological = dfr[1]
@@ -76,7 +94,42 @@ def download_alertario_data_task() -> Tuple[pd.DataFrame, pd.DataFrame]:
     print(f"\nDados pluviométricos (primeira linha):\n{dfr_pluviometric.iloc[0]}")
     print(f"\nDados meteorológicos (primeira linha):\n{dfr_meteorological.iloc[0]}")
 
-    return dfr_pluviometric, dfr_meteorological
+    return dfr_pluviometric, dfr_meteorological, new_http_state
+
+
+@task
+def filter_new_readings_task(
+    dfr: pd.DataFrame,
+    watermarks: Dict[str, str],
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """
+    Descarta leituras já gravadas, usando o último data_medicao salvo por estação.
+
+    Args:
+        dfr: DataFrame transformado (data_medicao já como "%Y-%m-%d %H:%M:%S")
+        watermarks: Último data_medicao gravado por id_estacao
+
+    Returns:
+        Tupla com as leituras novas e os watermarks atualizados
+    """
+    new_rows, updated_watermarks = filter_new_readings(dfr, watermarks)
+    print(f"{new_rows.shape[0]} de {dfr.shape[0]} leituras são novas")
+    return new_rows, updated_watermarks
+
+
+@task
+def load_alertario_state_task(bucket_name: str, blob_name: str) -> dict:
+    """Carrega validadores HTTP e watermarks por estação da última execução."""
+    state = load_state(bucket_name, blob_name)
+    print(f"Estado carregado de gs://{bucket_name}/{blob_name}: {len(state)} chaves")
+    return state
+
+
+@task
+def save_alertario_state_task(state: dict, bucket_name: str, blob_name: str) -> None:
+    """Grava o estado após o upload bem-sucedido das leituras novas."""
+    save_state(state, bucket_name, blob_name)
+    print(f"Estado salvo em gs://{bucket_name}/{blob_name}")
 
 
 @task
@@ -263,6 +316,7 @@ def save_data_to_partitions_task(
         savepath=prepath,
         data_type="csv",
         suffix=suffix,
+        strip_leading_zeros=True,
     )
 
     print(f"Arquivos salvos em: {prepath}")
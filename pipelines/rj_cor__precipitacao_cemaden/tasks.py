@@ -10,11 +10,7 @@ import pandas as pd
 import pendulum
 import requests
 from prefect import task
-
-from pipelines.rj_cor__precipitacao_cemaden.utils import (
-    parse_date_columns,
-    to_partitions,
-)
+from prefect_rj_iplanrio import parse_date_columns, to_partitions
 
 
 @task(retries=3, retry_delay_seconds=10)
@@ -256,6 +252,7 @@ def save_data_to_partitions_task(
         savepath=prepath,
         data_type="csv",
         suffix=suffix,
+        directory_names={"ano_particao": "ano", "mes_particao": "mes", "data_particao": "data"},
     )
 
     print(f"✅ Arquivos salvos em: {prepath}")
@@ -16,7 +16,9 @@ from prefect import flow
 from pipelines.rj_cor__precipitacao_inea.tasks import (
     check_for_new_stations_task,
     download_inea_data_task,
+    load_inea_state_task,
     save_data_to_partitions_task,
+    save_inea_state_task,
     transform_inea_data_task,
 )
 
@@ -28,6 +30,8 @@ def rj_cor__precipitacao_inea(
     dataset_id_fluviometric: str = "clima_fluviometro",
     table_id_fluviometric: str = "lamina_agua_inea",
     dump_mode: str = "append",
+    state_bucket: str = "rj-iplanrio",
+    ignore_state: bool = False,
 ):
     """
     Flow para coleta de dados de precipitação e fluviometria do INEA.
@@ -46,6 +50,8 @@ def rj_cor__precipitacao_inea(
         dataset_id_fluviometric: ID do dataset para dados fluviométricos.
         table_id_fluviometric: ID da tabela para dados fluviométricos.
         dump_mode: Modo de salvamento ("append" ou "overwrite").
+        state_bucket: Bucket onde ficam os hashes das planilhas e os watermarks por estação.
+        ignore_state: Se True, ignora o estado salvo e grava todas as leituras das planilhas.
 
     Returns:
         None
@@ -63,18 +69,29 @@ def rj_cor__precipitacao_inea(
     Notes:
         - O INEA fornece dados de 5 estações meteorológicas
         - Estações: Campo Grande, Capela Mayrink, Eletrobras, Realengo, São Cristóvão
-        - Dados baixados de arquivos Excel via HTTP
+        - Dados baixados de arquivos Excel via HTTP, todas as estações em paralelo
+        - Planilhas inalteradas (SHA-256) não são lidas novamente
+        - Apenas leituras posteriores ao watermark da estação são gravadas
         - Schedule recomendado: A cada 5 minutos
         - Dados pluviométricos: 7 acumulados (5min a mensal)
         - Dados fluviométricos: altura da água (cm)
         - Duplicatas são automaticamente removidas
         - Sistema verifica automaticamente novas estações
     """
+    inject_bd_credentials_task()
     print("🌧️  Iniciando coleta de dados do INEA...")
 
+    state_blob = "state/rj_cor__precipitacao_inea/state.json"
+    state = {} if ignore_state else load_inea_state_task(state_bucket, state_blob)
+
     # Step 1: Download dos dados do INEA
     print("📥 Fazendo download dos dados do INEA...")
-    dfr = download_inea_data_task()
+    dfr, new_state = download_inea_data_task(state)
+
+    if dfr.empty:
+        print("⏭️  Nenhuma leitura nova nas planilhas do INEA. Flow encerrado.")
+        save_inea_state_task(new_state, state_bucket, state_blob)
+        return
 
     # Step 2: Transformar e separar em pluviométrico e fluviométrico
     print("🔄 Transformando dados...")
@@ -102,7 +119,6 @@ def rj_cor__precipitacao_inea(
 
     # Step 5a: Injetar credenciais e fazer upload de dados pluviométricos
     print(f"☁️  Fazendo upload dos dados pluviométricos para BigQuery ({dataset_id_pluviometric}.{table_id_pluviometric})...")
-    inject_bd_credentials_task()
     create_table_and_upload_to_gcs_task(
         data_path=str(prepath_pluviometric),
         dataset_id=dataset_id_pluviometric,
@@ -119,6 +135,8 @@ def rj_cor__precipitacao_inea(
         dump_mode=dump_mode,
     )
 
+    save_inea_state_task(new_state, state_bucket, state_blob)
+
     print("✅ Flow concluído com sucesso!")
     print(f"   - Dados pluviométricos salvos em: {dataset_id_pluviometric}.{table_id_pluviometric}")
     print(f"   - Dados fluviométricos salvos em: {dataset_id_fluviometric}.{table_id_fluviometric}")
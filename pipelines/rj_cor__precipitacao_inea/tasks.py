@@ -3,24 +3,93 @@
 Tasks para coleta e processamento de dados de precipitação e fluviometria do INEA.
 """
 
+import hashlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import pandas as pd
 import pendulum
 import requests
 from iplanrio.pipelines_utils.env import getenv_or_action
 from prefect import task
+from prefect_rj_iplanrio import load_state, parse_date_columns, save_state, to_partitions
+
+
+# Dicionário de estações INEA
+STATIONS = {
+    "1": "225543320",  # Campo Grande
+    "2": "BE70E166",  # Capela Mayrink
+    "3": "225543250",  # Eletrobras
+    "4": "2243088",  # Realengo
+    "5": "225443130",  # Sao Cristovao
+}
+
+
+def _excel_engine() -> str:
+    """Usa o leitor calamine (Rust) quando instalado; caso contrário, openpyxl."""
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return "openpyxl"
+
+
+def _download_station(
+    session: requests.Session,
+    url_base: str,
+    key: str,
+    value: str,
+    previous_hash: Optional[str],
+    watermark: Optional[str],
+    engine: str,
+) -> Tuple[Optional[pd.DataFrame], str, Optional[str]]:
+    """
+    Baixa e lê a planilha de uma estação.
+
+    Returns:
+        Tupla (leituras novas ou None se o arquivo não mudou, SHA-256 do arquivo, novo watermark)
+    """
+    url = f"{url_base}/{value}.xlsx"
+    print(f"   Baixando estação {key} - {value}...")
+    try:
+        response = session.get(url, timeout=30, verify=False)
+    except requests.RequestException as e:
+        print(f"      ❌ Erro ao baixar estação {key}: {e}")
+        raise
+
+    if response.status_code != requests.codes.ok:
+        print(f"      ❌ Erro HTTP {response.status_code}")
+        raise requests.HTTPError(f"Status code: {response.status_code} para estação {key}")
+
+    content_hash = hashlib.sha256(response.content).hexdigest()
+    if content_hash == previous_hash:
+        print(f"      ⏭️  Estação {key} sem alterações desde a última execução")
+        return None, content_hash, watermark
+
+    dfr_station = pd.read_excel(BytesIO(response.content), engine=engine)
+
+    # Mantém apenas leituras posteriores à última gravada para a estação
+    data_medicao = pd.to_datetime(
+        dfr_station["Data"].astype(str).str.strip() + " " + dfr_station["Hora"].astype(str).str.strip(),
+        format="%d/%m/%Y %H:%M",
+        errors="coerce",
+    )
+    if watermark:
+        dfr_station = dfr_station[data_medicao > pd.Timestamp(watermark)]
+    if data_medicao.notna().any():
+        latest = data_medicao.max().strftime("%Y-%m-%d %H:%M:%S")
+        watermark = max(watermark or latest, latest)
+
+    # Adicionar coluna com ID da estação
+    dfr_station = dfr_station.assign(id_estacao=key)
 
-from pipelines.rj_cor__precipitacao_inea.utils import (
-    parse_date_columns,
-    to_partitions,
-)
+    print(f"      ✅ {len(dfr_station)} registros novos na estação {key}")
+    return dfr_station, content_hash, watermark
 
 
 @task(retries=3, retry_delay_seconds=10)
-def download_inea_data_task() -> pd.DataFrame:
+def download_inea_data_task(state: Optional[dict] = None) -> Tuple[pd.DataFrame, dict]:
     """
     Faz o download dos dados de precipitação e fluviometria do INEA.
 
@@ -32,15 +101,22 @@ def download_inea_data_task() -> pd.DataFrame:
     - Precipitação (acumulados de chuva)
     - Fluviometria (altura da água em rios)
 
+    Args:
+        state: Estado da última execução, com o SHA-256 de cada planilha ("hashes")
+            e o último data_medicao gravado por estação ("watermarks").
+
     Returns:
-        DataFrame consolidado com dados de todas as estações.
+        Tupla contendo:
+            - DataFrame consolidado com as leituras novas de todas as estações
+              (vazio se nenhuma estação tiver leituras novas)
+            - Estado atualizado, a ser salvo após o upload
 
     Raises:
         requests.HTTPError: Se a requisição HTTP falhar.
         requests.RequestException: Se houver erro de conexão.
 
     Examples:
-        >>> dfr = download_inea_data_task()
+        >>> dfr, state = download_inea_data_task({})
         >>> print(dfr['id_estacao'].unique())
         [1, 2, 3, 4, 5]
 
@@ -52,62 +128,69 @@ def download_inea_data_task() -> pd.DataFrame:
           4: Realengo
           5: São Cristóvão
         - URL base: f"{url_base}/{value}.xlsx"
-        - Formato: Excel (.xlsx)
-        - Timeout de 30 segundos por estação
+        - Formato: Excel (.xlsx), lido com calamine quando disponível (openpyxl caso contrário)
+        - As estações são baixadas em paralelo; timeout de 30 segundos por estação
+        - Planilhas com o mesmo SHA-256 da última execução não são lidas
         - Retry automático em caso de falha (3 tentativas)
     """
-    # Dicionário de estações INEA
-    stations = {
-        "1": "225543320",  # Campo Grande
-        "2": "BE70E166",  # Capela Mayrink
-        "3": "225543250",  # Eletrobras
-        "4": "2243088",  # Realengo
-        "5": "225443130",  # Sao Cristovao
-    }
-
-    http_ok = 200
-
-    dataframes = []
+    state = state or {}
+    hashes = state.get("hashes", {})
+    watermarks = state.get("watermarks", {})
+    engine = _excel_engine()
 
     print("📥 Iniciando download dos dados do INEA...")
-    print(f"   Total de estações: {len(stations)}")
+    print(f"   Total de estações: {len(STATIONS)} (leitor: {engine})")
 
     url_base = getenv_or_action("URL-ALERTA-CHEIAS")
-    for key, value in stations.items():
-        url = f"{url_base}/{value}.xlsx"
-        print(f"   Baixando estação {key} - {value}...")
-        print(f"   URL: {url}")
-        try:
-            response = requests.get(url, timeout=30, verify=False)
-            if response.status_code == http_ok:
-                # Ler arquivo Excel diretamente do conteúdo da resposta
-                dfr_station = pd.read_excel(BytesIO(response.content))
-
-                # Adicionar coluna com ID da estação
-                dfr_station["id_estacao"] = key
-
-                dataframes.append(dfr_station)
-
-
-                print(f"      ✅ {len(dfr_station)} registros baixados")
+    with requests.Session() as session:
+        with ThreadPoolExecutor(max_workers=len(STATIONS)) as executor:
+            futures = {
+                key: executor.submit(
+                    _download_station,
+                    session,
+                    url_base,
+                    key,
+                    value,
+                    hashes.get(key),
+                    watermarks.get(key),
+                    engine,
+                )
+                for key, value in STATIONS.items()
+            }
+            results = {key: future.result() for key, future in futures.items()}
+
+    dataframes = [dfr_station for dfr_station, _, _ in results.values() if dfr_station is not None]
+    new_state = {
+        "hashes": {key: content_hash for key, (_, content_hash, _) in results.items()},
+        "watermarks": {
+            **watermarks,
+            **{key: watermark for key, (_, _, watermark) in results.items() if watermark},
+        },
+    }
 
+    # Concatenar todos os DataFrames
+    dfr_combined = pd.concat(dataframes, ignore_index=True) if dataframes else pd.DataFrame()
 
-            else:
-                print(f"      ❌ Erro HTTP {response.status_code}")
-                raise requests.HTTPError(f"Status code: {response.status_code} para estação {key}")
+    print("\n✅ Download concluído!")
+    print(f"   Total de registros novos: {len(dfr_combined)}")
+    if not dfr_combined.empty:
+        print(f"   Estações processadas: {sorted(dfr_combined['id_estacao'].unique().tolist())}")
+    return dfr_combined, new_state
 
-        except requests.RequestException as e:
-            print(f"      ❌ Erro ao baixar estação {key}: {e}")
-            raise
 
+@task
+def load_inea_state_task(bucket_name: str, blob_name: str) -> dict:
+    """Carrega os hashes das planilhas e os watermarks por estação da última execução."""
+    state = load_state(bucket_name, blob_name)
+    print(f"Estado carregado de gs://{bucket_name}/{blob_name}: {len(state)} chaves")
+    return state
 
-    # Concatenar todos os DataFrames
-    dfr_combined = pd.concat(dataframes, ignore_index=True)
 
-    print(f"\n✅ Download concluído!")
-    print(f"   Total de registros: {len(dfr_combined)}")
-    print(f"   Estações processadas: {sorted(dfr_combined['id_estacao'].unique().tolist())}")
-    return dfr_combined
+@task
+def save_inea_state_task(state: dict, bucket_name: str, blob_name: str) -> None:
+    """Grava o estado após o upload bem-sucedido das leituras novas."""
+    save_state(state, bucket_name, blob_name)
+    print(f"Estado salvo em gs://{bucket_name}/{blob_name}")
 
 
 @task
@@ -291,6 +374,7 @@ def save_data_to_partitions_task(
         savepath=prepath,
         data_type="csv",
         suffix=suffix,
+        directory_names={"ano_particao": "ano", "mes_particao": "mes", "data_particao": "data"},
     )
 
     print(f"✅ Arquivos salvos em: {prepath}")
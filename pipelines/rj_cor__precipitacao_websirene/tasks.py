@@ -12,11 +12,7 @@ import pandas as pd
 import pandas_read_xml as pdx
 import pendulum
 from prefect import task
-
-from pipelines.rj_cor__precipitacao_websirene.utils import (
-    parse_date_columns,
-    to_partitions,
-)
+from prefect_rj_iplanrio import parse_date_columns, to_partitions
 
 
 @task(retries=3, retry_delay_seconds=10)
@@ -172,7 +168,7 @@ def salvar_dados_task(dfr: pd.DataFrame) -> Union[str, Path]:
 
     # Preparar particionamento
     partition_column = "data_medicao"
-    dataframe, partitions = parse_date_columns(dfr, partition_column)
+    dataframe, partitions = parse_date_columns(dfr, partition_column, scheme="data")
 
     # Timestamp para sufixo do arquivo
     current_time = pendulum.now("America/Sao_Paulo").strftime("%Y%m%d%H%M")
@@ -184,6 +180,7 @@ def salvar_dados_task(dfr: pd.DataFrame) -> Union[str, Path]:
         savepath=prepath,
         data_type="csv",
         suffix=current_time,
+        append=True,
     )
 
     print(f"Arquivos salvos em: {prepath}")
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark da sessionização de 24h do relatório CVL.
+
+Gera um DataFrame sintético de mensagens, compara o resultado de `identificar_sessoes_24h`
+e `normalizar_telefones` com a implementação antiga (groupby().apply com iterrows e
+apply por linha) em uma amostra, e mede o tempo da versão atual no volume completo.
+
+Uso:
+    python -m pipelines.rj_crm__relatorio_cvl.benchmark_sessoes --mensagens 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipelines.rj_crm__relatorio_cvl.tasks import identificar_sessoes_24h, normalizar_telefones
+
+
+def _identificar_sessoes_cliente_antigo(group):
+    nova_sessao = []
+    if group.empty:
+        return pd.Series([], dtype=bool)
+
+    ultimo_inicio_sessao = group.iloc[0]['inicio_datetime']
+    for _, row in group.iterrows():
+        if (row['inicio_datetime'] - ultimo_inicio_sessao).total_seconds() > 24 * 3600:
+            nova_sessao.append(True)
+            ultimo_inicio_sessao = row['inicio_datetime']
+        else:
+            nova_sessao.append(False)
+    if nova_sessao:
+        nova_sessao[0] = True
+    return pd.Series(nova_sessao, index=group.index)
+
+
+def _sessoes_antigo(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['contato_telefone'] = df.apply(lambda row:
+        row['contato_telefone'][:4] + '9' + row['contato_telefone'][4:]
+        if pd.notnull(row['contato_telefone']) and len(str(row['contato_telefone'])) == 12
+        else row['contato_telefone'], axis=1)
+    df = df.sort_values(by=['contato_telefone', 'inicio_datetime'])
+    df['nova_sessao'] = df.groupby('contato_telefone', group_keys=False).apply(_identificar_sessoes_cliente_antigo)
+    df['nova_sessao'] = df['nova_sessao'].fillna(False).astype(int)
+    df['id_sessao_24h'] = df['contato_telefone'] + '_' + df.groupby('contato_telefone')['nova_sessao'].cumsum().astype(str)
+    return df
+
+
+def _sessoes_atual(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['contato_telefone'] = normalizar_telefones(df['contato_telefone'])
+    df = df.sort_values(by=['contato_telefone', 'inicio_datetime'])
+    df['nova_sessao'] = identificar_sessoes_24h(df['contato_telefone'], df['inicio_datetime']).astype(int)
+    df['id_sessao_24h'] = df['contato_telefone'] + '_' + df.groupby('contato_telefone')['nova_sessao'].cumsum().astype(str)
+    return df
+
+
+def gerar_mensagens(n_mensagens: int, n_clientes: int, seed: int = 0) -> pd.DataFrame:
+    """Mensagens de um mês com telefones de 12 e 13 dígitos, alguns nulos e datas nulas."""
+    rng = np.random.default_rng(seed)
+    clientes = rng.integers(10**10, 10**11, size=n_clientes).astype(str)
+    telefones = np.where(rng.random(n_clientes) < 0.5, "55" + clientes, "552" + clientes)
+    telefones = pd.Series(telefones[rng.integers(0, n_clientes, size=n_mensagens)])
+    telefones[rng.random(n_mensagens) < 0.001] = None
+
+    segundos = rng.integers(0, 31 * 24 * 3600, size=n_mensagens)
+    inicios = pd.Series(pd.Timestamp("2025-01-01") + pd.to_timedelta(segundos, unit="s"))
+    inicios[rng.random(n_mensagens) < 0.001] = pd.NaT
+    return pd.DataFrame({"contato_telefone": telefones, "inicio_datetime": inicios})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mensagens", type=int, default=1_000_000)
+    parser.add_argument("--clientes", type=int, default=200_000)
+    parser.add_argument("--amostra", type=int, default=50_000, help="Mensagens comparadas com a versão antiga")
+    args = parser.parse_args()
+
+    amostra = gerar_mensagens(args.amostra, max(1, args.amostra // 5), seed=1)
+    inicio = time.perf_counter()
+    antigo = _sessoes_antigo(amostra)
+    tempo_antigo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    atual = _sessoes_atual(amostra)
+    tempo_atual = time.perf_counter() - inicio
+
+    pd.testing.assert_frame_equal(antigo, atual)
+    print(f"Amostra de {args.amostra} mensagens: resultados idênticos")
+    print(f"  antigo: {tempo_antigo:.2f}s | atual: {tempo_atual:.2f}s")
+
+    df = gerar_mensagens(args.mensagens, args.clientes)
+    inicio = time.perf_counter()
+    resultado = _sessoes_atual(df)
+    tempo = time.perf_counter() - inicio
+    print(
+        f"{args.mensagens} mensagens, {args.clientes} clientes: {resultado['nova_sessao'].sum()} sessões "
+        f"em {tempo:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
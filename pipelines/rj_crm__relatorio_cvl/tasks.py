@@ -3,26 +3,98 @@
 Tasks para o pipeline de relatorio CVL
 """
 
+import numpy as np
 import pendulum
 import pandas as pd
 from prefect import task
 
 
-def identificar_sessoes_cliente(group):
-        nova_sessao = []
-        if group.empty:
-            return pd.Series([], dtype=bool)
+SESSAO_24H_NS = 24 * 3600 * 10**9
 
-        ultimo_inicio_sessao = group.iloc[0]['inicio_datetime']
-        for _, row in group.iterrows():
-            if (row['inicio_datetime'] - ultimo_inicio_sessao).total_seconds() > 24 * 3600:
-                nova_sessao.append(True)
-                ultimo_inicio_sessao = row['inicio_datetime']
-            else:
-                nova_sessao.append(False)
-        if nova_sessao:
-            nova_sessao[0] = True
-        return pd.Series(nova_sessao, index=group.index)
+
+def normalizar_telefones(telefones: pd.Series) -> pd.Series:
+    """
+    Insere o '9' após os 4 primeiros caracteres dos telefones com 12 caracteres.
+
+    Os demais valores (inclusive nulos) são mantidos como estão.
+    """
+    com_12_digitos = telefones.notna() & (telefones.astype(str).str.len() == 12)
+    if not com_12_digitos.any():
+        return telefones
+
+    telefones = telefones.copy()
+    alvo = telefones[com_12_digitos].astype(str)
+    telefones[com_12_digitos] = alvo.str[:4] + "9" + alvo.str[4:]
+    return telefones
+
+
+def identificar_sessoes_24h(telefones: pd.Series, inicios: pd.Series) -> pd.Series:
+    """
+    Marca as mensagens que abrem uma nova sessão de 24h do cliente.
+
+    Espera os dados já ordenados por telefone e data de início (nulos por último). A
+    primeira mensagem de cada telefone abre uma sessão; uma mensagem abre nova sessão
+    quando passou mais de 24h do início da sessão corrente. Em vez de percorrer mensagem
+    a mensagem, cada início de sessão localiza o próximo com uma busca binária feita
+    sobre arrays, para todos os clientes de uma vez.
+    Mensagens sem data nunca abrem sessão (exceto se forem a primeira do telefone) e
+    mensagens sem telefone ficam com False.
+
+    Args:
+        telefones (pd.Series): Telefones dos clientes, ordenados.
+        inicios (pd.Series): Data e hora de início de cada mensagem, ordenadas por telefone.
+
+    Returns:
+        pd.Series: Série booleana com o mesmo índice das entradas.
+    """
+    n = len(telefones)
+    nova_sessao = np.zeros(n, dtype=bool)
+    if n == 0:
+        return pd.Series(nova_sessao, index=telefones.index)
+
+    codigos, _ = pd.factorize(telefones, use_na_sentinel=True)
+    inicio_ns = inicios.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    sem_data = pd.isna(inicios).to_numpy()
+
+    # Blocos contíguos de cada telefone
+    comeco = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+    fim = np.r_[comeco[1:], n]
+    com_telefone = codigos[comeco] >= 0
+    comeco, fim = comeco[com_telefone], fim[com_telefone]
+    nova_sessao[comeco] = True
+
+    # Datas nulas ficam no fim de cada bloco; o trecho com data vai de comeco a fim_datado
+    nulos_acumulados = np.r_[0, np.cumsum(sem_data)]
+    fim_datado = fim - (nulos_acumulados[fim] - nulos_acumulados[comeco])
+
+    # Só blocos cuja última data passa de 24h após a primeira têm mais de uma sessão
+    tem_datas = fim_datado > comeco
+    multiplas = np.zeros(len(comeco), dtype=bool)
+    multiplas[tem_datas] = (
+        inicio_ns[fim_datado[tem_datas] - 1] - inicio_ns[comeco[tem_datas]] > SESSAO_24H_NS
+    )
+
+    # Todos os clientes avançam juntos, uma sessão por rodada: cada início de sessão
+    # procura, por busca binária dentro do próprio bloco, a primeira mensagem mais de 24h
+    # depois dele. O número de rodadas é o maior número de sessões de um cliente.
+    atual = comeco[multiplas]
+    limite = fim_datado[multiplas]
+    while atual.size:
+        alvo = inicio_ns[atual] + SESSAO_24H_NS
+        baixo, alto = atual + 1, limite
+        buscando = baixo < alto
+        while buscando.any():
+            meio = (baixo + alto) // 2
+            depois = inicio_ns[np.minimum(meio, n - 1)] > alvo
+            alto = np.where(buscando & depois, meio, alto)
+            baixo = np.where(buscando & ~depois, meio + 1, baixo)
+            buscando = baixo < alto
+
+        encontrou = baixo < limite
+        atual, limite = baixo[encontrou], limite[encontrou]
+        nova_sessao[atual] = True
+
+    return pd.Series(nova_sessao, index=telefones.index)
 
 
 def estatisticas_semanais_sessoes(df: pd.DataFrame) -> pd.DataFrame:
@@ -115,18 +187,14 @@ def calculate_24h_sessions(df: pd.DataFrame, report_month: str) -> tuple[pd.Data
 
     # Se o comprimento for 12, insere '9' após os 4 primeiros caracteres
     # Caso contrário, mantém o valor original
-    df['contato_telefone'] = df.apply(lambda row:
-        row['contato_telefone'][:4] + '9' + row['contato_telefone'][4:]
-        if pd.notnull(row['contato_telefone']) and len(str(row['contato_telefone'])) == 12
-        else row['contato_telefone'], axis=1)
-    
+    df['contato_telefone'] = normalizar_telefones(df['contato_telefone'])
+
     # Ordenar os dados por cliente e data de início
     df = df.sort_values(by=['contato_telefone', 'inicio_datetime'])
 
-    df['nova_sessao'] = df.groupby('contato_telefone', group_keys=False).apply(identificar_sessoes_cliente)
+    df['nova_sessao'] = identificar_sessoes_24h(df['contato_telefone'], df['inicio_datetime']).astype(int)
     print(f"dtypes: {df.dtypes}")
     print(f"iloc: {df.iloc[0]}")
-    df['nova_sessao'] = df['nova_sessao'].fillna(False).astype(int)
     df['id_sessao_24h'] = df['contato_telefone'] + '_' + df.groupby('contato_telefone')['nova_sessao'].cumsum().astype(str)
 
     # Extrair o mês e ano do início da interação
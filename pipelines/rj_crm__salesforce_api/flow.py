@@ -41,6 +41,8 @@ def rj_crm__salesforce_api(
     query_params: dict | None = None,
     body_json: dict | None = None,
     page_size: int = 200,
+    max_concurrent_pages: int = 4,
+    log_page_json: bool = False,
     infisical_secret_path: str | None = None,
 ):
     """
@@ -69,6 +71,9 @@ def rj_crm__salesforce_api(
         body_json: Body JSON para POST. Não é necessário informar page/pageSize —
                    gerenciados automaticamente pela paginação.
         page_size: Registros por página. Padrão: 200.
+        max_concurrent_pages: Máximo de páginas buscadas ao mesmo tempo. Padrão: 4.
+        log_page_json: Imprime o JSON (truncado em 2000 caracteres) de cada página.
+                       Útil para depuração. Padrão: False.
         infisical_secret_path: Path no Infisical para as credenciais da SFMC.
                                Padrão: "/salesforce_marketing_cloud".
     """
@@ -90,6 +95,8 @@ def rj_crm__salesforce_api(
         query_params=query_params,
         body_json=body_json,
         page_size=page_size,
+        max_concurrent_pages=max_concurrent_pages,
+        log_page_json=log_page_json,
     )
 
     # 2. Montar DataFrame com colunas 'data' e 'data_particao'
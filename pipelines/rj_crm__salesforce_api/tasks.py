@@ -12,16 +12,24 @@ Credenciais necessárias no Infisical:
 Métodos suportados (parâmetro http_method no flow):
   - "get"  : GET com paginação automática via $page / $pageSize
   - "post" : POST com body JSON e paginação automática via page.page / page.pageSize
+
+A primeira página informa o total (`count`); as demais são buscadas em paralelo sobre
+uma única sessão HTTP, com o token renovado automaticamente em caso de 401.
 """
 
 import json
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import Any, Literal
+from typing import Any, Callable, Literal
 
 import pandas as pd
 import requests
 from iplanrio.pipelines_utils.env import getenv_or_action
 from prefect import task
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 # ---------------------------------------------------------------------------
@@ -73,113 +81,184 @@ def _get_access_token(client_id: str, client_secret: str, auth_url: str) -> str:
 
 
 # ---------------------------------------------------------------------------
-# GET com paginação automática
+# Sessão autenticada
+# ---------------------------------------------------------------------------
+
+class _SfmcSession:
+    """
+    Sessão HTTP autenticada na SFMC, compartilhável entre threads.
+
+    Usa um pool de conexões do tamanho da concorrência e renova o token uma única vez
+    quando uma requisição recebe 401 (as demais threads reaproveitam o token novo).
+    """
+
+    def __init__(self, creds: dict[str, str], pool_size: int):
+        self._creds = creds
+        self._lock = threading.Lock()
+        self._token = None
+        self._session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=("GET", "POST"),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._refresh_token(stale_token=None)
+
+    def _refresh_token(self, stale_token: str | None) -> None:
+        with self._lock:
+            if self._token == stale_token:
+                self._token = _get_access_token(
+                    client_id=self._creds["client_id"],
+                    client_secret=self._creds["client_secret"],
+                    auth_url=self._creds["auth_url"],
+                )
+
+    def request(self, method: str, url: str, **kwargs) -> dict:
+        """Faz a requisição, renovando o token e repetindo uma vez em caso de 401."""
+        token = self._token
+        response = self._session.request(method, url, headers=self._headers(token), timeout=300, **kwargs)
+        if response.status_code == 401:
+            print("[SFMC] Token expirado (401). Renovando e repetindo a requisição...")
+            self._refresh_token(stale_token=token)
+            response = self._session.request(method, url, headers=self._headers(self._token), timeout=300, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _headers(token: str) -> dict[str, str]:
+        return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+
+
+# ---------------------------------------------------------------------------
+# Paginação
 # ---------------------------------------------------------------------------
 
+def _fetch_all_pages(
+    fetch_page: Callable[[int], dict],
+    label: str,
+    max_workers: int,
+    log_page_json: bool,
+) -> list[dict]:
+    """
+    Busca a primeira página e, com o `count` dela, as demais em paralelo.
+
+    O número de páginas é calculado a partir do total (`count`) e da quantidade de
+    registros devolvida na primeira página (o servidor pode limitar o pageSize pedido).
+    As páginas são concatenadas em ordem; uma página vazia encerra a coleta, como na
+    paginação sequencial.
+
+    Args:
+        fetch_page: Função que busca uma página (1-based) e devolve o JSON da resposta.
+        label: Prefixo dos logs ("GET" ou "POST").
+        max_workers: Máximo de páginas buscadas ao mesmo tempo.
+        log_page_json: Se True, imprime os primeiros 2000 caracteres do JSON de cada página.
+
+    Returns:
+        Lista com todos os registros de todas as páginas.
+    """
+
+    def _page(page: int) -> list[dict]:
+        data = fetch_page(page)
+        if log_page_json:
+            print(f"[SFMC][{label}] Resposta da página {page} (primeiros 2000 chars):")
+            print(json.dumps(data, indent=2, ensure_ascii=False)[:2000])
+        return data
+
+    first = _page(1)
+    all_records = list(first.get("items", []))
+    total = first.get("count", len(all_records))
+    print(f"[SFMC][{label}] Página 1: {len(all_records)} registros. Total: {total}.")
+
+    if not all_records or len(all_records) >= total:
+        return all_records
+
+    last_page = math.ceil(total / len(all_records))
+    print(f"[SFMC][{label}] Buscando páginas 2 a {last_page} com até {max_workers} requisições simultâneas...")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, last_page - 1))) as executor:
+        pages = executor.map(_page, range(2, last_page + 1))
+        for page, data in enumerate(pages, start=2):
+            items = data.get("items", [])
+            if not items:
+                print(f"[SFMC][{label}] Página {page} vazia; encerrando a paginação.")
+                break
+            all_records.extend(items)
+
+    print(f"[SFMC][{label}] Total acumulado: {len(all_records)} / {total}.")
+    return all_records
+
+
 def _fetch_all_pages_get(
+    client: _SfmcSession,
     url: str,
-    headers: dict,
     query_params: dict[str, Any],
     page_size: int,
+    max_workers: int = 4,
+    log_page_json: bool = False,
 ) -> list[dict]:
     """
-    Itera todas as páginas de uma rota GET do SFMC usando $page e $pageSize.
+    Busca todas as páginas de uma rota GET do SFMC usando $page e $pageSize.
 
     A resposta deve conter os campos `count` (total de registros) e `items`
     (lista de registros da página atual).
 
     Args:
+        client: Sessão autenticada na SFMC.
         url: URL completa da rota.
-        headers: Headers HTTP (Authorization, Content-Type).
         query_params: Query params base (sem $page/$pageSize — adicionados aqui).
         page_size: Quantidade de registros por página.
+        max_workers: Máximo de páginas buscadas ao mesmo tempo.
+        log_page_json: Se True, imprime o JSON (truncado) de cada página.
 
     Returns:
         Lista com todos os registros de todas as páginas.
     """
-    all_records = []
-    page = 1
 
-    while True:
+    def fetch_page(page: int) -> dict:
         params = {**query_params, "$page": page, "$pageSize": page_size}
-        print(f"[SFMC][GET] Buscando página {page} (pageSize={page_size})...")
+        return client.request("GET", url, params=params)
 
-        response = requests.get(url, headers=headers, params=params, timeout=300)
-        response.raise_for_status()
-        data = response.json()
+    return _fetch_all_pages(fetch_page, "GET", max_workers, log_page_json)
 
-        print(f"[SFMC][GET] Resposta da página {page} (primeiros 2000 chars):")
-        print(json.dumps(data, indent=2, ensure_ascii=False)[:2000])
-
-        items = data.get("items", [])
-        all_records.extend(items)
-
-        total = data.get("count", len(items))
-        print(f"[SFMC][GET] Página {page}: {len(items)} registros. Total acumulado: {len(all_records)} / {total}.")
-
-        if len(all_records) >= total or not items:
-            break
-
-        page += 1
-
-    return all_records
-
-
-# ---------------------------------------------------------------------------
-# POST /query com paginação automática
-# ---------------------------------------------------------------------------
 
 def _fetch_all_pages_post(
+    client: _SfmcSession,
     url: str,
-    headers: dict,
     body: dict[str, Any],
     page_size: int,
+    max_workers: int = 4,
+    log_page_json: bool = False,
 ) -> list[dict]:
     """
-    Itera todas as páginas de uma rota POST /query do SFMC.
+    Busca todas as páginas de uma rota POST /query do SFMC.
 
     O body deve conter uma chave `page` com `page` e `pageSize`.
     A resposta deve conter `count` (total) e `items` (página atual).
 
     Args:
+        client: Sessão autenticada na SFMC.
         url: URL completa da rota (ex: .../asset/v1/content/assets/query).
-        headers: Headers HTTP (Authorization, Content-Type).
-        body: Body JSON base. A chave `page` é sobrescrita a cada iteração.
+        body: Body JSON base. A chave `page` é sobrescrita em cada página.
         page_size: Quantidade de registros por página.
+        max_workers: Máximo de páginas buscadas ao mesmo tempo.
+        log_page_json: Se True, imprime o body enviado e o JSON (truncado) de cada página.
 
     Returns:
         Lista com todos os registros de todas as páginas.
     """
-    all_records = []
-    page = 1
-
-    while True:
-        page_body = {
-            **body,
-            "page": {"page": page, "pageSize": page_size},
-        }
-        print(f"[SFMC][POST] Buscando página {page} (pageSize={page_size})...")
-
-        print(f"[SFMC][POST] Body enviado: {json.dumps(page_body, indent=2)}")
-        response = requests.post(url, headers=headers, json=page_body, timeout=300)
-        response.raise_for_status()
-        data = response.json()
-
-        print(f"[SFMC][POST] Resposta da página {page} (primeiros 2000 chars):")
-        print(json.dumps(data, indent=2, ensure_ascii=False)[:2000])
 
-        items = data.get("items", [])
-        all_records.extend(items)
+    def fetch_page(page: int) -> dict:
+        page_body = {**body, "page": {"page": page, "pageSize": page_size}}
+        if log_page_json:
+            print(f"[SFMC][POST] Body enviado: {json.dumps(page_body, indent=2)}")
+        return client.request("POST", url, json=page_body)
 
-        total = data.get("count", len(items))
-        print(f"[SFMC][POST] Página {page}: {len(items)} registros. Total acumulado: {len(all_records)} / {total}.")
-
-        if len(all_records) >= total or not items:
-            break
-
-        page += 1
-
-    return all_records
+    return _fetch_all_pages(fetch_page, "POST", max_workers, log_page_json)
 
 
 # ---------------------------------------------------------------------------
@@ -194,10 +273,12 @@ def fetch_sfmc_route(
     query_params: dict[str, Any] | None = None,
     body_json: dict[str, Any] | None = None,
     page_size: int = 200,
+    max_concurrent_pages: int = 4,
+    log_page_json: bool = False,
 ) -> list[dict]:
     """
     Chama uma rota da Salesforce Marketing Cloud REST API e retorna todos os registros,
-    iterando automaticamente todas as páginas.
+    buscando automaticamente todas as páginas.
 
     Args:
         route: Rota relativa da API. Pode conter placeholders {chave}.
@@ -211,44 +292,42 @@ def fetch_sfmc_route(
         body_json: Body JSON para POST. A chave "page" é gerenciada automaticamente
                    pela paginação — não é necessário informar page/pageSize aqui.
         page_size: Quantidade de registros por página. Padrão: 200.
+        max_concurrent_pages: Máximo de páginas buscadas ao mesmo tempo. Padrão: 4.
+        log_page_json: Se True, imprime o JSON (truncado) de cada página. Padrão: False.
 
     Returns:
         Lista com todos os registros retornados pela API (todas as páginas).
     """
+    if http_method not in ("get", "post"):
+        raise ValueError(f"http_method inválido: '{http_method}'. Use 'get' ou 'post'.")
+
     creds = _get_sfmc_credentials()
-    access_token = _get_access_token(
-        client_id=creds["client_id"],
-        client_secret=creds["client_secret"],
-        auth_url=creds["auth_url"],
-    )
+    client = _SfmcSession(creds, pool_size=max(1, max_concurrent_pages))
 
     # Substituir placeholders na rota
     resolved_route = route.format(**(route_params or {}))
     url = f"{creds['rest_base_url']}{resolved_route}"
 
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-
     print(f"[SFMC] Método: {http_method.upper()} | URL: {url}")
 
     if http_method == "get":
         records = _fetch_all_pages_get(
+            client=client,
             url=url,
-            headers=headers,
             query_params=query_params or {},
             page_size=page_size,
+            max_workers=max_concurrent_pages,
+            log_page_json=log_page_json,
         )
-    elif http_method == "post":
+    else:
         records = _fetch_all_pages_post(
+            client=client,
             url=url,
-            headers=headers,
             body=body_json or {},
             page_size=page_size,
+            max_workers=max_concurrent_pages,
+            log_page_json=log_page_json,
         )
-    else:
-        raise ValueError(f"http_method inválido: '{http_method}'. Use 'get' ou 'post'.")
 
     print(f"[SFMC] Total de registros coletados (todas as páginas): {len(records)}")
     return records
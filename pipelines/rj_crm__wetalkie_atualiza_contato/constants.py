@@ -27,6 +27,7 @@ class WetalkieAtualizaContatoConstants(Enum):
     INFISICAL_SECRET_PATH = "/wetalkie"
     API_LOGIN_ROUTE = "users/login"
     API_CONTACTS_ENDPOINT = "/callcenter/contacts"
+    MAX_CONCURRENT_REQUESTS = 10
 
     # Query para buscar contatos faltantes
     CONTACTS_QUERY = """
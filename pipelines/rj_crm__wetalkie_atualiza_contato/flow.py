@@ -31,6 +31,7 @@ def rj_crm__wetalkie_atualiza_contato(
     dump_mode: str | None = None,
     materialize_after_dump: bool | None = None,
     infisical_secret_path: str = "/wetalkie",
+    max_concurrent_requests: int | None = None,
 ):
     """
     Flow para atualizar dados de contatos faltantes via API Wetalkie.
@@ -44,6 +45,7 @@ def rj_crm__wetalkie_atualiza_contato(
         dump_mode: Modo de dump (default: append)
         materialize_after_dump: Se deve materializar após dump (default: False)
         infisical_secret_path: Caminho dos secrets no Infisical (default: /wetalkie)
+        max_concurrent_requests: Requisições simultâneas à API Wetalkie (default: 10)
     """
 
     # Usar valores dos constants como padrão para parâmetros
@@ -56,6 +58,10 @@ def rj_crm__wetalkie_atualiza_contato(
         else WetalkieAtualizaContatoConstants.MATERIALIZE_AFTER_DUMP.value
     )
 
+    max_concurrent_requests = (
+        max_concurrent_requests or WetalkieAtualizaContatoConstants.MAX_CONCURRENT_REQUESTS.value
+    )
+
     file_format = WetalkieAtualizaContatoConstants.FILE_FORMAT.value
     root_folder = WetalkieAtualizaContatoConstants.ROOT_FOLDER.value
     query = WetalkieAtualizaContatoConstants.CONTACTS_QUERY.value
@@ -86,10 +92,11 @@ def rj_crm__wetalkie_atualiza_contato(
         "wetalkie_user",
         "wetalkie_pass",
         login_route=WetalkieAtualizaContatoConstants.API_LOGIN_ROUTE.value,
+        pool_size=max_concurrent_requests,
     )
 
     # Buscar dados dos contatos na API Wetalkie
-    updated_contacts = get_contacts(api, validated_contacts)
+    updated_contacts = get_contacts(api, validated_contacts, max_workers=max_concurrent_requests)
     # Verificar se algum contato foi atualizado
     final_contacts = skip_flow_if_empty(
         data=updated_contacts,
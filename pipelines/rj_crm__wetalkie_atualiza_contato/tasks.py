@@ -11,20 +11,53 @@ Tasks migradas do Prefect 1.4 para 3.0 - CRM Wetalkie Atualiza Contato
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Tuple
 
 import pandas as pd
 from iplanrio.pipelines_utils.logging import log
 from prefect import task
 
 
+def _fetch_contact(api: object, contact_id) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Fetch one contact from the Wetalkie API
+
+    Returns:
+        Tuple (serialized item, None) or (None, reason why the contact has no data)
+    """
+    response = api.get(path=f"/callcenter/contacts/{contact_id!s}")
+
+    # Handle API response structure
+    if hasattr(response, "json"):
+        response_data = response.json()
+    else:
+        response_data = response
+
+    if not response_data.get("data"):
+        return None, f"No data found for contact {contact_id}"
+
+    data = response_data["data"]
+
+    # Check if the expected structure exists
+    if "item" not in data or not data["item"]:
+        return None, f"No item data found for contact {contact_id}"
+
+    return json.dumps(data["item"]), None
+
+
 @task
-def get_contacts(api: object, dfr: pd.DataFrame) -> pd.DataFrame:
+def get_contacts(api: object, dfr: pd.DataFrame, max_workers: int = 10) -> pd.DataFrame:
     """
     Get all missing contacts from the Wetalkie API
 
+    Contacts are fetched concurrently (at most `max_workers` requests in flight over the
+    API handler's pooled session) and joined back to the DataFrame by id once at the end.
+
     Args:
         api: Authenticated API handler instance
         dfr: DataFrame with contact IDs that need phone data
+        max_workers: Maximum number of concurrent requests
 
     Returns:
         DataFrame with updated contact phone and name data
@@ -33,55 +66,37 @@ def get_contacts(api: object, dfr: pd.DataFrame) -> pd.DataFrame:
         log("No contacts missing phone - returning empty DataFrame")
         return pd.DataFrame()  # Return empty DataFrame instead of raising ENDRUN
 
-    log(f"Getting {dfr.shape[0]} missing contacts from the Wetalkie API")
-
-    # Create a copy to avoid modifying the original DataFrame
-    result_dfr = dfr.copy()
-    result_dfr["json_data"] = None
+    contact_ids = dfr["id_contato"].unique()
+    log(f"Getting {len(contact_ids)} missing contacts from the Wetalkie API with {max_workers} workers")
 
-    updated_count = 0
+    results = []
     failed_count = 0
-
-    for contact_id in result_dfr["id_contato"].unique():
-        try:
-            log(f"Getting contact {contact_id} from the Wetalkie API")
-            response = api.get(path=f"/callcenter/contacts/{contact_id!s}")
-
-            # Handle API response structure
-            if hasattr(response, "json"):
-                response_data = response.json()
-            else:
-                response_data = response
-
-            if not response_data.get("data"):
-                log(f"No data found for contact {contact_id}")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(_fetch_contact, api, contact_id): contact_id for contact_id in contact_ids}
+        for future in as_completed(futures):
+            contact_id = futures[future]
+            try:
+                json_data, missing = future.result()
+            except Exception as error:
+                log(f"Error processing contact {contact_id}: {error}", level="error")
                 failed_count += 1
                 continue
 
-            data = response_data["data"]
-
-            # Check if the expected structure exists
-            if "item" not in data or not data["item"]:
-                log(f"No item data found for contact {contact_id}")
+            if missing:
+                log(missing)
                 failed_count += 1
                 continue
+            results.append((contact_id, json_data))
 
-            item = data["item"]
-
-            # Update contact information
-            result_dfr.loc[result_dfr["id_contato"] == contact_id, "json_data"] = json.dumps(item)
-            exemple = result_dfr.loc[result_dfr["id_contato"] == contact_id].copy()
-            updated_count += 1
+    log(f"Contact processing completed. Updated: {len(results)}, Failed: {failed_count}")
 
-        except Exception as error:
-            log(f"Error processing contact {contact_id}: {error}", level="error")
-            failed_count += 1
-            continue
-
-    log(f"Contact processing completed. Updated: {updated_count}, Failed: {failed_count}")
+    # Join the fetched data back by contact id, keeping the original row order
+    json_by_contact = dict(results)
+    result_dfr = dfr.copy()
+    result_dfr["json_data"] = result_dfr["id_contato"].map(json_by_contact).astype(object)
 
     # Filter out contacts that weren't updated successfully
-    successful_contacts = result_dfr[result_dfr["json_data"].notna()]
+    successful_contacts = result_dfr[result_dfr["json_data"].notna()].copy()
     successful_contacts["id_contato"] = successful_contacts["id_contato"].astype(str)
 
     log(f"Returning {len(successful_contacts)} successfully updated contacts")
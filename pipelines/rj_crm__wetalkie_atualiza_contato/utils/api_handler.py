@@ -4,15 +4,22 @@ API Handler for managing authenticated API requests with automatic token managem
 Reutilizado do pipeline rj_crm__api_wetalkie
 """
 
+import threading
 from typing import Any, Dict, Optional
 
 import requests
 from iplanrio.pipelines_utils.logging import log
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class ApiHandler:
     """
     Handles API authentication and request management with automatic token refresh.
+
+    Requests go through a pooled session (safe to share between threads) that retries
+    429 responses with exponential backoff, honoring Retry-After. When several threads
+    get a 401 at once, the token is renewed only once under a lock and the others reuse it.
     """
 
     def __init__(
@@ -22,6 +29,9 @@ class ApiHandler:
         password: str,
         login_route: str = "users/login",
         token_type: str = "Bearer",
+        pool_size: int = 10,
+        max_retries: int = 5,
+        backoff_factor: float = 1.0,
     ):
         self.base_url = base_url.rstrip("/")
         self.username = username
@@ -30,10 +40,29 @@ class ApiHandler:
         self.token_type = token_type
         self.token = None
         self.headers = {"Content-Type": "application/json"}
+        self._token_lock = threading.Lock()
+        self.session = self._build_session(pool_size, max_retries, backoff_factor)
 
         # Perform initial login
         self._login()
 
+    @staticmethod
+    def _build_session(pool_size: int, max_retries: int, backoff_factor: float) -> requests.Session:
+        """Create a session with a connection pool of `pool_size` and retries on 429"""
+        retry = Retry(
+            total=max_retries,
+            status_forcelist=(429,),
+            allowed_methods=("GET",),
+            backoff_factor=backoff_factor,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
     def _login(self):
         """Perform login and extract token from response"""
         login_url = f"{self.base_url}/{self.login_route}"
@@ -63,7 +92,8 @@ class ApiHandler:
 
             if token:
                 self.token = token
-                self.headers["Authorization"] = f"{self.token_type} {token}"
+                # New dict: threads holding the previous headers keep a consistent snapshot
+                self.headers = {**self.headers, "Authorization": f"{self.token_type} {token}"}
                 log("Authentication token obtained successfully")
             else:
                 log("Warning: No token found in login response")
@@ -73,11 +103,18 @@ class ApiHandler:
             log(f"Login failed: {e}")
             raise Exception(f"Failed to authenticate with API: {e}")
 
-    def _refresh_token_if_needed(self, response):
-        """Check if token needs refresh based on response status"""
+    def _refresh_token_if_needed(self, response, stale_headers: Dict[str, str]):
+        """
+        Check if token needs refresh based on response status.
+
+        Only the first thread to see a 401 for `stale_headers` logs in again; the others
+        find the headers already replaced and just retry with them.
+        """
         if response.status_code == 401:
-            log("Token expired, refreshing...")
-            self._login()
+            with self._token_lock:
+                if self.headers is stale_headers:
+                    log("Token expired, refreshing...")
+                    self._login()
             return True
         return False
 
@@ -85,11 +122,12 @@ class ApiHandler:
         """Perform GET request with automatic token refresh"""
         url = f"{self.base_url}/{path.lstrip('/')}"
 
-        response = requests.get(url, headers=self.headers, params=params, **kwargs)
+        headers = self.headers
+        response = self.session.get(url, headers=headers, params=params, **kwargs)
 
-        if self._refresh_token_if_needed(response):
+        if self._refresh_token_if_needed(response, headers):
             # Retry with new token
-            response = requests.get(url, headers=self.headers, params=params, **kwargs)
+            response = self.session.get(url, headers=self.headers, params=params, **kwargs)
 
         return response
 
@@ -103,9 +141,10 @@ class ApiHandler:
         """Perform POST request with automatic token refresh"""
         url = f"{self.base_url}/{path.lstrip('/')}"
 
-        response = requests.post(url, headers=self.headers, json=json, data=data, **kwargs)
+        headers = self.headers
+        response = requests.post(url, headers=headers, json=json, data=data, **kwargs)
 
-        if self._refresh_token_if_needed(response):
+        if self._refresh_token_if_needed(response, headers):
             # Retry with new token
             response = requests.post(url, headers=self.headers, json=json, data=data, **kwargs)
 
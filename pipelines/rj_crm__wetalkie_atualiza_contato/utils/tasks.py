@@ -24,15 +24,21 @@ def access_api(
     infisical_username: str,
     infisical_password: str,
     login_route: str = "users/login",
+    pool_size: int = 10,
 ) -> ApiHandler:
     """
     Access API and return authenticated handler to be used in other requests.
+
+    `pool_size` sizes the handler's connection pool; match it to the number of
+    concurrent requests made with the handler.
     """
     url = getenv_or_action(infisical_url)
     username = getenv_or_action(infisical_username)
     password = getenv_or_action(infisical_password)
 
-    api = ApiHandler(base_url=url, username=username, password=password, login_route=login_route)
+    api = ApiHandler(
+        base_url=url, username=username, password=password, login_route=login_route, pool_size=pool_size
+    )
     return api
 
 
@@ -12,7 +12,7 @@ from pipelines.rj_crm__whitelist_whatsapp.tasks import (
     get_whitelist_credentials,
     fetch_whitelist_data,
     transform_whitelist_data,
-    generate_backfill_data,
+    write_backfill_partitions,
 )
 from pipelines.rj_crm__whitelist_whatsapp.utils.tasks import create_date_partitions
 
@@ -48,21 +48,29 @@ def rj_crm__whitelist_whatsapp(
     # 2. Fetch Data
     raw_data = fetch_whitelist_data(creds=creds)
 
+    root_folder = f"{WhitelistConstants.ROOT_FOLDER.value}/{table_id}"
+
     # 3. Transform Data (Standard or Backfill)
     if backfill:
-        df_whitelist = generate_backfill_data(raw_data=raw_data)
+        # Backfill partitions are written one at a time, straight to disk
+        log_path = write_backfill_partitions(
+            raw_data=raw_data,
+            root_folder=root_folder,
+            file_format=WhitelistConstants.FILE_FORMAT.value,
+        )
     else:
         df_whitelist = transform_whitelist_data(raw_data=raw_data)
+        log_path = None
+        if not df_whitelist.empty:
+            log_path = create_date_partitions(
+                dataframe=df_whitelist,
+                partition_column=WhitelistConstants.PARTITION_COLUMN.value,
+                file_format=WhitelistConstants.FILE_FORMAT.value,
+                root_folder=root_folder,
+            )
 
     # 4. Ingest into BigQuery
-    if not df_whitelist.empty:
-        log_path = create_date_partitions(
-            dataframe=df_whitelist,
-            partition_column=WhitelistConstants.PARTITION_COLUMN.value,
-            file_format=WhitelistConstants.FILE_FORMAT.value,
-            root_folder=f"{WhitelistConstants.ROOT_FOLDER.value}/{table_id}"
-        )
-
+    if log_path is not None:
         create_table_and_upload_to_gcs_task(
             data_path=log_path,
             dataset_id=dataset_id,
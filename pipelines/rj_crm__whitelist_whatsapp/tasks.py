@@ -2,6 +2,7 @@
 """
 Tasks for rj_crm__whitelist_whatsapp pipeline.
 """
+import numpy as np
 import requests
 import pandas as pd
 from datetime import datetime
@@ -12,6 +13,7 @@ from iplanrio.pipelines_utils.logging import log
 from iplanrio.pipelines_utils.env import getenv_or_action
 
 from pipelines.rj_crm__whitelist_whatsapp.constants import WhitelistConstants
+from pipelines.rj_crm__whitelist_whatsapp.utils.tasks import partition_file_path, write_partition_file
 
 
 @task
@@ -171,55 +173,67 @@ def transform_whitelist_data(raw_data: List[Dict[str, Any]]) -> pd.DataFrame:
 
 
 @task
-def generate_backfill_data(raw_data: List[Dict[str, Any]]) -> pd.DataFrame:
+def write_backfill_partitions(
+    raw_data: List[Dict[str, Any]],
+    root_folder: str,
+    file_format: str = WhitelistConstants.FILE_FORMAT.value,
+) -> Optional[str]:
     """
-    Expands the current whitelist into historical daily snapshots.
-    For each date D from min(added_at) to today, creates a partition
+    Expands the current whitelist into historical daily snapshots, written straight to disk.
+    For each date D from min(added_at) to today, writes a partition
     with records where added_at <= D.
+
+    The base frame is stringified and sorted by added_at once; each snapshot is a prefix
+    of it (a cumulative cut found with searchsorted), so only one partition is held in
+    memory at a time, regardless of how long the history is.
+
+    Returns:
+        The root folder with the partitions, or None when there is nothing to write.
     """
     if not raw_data:
         log("Nenhum dado para o backfill")
-        return pd.DataFrame()
+        return None
 
     df_base = pd.DataFrame(raw_data)
 
     # Pre-process added_at
-    df_base["added_at_dt"] = pd.to_datetime(df_base["added_at"], errors="coerce")
-    df_base = df_base.dropna(subset=["added_at_dt"])
-
-    min_date = df_base["added_at_dt"].min().date()
+    added_at = pd.to_datetime(df_base["added_at"], errors="coerce")
+    if added_at.dt.tz is not None:
+        # Keep the local calendar day of each timestamp
+        added_at = added_at.dt.tz_localize(None)
+    valid = added_at.notna()
+    if not valid.any():
+        log("Nenhum registro com added_at válido para o backfill")
+        return None
+
+    order = added_at[valid].sort_values(kind="stable").index
+    added_days = added_at.loc[order].dt.normalize().to_numpy()
+    df_base = df_base.loc[order].astype(str).reset_index(drop=True)
+
+    min_date = pd.Timestamp(added_days[0]).date()
     max_date = datetime.now().date()
-
-    all_dates = pd.date_range(start=min_date, end=max_date, freq="D").date
+    all_dates = pd.date_range(start=min_date, end=max_date, freq="D")
 
     log(f"Iniciando backfill de {len(all_dates)} dias (de {min_date} até {max_date})")
 
-    backfill_dfs = []
-
-    for d in all_dates:
-        # Filter records that existed on date 'd'
-        df_snapshot = df_base[df_base["added_at_dt"].dt.date <= d].copy()
+    # Number of records that existed on each date (added_at <= D)
+    cuts = np.searchsorted(added_days, all_dates.to_numpy(), side="right")
 
-        if not df_snapshot.empty:
-            # Add metadata
-            df_snapshot["data_particao"] = d.strftime("%Y-%m-%d")
-            # Calculate week_start for that specific date in history
-            monday = d - pd.Timedelta(days=d.weekday())
-            df_snapshot["week_start"] = monday.strftime("%Y-%m-%d")
-            df_snapshot["_prefect_extracted_at"] = datetime.now()
+    total_rows = 0
+    for d, cut in zip(all_dates.date, cuts):
+        if cut == 0:
+            continue
 
-            backfill_dfs.append(df_snapshot)
-
-    if not backfill_dfs:
-        return pd.DataFrame()
-
-    df_final = pd.concat(backfill_dfs, ignore_index=True)
+        # Calculate week_start for that specific date in history
+        monday = d - pd.Timedelta(days=d.weekday())
+        df_snapshot = df_base.iloc[:cut].assign(
+            week_start=monday.strftime("%Y-%m-%d"),
+            _prefect_extracted_at=str(pd.Timestamp(datetime.now())),
+        )
 
-    # Drop temp column and stringify
-    df_final = df_final.drop(columns=["added_at_dt"])
-    for col in df_final.columns:
-        if col != "data_particao":
-            df_final[col] = df_final[col].astype(str)
+        date_str = d.strftime("%Y-%m-%d")
+        write_partition_file(df_snapshot, partition_file_path(root_folder, date_str, file_format), file_format)
+        total_rows += int(cut)
 
-    log(f"Backfill gerado: {len(df_final)} registros totais em {len(all_dates)} partições...")
-    return df_final
+    log(f"Backfill gerado: {total_rows} registros totais em {len(all_dates)} partições em {root_folder}")
+    return root_folder
@@ -13,6 +13,28 @@ from iplanrio.pipelines_utils.logging import log
 from prefect import task
 
 
+def partition_file_path(root_folder: str, date: str, file_format: str) -> str:
+    """
+    Return a new file path inside the Hive partition of `date` (YYYY-MM-DD), creating the folder.
+
+    Layout: ano_particao=YYYY/mes_particao=MM/data_particao=YYYY-MM-DD/<uuid>.<file_format>
+    """
+    partition_folder = os.path.join(
+        root_folder,
+        f"ano_particao={date[:4]}/mes_particao={date[5:7]}/data_particao={date}",
+    )
+    os.makedirs(partition_folder, exist_ok=True)
+    return os.path.join(partition_folder, f"{uuid.uuid4()}.{file_format}")
+
+
+def write_partition_file(dataframe: pd.DataFrame, file_path: str, file_format: str) -> None:
+    """Write one partition file as csv or parquet."""
+    if file_format == "csv":
+        dataframe.to_csv(file_path, index=False)
+    elif file_format == "parquet":
+        dataframe.to_parquet(file_path, index=False)
+
+
 @task
 def create_date_partitions(
     dataframe,
@@ -47,18 +69,8 @@ def create_date_partitions(
         partition_df = df[df["data_particao"] == date].drop(columns=["data_particao"])
 
         # Create Hive structure: ano_particao=YYYY/mes_particao=MM/data_particao=YYYY-MM-DD
-        partition_folder = os.path.join(
-            root_folder,
-            f"ano_particao={date[:4]}/mes_particao={date[5:7]}/data_particao={date}",
-        )
-        os.makedirs(partition_folder, exist_ok=True)
-
-        file_folder = os.path.join(partition_folder, f"{uuid.uuid4()}.{file_format}")
-
-        if file_format == "csv":
-            partition_df.to_csv(file_folder, index=False)
-        elif file_format == "parquet":
-            partition_df.to_parquet(file_folder, index=False)
+        file_folder = partition_file_path(root_folder, date, file_format)
+        write_partition_file(partition_df, file_folder, file_format)
 
     log(f"Files saved on {root_folder}")
     return root_folder
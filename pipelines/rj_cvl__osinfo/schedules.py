@@ -6,6 +6,8 @@ OSINFO_QUERIES = [
     {
         "table_id": "usuario",
         "dump_mode": "overwrite",
+        "incremental_column": "COALESCE(DATA_ATUALIZACAO, DATA_CADASTRO)",
+        "merge_keys": "COD_USUARIO",
         "execute_query": """
             SELECT
                 `COD_USUARIO`,
@@ -5,6 +5,8 @@ import pymssql
 import pandas as pd
 import traceback
 import re
+from functools import lru_cache
+import numpy as np
 from pipelines.rj_iplanrio__1746_seconverva_salesforce_poc.tasks import get_1746_credentials
 
 DEFAULT_QUERY = """
@@ -161,6 +163,60 @@ ORDER BY ch.dt_inicio DESC
 """
 
 
+TELEFONE_COLS = ["telefone_1", "telefone_2", "telefone_3"]
+NUMEROS_FAKE = {"21999999999", ""}
+
+
+@lru_cache(maxsize=None)
+def _get_utm_transformer():
+    """Transformer SIRGAS2000 / UTM 23S (EPSG:31983) → WGS84, criado uma única vez por processo."""
+    from pyproj import Transformer
+
+    return Transformer.from_crs("EPSG:31983", "EPSG:4326", always_xy=True)
+
+
+def _normalizar_telefone(col: pd.Series) -> pd.Series:
+    """Converte telefones lidos como float em texto sem ".0" (nulos e vazios viram "")."""
+    texto = col.astype(str).str.strip()
+    validos = col.notna() & ~texto.isin(["", "nan"])
+    resultado = pd.Series("", index=col.index, dtype=object)
+    if validos.any():
+        numeros = col[validos].astype(float).astype("int64")
+        resultado[validos] = numeros.astype(str).astype(object)
+    return resultado
+
+
+def _celular_limpo(col: pd.Series) -> pd.Series:
+    """Telefone sem pontuação quando é um celular válido (11 dígitos, 9 na terceira posição); senão ""."""
+    limpo = col.fillna("").astype(str).str.replace(r"[()\- ]", "", regex=True).str.strip()
+    celular = ~limpo.isin(NUMEROS_FAKE) & (limpo.str.len() == 11) & (limpo.str[2] == "9")
+    return limpo.where(celular, "")
+
+
+def _utm_para_latlong(x: pd.Series, y: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Converte coordenadas UTM em latitude/longitude de uma vez só, sobre os arrays.
+
+    Linhas sem x ou y ficam nulas. O arredondamento usa o round do Python (e não
+    np.round) para manter exatamente os mesmos valores da conversão linha a linha.
+    """
+    validos = (x.notna() & y.notna()).to_numpy()
+    if not validos.any():
+        return (
+            pd.Series([None] * len(x), index=x.index, dtype=object),
+            pd.Series([None] * len(x), index=x.index, dtype=object),
+        )
+
+    lon, lat = _get_utm_transformer().transform(
+        x[validos].astype(float).to_numpy(), y[validos].astype(float).to_numpy()
+    )
+    latitude = pd.Series(np.nan, index=x.index)
+    longitude = pd.Series(np.nan, index=x.index)
+    latitude[validos] = [round(valor, 7) for valor in np.atleast_1d(lat).tolist()]
+    longitude[validos] = [round(valor, 7) for valor in np.atleast_1d(lon).tolist()]
+    return latitude, longitude
+
+
 @task(retries=0)
 def fetch_data_from_db(query: str, config: dict):
     logger = get_run_logger()
@@ -222,53 +278,26 @@ def post_process(df: pd.DataFrame) -> pd.DataFrame:
     # ------------------------------------------------------------------
     # 2. Normalizar telefones (float -> string sem ".0")
     # ------------------------------------------------------------------
-    for col in ["telefone_1", "telefone_2", "telefone_3"]:
+    for col in TELEFONE_COLS:
         if col in df.columns:
-            df[col] = df[col].apply(
-                lambda x: str(int(float(x)))
-                if pd.notna(x) and str(x).strip() not in ("", "nan")
-                else ""
-            )
+            df[col] = _normalizar_telefone(df[col])
 
     # ------------------------------------------------------------------
-    # 3. Celulares
+    # 3. Celulares (na ordem telefone_1, 2, 3, sem repetir)
     # ------------------------------------------------------------------
-    NUMEROS_FAKE = {"21999999999", ""}
+    vazio = pd.Series("", index=df.index, dtype=object)
+    cel_1, cel_2, cel_3 = (_celular_limpo(df[col]) if col in df.columns else vazio for col in TELEFONE_COLS)
 
-    def _limpar_tel(tel):
-        return (
-            tel.replace("(", "")
-            .replace(")", "")
-            .replace("-", "")
-            .replace(" ", "")
-            .strip()
-        )
+    principal = cel_1.where(cel_1 != "", cel_2.where(cel_2 != "", cel_3))
 
-    def _is_celular(tel):
-        if not tel:
-            return False
-        limpo = _limpar_tel(tel)
-        return limpo not in NUMEROS_FAKE and len(limpo) == 11 and limpo[2] == "9"
-
-    def coletar_celulares(row):
-        vistos = []
-        for col in ["telefone_1", "telefone_2", "telefone_3"]:
-            tel = row.get(col, "")
-            if _is_celular(tel):
-                limpo = _limpar_tel(tel)
-                if limpo not in vistos:
-                    vistos.append(limpo)
-        return ";".join(vistos)
-
-    def celular_principal(row):
-        for col in ["telefone_1", "telefone_2", "telefone_3"]:
-            tel = row.get(col, "")
-            if _is_celular(tel):
-                return _limpar_tel(tel)
-        return ""
-
-    df["celulares"] = df.apply(coletar_celulares, axis=1)
-    df["celular_principal"] = df.apply(celular_principal, axis=1)
+    cel_2 = cel_2.where(cel_2 != cel_1, "")
+    cel_3 = cel_3.where((cel_3 != cel_1) & (cel_3 != cel_2), "")
+    celulares = cel_1
+    for cel in (cel_2, cel_3):
+        separador = pd.Series(np.where((celulares != "") & (cel != ""), ";", ""), index=df.index)
+        celulares = celulares + separador + cel
+    df["celulares"] = celulares
+    df["celular_principal"] = principal
 
     # ------------------------------------------------------------------
     # 4. Deduplicação de equivalências do mesmo cidadão (mesmo CPF)
@@ -325,20 +354,7 @@ def post_process(df: pd.DataFrame) -> pd.DataFrame:
     # ------------------------------------------------------------------
     if "coord_utm_x" in df.columns and "coord_utm_y" in df.columns:
         try:
-            from pyproj import Transformer
-            transformer = Transformer.from_crs("EPSG:31983", "EPSG:4326", always_xy=True)
-
-            def _utm_to_latlong(row):
-                x = row["coord_utm_x"]
-                y = row["coord_utm_y"]
-                if pd.isna(x) or pd.isna(y):
-                    return pd.Series({"latitude": None, "longitude": None})
-                lon, lat = transformer.transform(float(x), float(y))
-                return pd.Series({"latitude": round(lat, 7), "longitude": round(lon, 7)})
-
-            coords = df.apply(_utm_to_latlong, axis=1)
-            df["latitude"] = coords["latitude"]
-            df["longitude"] = coords["longitude"]
+            df["latitude"], df["longitude"] = _utm_para_latlong(df["coord_utm_x"], df["coord_utm_y"])
             logger.info("Conversão UTM → lat/long concluída.")
         except ImportError:
             logger.warning("pyproj não instalado. Mantendo coordenadas UTM brutas.")
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from pipelines.rj_iplanrio__1746_seconverva_salesforce_poc.flow import _utm_para_latlong
+
+
+def test_all_valid_coordinates_are_converted():
+    x = pd.Series([683000.0, 686500.0])
+    y = pd.Series([7460000.0, 7465000.0])
+
+    latitude, longitude = _utm_para_latlong(x, y)
+
+    assert latitude.tolist() == [-22.9581581, -22.9126256]
+    assert longitude.tolist() == [-43.2150643, -43.1815425]
+
+
+def test_rows_missing_x_or_y_are_null():
+    x = pd.Series([683000.0, None, 686500.0], index=[10, 11, 12])
+    y = pd.Series([7460000.0, 7461000.0, None], index=[10, 11, 12])
+
+    latitude, longitude = _utm_para_latlong(x, y)
+
+    assert latitude.index.tolist() == [10, 11, 12]
+    assert latitude[10] == -22.9581581
+    assert longitude[10] == -43.2150643
+    assert np.isnan(latitude[11]) and np.isnan(latitude[12])
+    assert np.isnan(longitude[11]) and np.isnan(longitude[12])
+
+
+def test_all_null_coordinates_return_none():
+    x = pd.Series([None, 683000.0])
+    y = pd.Series([7460000.0, None])
+
+    latitude, longitude = _utm_para_latlong(x, y)
+
+    assert latitude.tolist() == [None, None]
+    assert longitude.tolist() == [None, None]
+    assert latitude.dtype == object and longitude.dtype == object
@@ -1,3 +1,7 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
 from prefect import flow, task
 from prefect.artifacts import create_markdown_artifact
 from prefect.logging import get_run_logger
@@ -8,14 +12,69 @@ import pandas as pd
 import traceback
 
 @task(retries=0)
-def fetch_data_from_db(query: str, config: dict):
+def fetch_data_from_db(
+    query: str,
+    config: dict,
+    sample_size: int = 100,
+    batch_size: int = 5000,
+    spill_path: Optional[str] = None,
+) -> dict:
+    """
+    Lê o resultado da query em lotes (fetchmany) em vez de materializá-lo inteiro.
+
+    O pymssql entrega as linhas à medida que chegam do servidor, então sem `spill_path`
+    a leitura para assim que a amostra é preenchida e a conexão é fechada: a memória
+    usada é proporcional à amostra, não à tabela. Com `spill_path`, o resultado completo
+    é gravado em partes Parquet (uma por lote) sem ser acumulado em memória.
+
+    Returns:
+        Dicionário com a amostra (DataFrame), linhas e bytes lidos, se a leitura foi até
+        o fim e os arquivos Parquet gravados
+    """
     logger = get_run_logger()
     logger.info(f"Conectando ao banco na query: {query}")
+    # Sem spill só precisamos da amostra: não faz sentido pedir um lote maior que ela
+    fetch_size = batch_size if spill_path else max(1, min(batch_size, sample_size))
+    spill_dir = Path(spill_path) if spill_path else None
     try:
         conn = pymssql.connect(**config)
-        df = pd.read_sql(query, conn)
-        logger.info(f"Query retornou {len(df)} linhas.")
-        return df
+        cursor = conn.cursor()
+        cursor.execute(query)
+        columns = [column[0] for column in cursor.description]
+        if spill_dir:
+            spill_dir.mkdir(parents=True, exist_ok=True)
+
+        sample, parts = [], []
+        total_rows, total_bytes, complete = 0, 0, False
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                complete = True
+                break
+
+            chunk = pd.DataFrame.from_records(rows, columns=columns)
+            total_rows += len(chunk)
+            total_bytes += int(chunk.memory_usage(index=False, deep=True).sum())
+            if len(sample) < sample_size:
+                sample.extend(rows[: sample_size - len(sample)])
+            if spill_dir:
+                part = spill_dir / f"part-{len(parts):05}.parquet"
+                chunk.to_parquet(part, index=False)
+                parts.append(str(part))
+            logger.info(f"{total_rows} linhas lidas ({total_bytes / 1024**2:.1f} MiB)")
+
+            if not spill_dir and len(sample) >= sample_size:
+                logger.info("Amostra preenchida; leitura interrompida.")
+                break
+
+        logger.info(f"Query retornou {total_rows} linhas{'' if complete else ' (leitura parcial)'}.")
+        return {
+            "sample": pd.DataFrame.from_records(sample, columns=columns),
+            "rows": total_rows,
+            "bytes": total_bytes,
+            "complete": complete,
+            "parquet_files": parts,
+        }
     except Exception as e:
         logger.error(f"Erro ao executar a query:\n{traceback.format_exc()}")
         raise e
@@ -29,11 +88,18 @@ def rj_iplanrio__1746_ticket_capture(
     db_host: str = "10.6.99.27",
     db_port: str = "1433",
     db_database: str = "pcrj",
-    infisical_secret_path: str = "/db-1746-prod-server"
+    infisical_secret_path: str = "/db-1746-prod-server",
+    sample_size: int = 100,
+    batch_size: int = 5000,
+    spill_to_parquet: bool = False,
+    spill_path: str = "/tmp/rj_iplanrio__1746_ticket_capture",
 ):
     """
     Fluxo para rodar queries exploratórias no banco do 1746 via Prefect,
     utilizando secrets da Infisical para nao expor credenciais.
+
+    Por padrão só a amostra é lida do servidor. Com `spill_to_parquet`, o resultado
+    completo é salvo em partes Parquet dentro de `spill_path`.
     """
     logger = get_run_logger()
     
@@ -56,16 +122,30 @@ def rj_iplanrio__1746_ticket_capture(
     }
     
     try:
-        df = fetch_data_from_db(query, config)
-        
+        run_spill_path = None
+        if spill_to_parquet:
+            run_spill_path = str(Path(spill_path) / datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+        result = fetch_data_from_db(
+            query,
+            config,
+            sample_size=sample_size,
+            batch_size=batch_size,
+            spill_path=run_spill_path,
+        )
+
         # Cria um artefato markdown no Prefect para facilitar a visualização dos resultados
-        markdown_table = df.head(100).to_markdown(index=False)
+        markdown_table = result["sample"].to_markdown(index=False)
+        total_rows = f"{result['rows']}" if result["complete"] else f"{result['rows']}+ (leitura interrompida na amostra)"
         artifact_content = (
             f"### Resultados da Query Exploratória\n"
             f"**Query Executada:**\n```sql\n{query}\n```\n\n"
-            f"**Total de Linhas (no DataFrame):** {len(df)}\n"
-            f"**Amostra (Max 100):**\n\n{markdown_table}"
+            f"**Total de Linhas Lidas:** {total_rows}\n"
+            f"**Bytes Lidos (em memória):** {result['bytes']}\n"
         )
+        if result["parquet_files"]:
+            artifact_content += f"**Parquet:** {run_spill_path} ({len(result['parquet_files'])} partes)\n"
+        artifact_content += f"**Amostra (Max {sample_size}):**\n\n{markdown_table}"
         create_markdown_artifact(
             key="exploracao-db-1746",
             markdown=artifact_content,
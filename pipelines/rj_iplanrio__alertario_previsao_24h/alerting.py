@@ -6,16 +6,19 @@ Utilidades para geração e envio de alertas de precipitação no Discord.
 from __future__ import annotations
 
 import hashlib
+import json
 from collections import OrderedDict
-from dataclasses import dataclass
-from datetime import date, datetime
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
 from time import sleep
-from typing import Optional, Sequence
+from typing import Iterable, Optional, Sequence
+from zoneinfo import ZoneInfo
 
 import pandas as pd
 import requests
 from basedosdados import Base
-from google.cloud import bigquery
+from google.cloud import bigquery, storage
+from google.cloud.exceptions import NotFound
 
 from iplanrio.pipelines_utils.logging import log
 
@@ -24,6 +27,9 @@ INTENSE_PRECIPITATION_KEYWORDS = (
     "pancadas de chuva",
 )
 
+BRAZIL_TIMEZONE = ZoneInfo("America/Sao_Paulo")
+ALERT_LOG_TABLE = "rj-iplanrio.brutos_alertario_staging.alertario_precipitacao_alerts_log"
+
 
 @dataclass(frozen=True)
 class PrecipitationAlert:
@@ -34,6 +40,110 @@ class PrecipitationAlert:
     precipitacao: str
 
 
+def alert_key(alert: PrecipitationAlert) -> str:
+    """Chave estável de uma combinação data/período/precipitação."""
+    return f"{alert.forecast_date.isoformat()}|{alert.periodo}|{alert.precipitacao}"
+
+
+@dataclass
+class AlertDedupState:
+    """
+    Estado de deduplicação dos alertas enviados no dia (horário de Brasília).
+
+    Responde às mesmas perguntas que a agregação sobre alertario_precipitacao_alerts_log
+    (hash já enviado, total de alertas no dia, último envio) sem consultar o BigQuery.
+    """
+
+    local_date: date
+    sent_hashes: set[str] = field(default_factory=set)
+    sent_alert_keys: set[str] = field(default_factory=set)
+    discord_message_ids: set[str] = field(default_factory=set)
+    last_sent_at: datetime | None = None
+
+    @property
+    def total_alerts_today(self) -> int:
+        return len(self.discord_message_ids)
+
+    def check(
+        self,
+        alert_hash: str,
+        max_daily_alerts: int,
+        min_alert_interval_hours: int,
+        now: datetime | None = None,
+    ) -> tuple[bool, str]:
+        """Aplica as regras de duplicata, limite diário e intervalo mínimo."""
+        now = now or datetime.now(timezone.utc)
+        total_today = self.total_alerts_today
+
+        if total_today == 0:
+            return (True, "No alerts sent today. Proceeding with send.")
+
+        if alert_hash in self.sent_hashes:
+            return (
+                False,
+                f"Duplicate alert. Hash {alert_hash[:8]}... already sent today.",
+            )
+
+        if total_today >= max_daily_alerts:
+            return (
+                False,
+                f"Daily limit reached. {total_today}/{max_daily_alerts} alerts sent today.",
+            )
+
+        if self.last_sent_at is not None:
+            hours_since = int((now - self.last_sent_at).total_seconds() // 3600)
+            if hours_since < min_alert_interval_hours:
+                return (
+                    False,
+                    f"Too soon. {hours_since}h elapsed (minimum {min_alert_interval_hours}h).",
+                )
+
+        return (
+            True,
+            f"All checks passed. Sending alert ({total_today + 1}/{max_daily_alerts} today).",
+        )
+
+    def unsent_alerts(
+        self, alerts: Iterable[PrecipitationAlert]
+    ) -> list[PrecipitationAlert]:
+        """Filtra, em lote, as combinações que ainda não foram notificadas hoje."""
+        return [alert for alert in alerts if alert_key(alert) not in self.sent_alert_keys]
+
+    def record(
+        self,
+        alert_hash: str,
+        discord_message_id: str | None,
+        sent_at: datetime,
+        alerts: Iterable[PrecipitationAlert],
+    ) -> None:
+        """Registra um envio no estado (a linha no log é gravada pelo flow)."""
+        self.sent_hashes.add(alert_hash)
+        self.sent_alert_keys.update(alert_key(alert) for alert in alerts)
+        self.discord_message_ids.add(discord_message_id or f"sem_id:{sent_at.isoformat()}")
+        if self.last_sent_at is None or sent_at > self.last_sent_at:
+            self.last_sent_at = sent_at
+
+    def to_dict(self) -> dict:
+        return {
+            "local_date": self.local_date.isoformat(),
+            "sent_hashes": sorted(self.sent_hashes),
+            "sent_alert_keys": sorted(self.sent_alert_keys),
+            "discord_message_ids": sorted(self.discord_message_ids),
+            "last_sent_at": self.last_sent_at.isoformat() if self.last_sent_at else None,
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> AlertDedupState:
+        last_sent_at = payload.get("last_sent_at")
+        return cls(
+            local_date=date.fromisoformat(payload["local_date"]),
+            sent_hashes=set(payload.get("sent_hashes", [])),
+            sent_alert_keys=set(payload.get("sent_alert_keys", [])),
+            discord_message_ids=set(payload.get("discord_message_ids", [])),
+            last_sent_at=datetime.fromisoformat(last_sent_at) if last_sent_at else None,
+        )
+
+
 def is_intense_precipitation(value: str | None) -> bool:
     """
     Retorna True somente para descrições que indiquem chuva moderada a forte.
@@ -219,16 +329,129 @@ def send_discord_webhook_message(
         return {}
 
 
+def _brazil_today(now: datetime | None = None) -> date:
+    return (now or datetime.now(timezone.utc)).astimezone(BRAZIL_TIMEZONE).date()
+
+
+def _get_storage_bucket(bucket_name: str, billing_project_id: str) -> storage.Bucket:
+    client = storage.Client(
+        credentials=Base(bucket_name=bucket_name)._load_credentials(mode="prod"),
+        project=billing_project_id,
+    )
+    return client.bucket(bucket_name)
+
+
+def _seed_alert_dedup_state(billing_project_id: str, local_date: date) -> AlertDedupState:
+    """
+    Reconstrói o estado do dia a partir do alerts_log no BigQuery.
+
+    Usado apenas quando não há snapshot no GCS (primeira execução ou snapshot perdido).
+    """
+    state = AlertDedupState(local_date=local_date)
+    query = f"""
+    SELECT
+      alert_hash,
+      discord_message_id,
+      CAST(sent_at AS TIMESTAMP) AS sent_at,
+      CAST(forecast_date AS STRING) AS forecast_date,
+      periodo,
+      precipitacao
+    FROM `{ALERT_LOG_TABLE}`
+    WHERE CAST(data_particao AS DATE) = DATE('{local_date.isoformat()}')
+    """
+    try:
+        df = download_data_from_bigquery(
+            query=query,
+            billing_project_id=billing_project_id,
+            bucket_name=billing_project_id,
+        )
+    except Exception as error:
+        # Tabela não existe (primeira execução)
+        if "not found" in str(error).lower():
+            log(f"Alert log table not found (first run): {error}", level="warning")
+            return state
+        raise
+
+    for row in df.itertuples(index=False):
+        sent_at = pd.Timestamp(row.sent_at).to_pydatetime() if pd.notna(row.sent_at) else None
+        alert = PrecipitationAlert(
+            forecast_date=date.fromisoformat(str(row.forecast_date)[:10]),
+            periodo=row.periodo or "",
+            precipitacao=row.precipitacao or "",
+        )
+        state.sent_hashes.add(row.alert_hash)
+        state.sent_alert_keys.add(alert_key(alert))
+        if pd.notna(row.discord_message_id):
+            state.discord_message_ids.add(str(row.discord_message_id))
+        if sent_at is not None and (state.last_sent_at is None or sent_at > state.last_sent_at):
+            state.last_sent_at = sent_at
+
+    return state
+
+
+def load_alert_dedup_state(
+    billing_project_id: str,
+    bucket_name: str,
+    blob_name: str,
+    now: datetime | None = None,
+) -> AlertDedupState:
+    """
+    Carrega o estado de deduplicação uma vez por execução.
+
+    Lê o snapshot JSON no GCS; se ele for de outro dia, o estado recomeça vazio (as regras
+    consideram apenas o dia corrente). Sem snapshot, o estado é semeado pelo alerts_log.
+    """
+    local_date = _brazil_today(now)
+    blob = _get_storage_bucket(bucket_name, billing_project_id).blob(blob_name)
+    try:
+        state = AlertDedupState.from_dict(json.loads(blob.download_as_bytes()))
+    except NotFound:
+        log("Snapshot de deduplicação não encontrado. Semeando a partir do alerts_log.")
+        return _seed_alert_dedup_state(billing_project_id, local_date)
+
+    if state.local_date != local_date:
+        return AlertDedupState(local_date=local_date)
+    return state
+
+
+def save_alert_dedup_state(
+    state: AlertDedupState,
+    billing_project_id: str,
+    bucket_name: str,
+    blob_name: str,
+) -> None:
+    """Grava o snapshot do estado no GCS (write-through após cada envio)."""
+    blob = _get_storage_bucket(bucket_name, billing_project_id).blob(blob_name)
+    blob.upload_from_string(
+        json.dumps(state.to_dict(), ensure_ascii=False),
+        content_type="application/json",
+    )
+
+
+def discard_alert_dedup_state(billing_project_id: str, bucket_name: str, blob_name: str) -> None:
+    """
+    Remove o snapshot do estado, forçando a próxima execução a semear pelo alerts_log.
+
+    Usado quando o snapshot não pôde ser atualizado após um envio: um snapshot sem o
+    envio seria tomado como verdade e o mesmo alerta seria enviado de novo.
+    """
+    try:
+        _get_storage_bucket(bucket_name, billing_project_id).blob(blob_name).delete()
+    except NotFound:
+        pass
+
+
 def check_alert_deduplication(
     alert_hash: str,
     billing_project_id: str,
     max_daily_alerts: int,
     min_alert_interval_hours: int,
+    state: AlertDedupState | None = None,
 ) -> tuple[bool, str]:
     """
     Verifica se alerta deve ser enviado com base em regras de deduplicação.
 
-    Consulta tabela alerts_log no BigQuery (hardcoded) e verifica:
+    Usa o estado do dia (snapshot carregado uma vez por execução) e verifica:
     1. Este hash já foi enviado hoje? (duplicata exata)
     2. Já enviamos max_daily_alerts hoje? (limite diário)
     3. Último alerta foi há menos de min_alert_interval_hours? (intervalo)
@@ -238,6 +461,7 @@ def check_alert_deduplication(
         billing_project_id: ID do projeto GCP para billing
         max_daily_alerts: Número máximo de alertas por dia
         min_alert_interval_hours: Intervalo mínimo em horas entre alertas
+        state: Estado já carregado; se omitido, é semeado pelo alerts_log no BigQuery
 
     Returns:
         (should_send, reason) onde:
@@ -245,87 +469,13 @@ def check_alert_deduplication(
         - reason: Explicação para logging (por que envia ou pula)
 
     Raises:
-        Exception: Se query do BigQuery falhar (caller deve pegar e não enviar)
+        Exception: Se o estado não puder ser carregado (caller deve pegar e não enviar)
     """
-    try:
-        # Query com tabela hardcoded (padrão do projeto)
-        query = f"""
-        WITH brazil_today AS (
-          SELECT DATE(CURRENT_TIMESTAMP(), 'America/Sao_Paulo') as local_date
-        ),
-        alert_stats AS (
-          SELECT
-            -- Conta quantos ALERTAS ÚNICOS têm este hash (usando discord_message_id)
-            COUNT(DISTINCT CASE
-              WHEN alert_hash = '{alert_hash}' THEN discord_message_id
-              END) as hash_count_today,
-            -- Conta quantos ALERTAS ÚNICOS foram enviados (mensagens Discord únicas)
-            COUNT(DISTINCT discord_message_id) as total_alerts_today,
-            -- Timestamp do último alerta (sent_at é STRING, precisa CAST)
-            MAX(CAST(sent_at AS TIMESTAMP)) as last_alert_sent_at
-          FROM `rj-iplanrio.brutos_alertario_staging.alertario_precipitacao_alerts_log` al
-          CROSS JOIN brazil_today bt
-          WHERE CAST(al.data_particao AS DATE) = bt.local_date
-        )
-        SELECT
-          hash_count_today,
-          total_alerts_today,
-          last_alert_sent_at,
-          CASE
-            WHEN last_alert_sent_at IS NULL THEN NULL
-            ELSE TIMESTAMP_DIFF(CURRENT_TIMESTAMP(), last_alert_sent_at, HOUR)
-          END as hours_since_last_alert
-        FROM alert_stats
-        """
-
-        # Usar função local
-        df = download_data_from_bigquery(
-            query=query,
-            billing_project_id=billing_project_id,
-            bucket_name=billing_project_id,
-        )
+    if state is None:
+        state = _seed_alert_dedup_state(billing_project_id, _brazil_today())
 
-        # Tabela vazia ou primeira execução
-        if df.empty or df["total_alerts_today"].iloc[0] == 0:
-            return (True, "No alerts sent today. Proceeding with send.")
-
-        row = df.iloc[0]
-        hash_count = row["hash_count_today"]
-        total_today = row["total_alerts_today"]
-        hours_since = row["hours_since_last_alert"]
-
-        # Check 1: Duplicate hash
-        if hash_count > 0:
-            return (
-                False,
-                f"Duplicate alert. Hash {alert_hash[:8]}... already sent today.",
-            )
-
-        # Check 2: Daily limit
-        if total_today >= max_daily_alerts:
-            return (
-                False,
-                f"Daily limit reached. {total_today}/{max_daily_alerts} alerts sent today.",
-            )
-
-        # Check 3: Time interval
-        if hours_since is not None and hours_since < min_alert_interval_hours:
-            return (
-                False,
-                f"Too soon. {hours_since}h elapsed (minimum {min_alert_interval_hours}h).",
-            )
-
-        # All checks passed
-        return (
-            True,
-            f"All checks passed. Sending alert ({total_today + 1}/{max_daily_alerts} today).",
-        )
-
-    except Exception as e:
-        # Tabela não existe (primeira execução)
-        error_msg = str(e).lower()
-        if "not found" in error_msg:
-            log(f"Alert log table not found (first run): {e}", level="warning")
-            return (True, "First run, proceeding with send.")
-        # Qualquer outro erro → não envia
-        raise
+    return state.check(
+        alert_hash=alert_hash,
+        max_daily_alerts=max_daily_alerts,
+        min_alert_interval_hours=min_alert_interval_hours,
+    )
@@ -38,3 +38,7 @@ class AlertaRioConstants(Enum):
     DISCORD_WEBHOOK_ENV_VAR = "DISCORD_WEBHOOK_URL_ALERTARIO"
     DEFAULT_MAX_DAILY_ALERTS = 2
     MIN_ALERT_INTERVAL_HOURS = 4
+
+    # Snapshot do estado de deduplicação (lido uma vez por execução, regravado a cada envio)
+    DEDUP_STATE_BUCKET = "rj-iplanrio"
+    DEDUP_STATE_BLOB = "alertario_previsao_24h/alerts_dedup_state.json"
@@ -20,8 +20,11 @@ from pipelines.rj_iplanrio__alertario_previsao_24h.alerting import (
     build_alert_log_rows,
     check_alert_deduplication,
     compute_message_hash,
+    discard_alert_dedup_state,
     extract_precipitation_alerts,
     format_precipitation_alert_message,
+    load_alert_dedup_state,
+    save_alert_dedup_state,
     send_discord_webhook_message,
 )
 from pipelines.rj_iplanrio__alertario_previsao_24h.tasks import (
@@ -95,6 +98,8 @@ def rj_iplanrio__alertario_previsao_24h(
         if min_alert_interval_hours is not None
         else AlertaRioConstants.MIN_ALERT_INTERVAL_HOURS.value
     )
+    dedup_state_bucket = AlertaRioConstants.DEDUP_STATE_BUCKET.value
+    dedup_state_blob = AlertaRioConstants.DEDUP_STATE_BLOB.value
 
     # Inicializar lista para acumular alertas (será processada no final com as dim_* tables)
     alert_log_rows_to_save = []
@@ -161,11 +166,18 @@ def rj_iplanrio__alertario_previsao_24h(
 
                 # Verificar regras de deduplicação antes de enviar
                 try:
+                    dedup_state = load_alert_dedup_state(
+                        billing_project_id=billing_project_id,
+                        bucket_name=dedup_state_bucket,
+                        blob_name=dedup_state_blob,
+                        now=now_utc,
+                    )
                     should_send, reason = check_alert_deduplication(
                         alert_hash=message_hash,
                         billing_project_id=billing_project_id,
                         max_daily_alerts=max_daily_alerts,
                         min_alert_interval_hours=min_alert_interval_hours,
+                        state=dedup_state,
                     )
                     log(f"[Deduplication] {reason}", level="info")
 
@@ -174,7 +186,7 @@ def rj_iplanrio__alertario_previsao_24h(
                         # Não envia, não salva log (pula para próxima seção)
                 except Exception as dedup_error:
                     log(f"Erro ao verificar deduplicação: {dedup_error}", level="error")
-                    log("Pulando envio de alerta por segurança (query falhou).", level="error")
+                    log("Pulando envio de alerta por segurança (estado indisponível).", level="error")
                     # Não envia se query falhar (comportamento conservador)
                 else:
                     # Só envia se should_send == True
@@ -197,6 +209,30 @@ def rj_iplanrio__alertario_previsao_24h(
                             severity_level="info",
                         )
                         alert_log_rows_to_save.extend(log_rows)
+                        dedup_state.record(
+                            alert_hash=message_hash,
+                            discord_message_id=discord_message_id,
+                            sent_at=sent_at,
+                            alerts=precipitation_alerts,
+                        )
+                        try:
+                            save_alert_dedup_state(
+                                dedup_state,
+                                billing_project_id=billing_project_id,
+                                bucket_name=dedup_state_bucket,
+                                blob_name=dedup_state_blob,
+                            )
+                        except Exception as state_error:  # pylint: disable=broad-except
+                            log(
+                                f"Erro ao gravar estado de deduplicação: {state_error}. "
+                                "Removendo o snapshot para a próxima execução semear pelo alerts_log.",
+                                level="error",
+                            )
+                            discard_alert_dedup_state(
+                                billing_project_id=billing_project_id,
+                                bucket_name=dedup_state_bucket,
+                                blob_name=dedup_state_blob,
+                            )
                         log(
                             "Alerta de precipitação enviado ao Discord. Log será salvo junto com as outras tabelas."
                         )
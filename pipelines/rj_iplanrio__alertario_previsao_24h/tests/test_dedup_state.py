@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import date, datetime, timedelta, timezone
+
+from google.cloud.exceptions import NotFound
+
+from pipelines.rj_iplanrio__alertario_previsao_24h import alerting
+from pipelines.rj_iplanrio__alertario_previsao_24h.alerting import (
+    AlertDedupState,
+    PrecipitationAlert,
+    discard_alert_dedup_state,
+    load_alert_dedup_state,
+)
+
+NOW = datetime(2025, 12, 3, 15, 0, tzinfo=timezone.utc)
+ALERTS = [
+    PrecipitationAlert(forecast_date=date(2025, 12, 3), periodo="Manhã", precipitacao="Pancadas de chuva"),
+    PrecipitationAlert(forecast_date=date(2025, 12, 3), periodo="Tarde", precipitacao="Chuva moderada a forte"),
+]
+
+
+def _state_with_one_send(sent_at: datetime) -> AlertDedupState:
+    state = AlertDedupState(local_date=date(2025, 12, 3))
+    state.record(alert_hash="hash-1", discord_message_id="disc-1", sent_at=sent_at, alerts=ALERTS[:1])
+    return state
+
+
+def test_empty_state_allows_send():
+    state = AlertDedupState(local_date=date(2025, 12, 3))
+
+    should_send, reason = state.check("hash-1", max_daily_alerts=2, min_alert_interval_hours=4, now=NOW)
+
+    assert should_send
+    assert reason.startswith("No alerts sent today")
+
+
+def test_duplicate_hash_is_blocked():
+    state = _state_with_one_send(NOW - timedelta(hours=6))
+
+    should_send, reason = state.check("hash-1", max_daily_alerts=2, min_alert_interval_hours=4, now=NOW)
+
+    assert not should_send
+    assert reason.startswith("Duplicate alert")
+
+
+def test_daily_limit_is_blocked():
+    state = _state_with_one_send(NOW - timedelta(hours=6))
+
+    should_send, reason = state.check("hash-2", max_daily_alerts=1, min_alert_interval_hours=4, now=NOW)
+
+    assert not should_send
+    assert reason.startswith("Daily limit reached")
+
+
+def test_min_interval_truncates_hours_like_timestamp_diff():
+    state = _state_with_one_send(NOW - timedelta(hours=3, minutes=59))
+
+    should_send, reason = state.check("hash-2", max_daily_alerts=2, min_alert_interval_hours=4, now=NOW)
+
+    assert not should_send
+    assert reason == "Too soon. 3h elapsed (minimum 4h)."
+
+
+def test_unsent_alerts_filters_in_batch():
+    state = _state_with_one_send(NOW)
+
+    assert state.unsent_alerts(ALERTS) == ALERTS[1:]
+
+
+def test_state_round_trips_through_dict():
+    state = _state_with_one_send(NOW)
+
+    restored = AlertDedupState.from_dict(state.to_dict())
+
+    assert restored == state
+
+
+class _FakeBlob:
+    def __init__(self, blobs: dict, name: str):
+        self._blobs = blobs
+        self._name = name
+
+    def download_as_bytes(self):
+        if self._name not in self._blobs:
+            raise NotFound(self._name)
+        return self._blobs[self._name]
+
+    def delete(self):
+        if self._name not in self._blobs:
+            raise NotFound(self._name)
+        del self._blobs[self._name]
+
+
+class _FakeBucket:
+    def __init__(self, blobs: dict):
+        self._blobs = blobs
+
+    def blob(self, name: str) -> _FakeBlob:
+        return _FakeBlob(self._blobs, name)
+
+
+def test_discarded_snapshot_is_reseeded_from_alerts_log(monkeypatch):
+    stale = AlertDedupState(local_date=date(2025, 12, 3))
+    blobs = {"state.json": json.dumps(stale.to_dict()).encode("utf-8")}
+    seeded = _state_with_one_send(NOW - timedelta(hours=1))
+    monkeypatch.setattr(alerting, "_get_storage_bucket", lambda bucket_name, billing_project_id: _FakeBucket(blobs))
+    monkeypatch.setattr(alerting, "_seed_alert_dedup_state", lambda billing_project_id, local_date: seeded)
+
+    assert load_alert_dedup_state("project", "bucket", "state.json", now=NOW) == stale
+
+    discard_alert_dedup_state("project", "bucket", "state.json")
+    discard_alert_dedup_state("project", "bucket", "state.json")
+
+    assert load_alert_dedup_state("project", "bucket", "state.json", now=NOW) is seeded
@@ -7,14 +7,28 @@ class BetterStackConstants(Enum):
     Constantes utilizadas na pipeline do BetterStack.
     """
 
+    BASE_URL_V2 = "https://uptime.betterstack.com/api/v2"
     BASE_URL_V3 = "https://uptime.betterstack.com/api/v3"
 
-
-
     # Dataset e Tabelas
     DATASET_ID = "brutos_betterstack"
     BILLING_PROJECT_ID = "rj-iplanrio"
-    TABLE_ID_INCIDENTS = "eai_gateway_incidents"
+    TABLE_ID_INCIDENTS = "incidents"
+
+    # Coleta incremental (cursor de started_at por monitor)
+    STATE_BUCKET = "rj-iplanrio"
+    STATE_BLOB = "state/rj_iplanrio__betterstack_api/incidents.json"
+    INITIAL_LOOKBACK_DAYS = 1  # Monitores sem cursor começam em D-1
+    SETTLED_LAG_DAYS = 1  # A coleta incremental vai até D-1: incidentes do dia ainda podem estar abertos
+    MAX_CONCURRENT_MONITORS = 8
+    MAX_RETRIES = 3
+    MONITORS_PER_PAGE = 250
+    INCIDENTS_PER_PAGE = 50
+
+    # Tipos das colunas achatadas de `attributes` (demais colunas viram STRING)
+    TIMESTAMP_COLUMNS = ["started_at", "acknowledged_at", "resolved_at"]
+    INTEGER_COLUMNS = ["incident_group_id", "escalation_policy_id"]
+    BOOLEAN_COLUMNS = ["call", "sms", "email", "push", "critical_alert"]
 
     # Configurações de execução
     DUMP_MODE = "append"
@@ -28,4 +42,3 @@ class BetterStackConstants(Enum):
 
     # Timeout
     TIMEOUT = (5, 30)
-
@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-import os
 from prefect import flow
 from iplanrio.pipelines_utils.bd import (
     create_table_and_upload_to_gcs_task,
@@ -10,9 +9,11 @@ from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from pipelines.rj_iplanrio__betterstack_api.constants import BetterStackConstants
 from pipelines.rj_iplanrio__betterstack_api.tasks import (
     get_betterstack_credentials,
-    get_betterstack_monitor_id,
-    calculate_date_range,
+    get_betterstack_monitor_ids,
+    calculate_date_ranges,
     fetch_incidents,
+    load_incidents_state_task,
+    save_incidents_state_task,
     transform_incidents,
 )
 
@@ -25,34 +26,47 @@ def rj_iplanrio__betterstack_api(
     to_date: str | None = None,
     dataset_id: str | None = None,
     billing_project_id: str | None = None,
+    monitor_ids: list[str] | None = None,
+    max_concurrent_monitors: int = BetterStackConstants.MAX_CONCURRENT_MONITORS.value,
+    state_bucket: str = BetterStackConstants.STATE_BUCKET.value,
+    ignore_state: bool = False,
 ):
     """
     Flow para extrair dados da BetterStack API (Incidents)
     e carregar no BigQuery.
+
+    Todos os monitores da conta (ou os de monitor_ids) são coletados em paralelo. Cada
+    monitor retoma do último started_at gravado (cursor persistido no GCS), então
+    backfills após uma falha não precisam de from_date/to_date.
     """
 
     # 0. Setup
     billing_project_id = billing_project_id or BetterStackConstants.BILLING_PROJECT_ID.value
     dataset_id = dataset_id or BetterStackConstants.DATASET_ID.value
-    rename_current_flow_run_task(new_name=f"BetterStack_Incidents_{from_date or 'D-1'}")
+    rename_current_flow_run_task(new_name=f"BetterStack_Incidents_{from_date or 'incremental'}")
 
     # 0.1 Inject BD Credentials
     inject_bd_credentials_task(environment="prod")
 
-    # 1. Credentials
+    # 1. Credentials and monitors
     token = get_betterstack_credentials()
-    monitor_id = get_betterstack_monitor_id()
-
+    monitor_ids = get_betterstack_monitor_ids(token=token, monitor_ids=monitor_ids)
 
     # 2. Date Logic
-    # For high-availability, we always fetch the last 24h.
+    # Each monitor resumes from its started_at cursor (D-1 when there is none) up to D-1,
+    # so incidents still open today are collected once they are settled.
     # The 'date' parameters remain for manual backfills if needed.
-    date_range = calculate_date_range(from_date=from_date, to_date=to_date)
+    state_blob = BetterStackConstants.STATE_BLOB.value
+    stored_cursors = load_incidents_state_task(bucket_name=state_bucket, blob_name=state_blob)
+    cursors = {} if ignore_state else stored_cursors
+    date_ranges = calculate_date_ranges(
+        monitor_ids=monitor_ids, cursors=cursors, from_date=from_date, to_date=to_date
+    )
 
     # --- TABLE: Incidents ---
-    raw_incidents = fetch_incidents(token=token, monitor_id=monitor_id, date_range=date_range)
+    raw_incidents = fetch_incidents(token=token, date_ranges=date_ranges, max_workers=max_concurrent_monitors)
 
-    df_incidents = transform_incidents(raw_incidents)
+    df_incidents, new_cursors = transform_incidents(raw_incidents, cursors=cursors)
 
     if not df_incidents.empty:
         path_incidents = create_date_partitions(
@@ -69,4 +83,15 @@ def rj_iplanrio__betterstack_api(
             dump_mode=BetterStackConstants.DUMP_MODE.value,
             biglake_table=BetterStackConstants.BIGLAKE_TABLE.value,
             source_format=BetterStackConstants.FILE_FORMAT.value,
-        )
\ No newline at end of file
+        )
+
+    # Cursors only move forward, also when ignore_state re-collects older data
+    advanced = {
+        monitor_id: cursor
+        for monitor_id, cursor in new_cursors.items()
+        if cursor > stored_cursors.get(monitor_id, "")
+    }
+    if advanced:
+        save_incidents_state_task(
+            state={**stored_cursors, **advanced}, bucket_name=state_bucket, blob_name=state_blob
+        )
@@ -6,13 +6,18 @@ Tasks for rj_iplanrio__betterstack_api pipeline
 import json
 import pandas as pd
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 from prefect import task
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from iplanrio.pipelines_utils.logging import log
 from iplanrio.pipelines_utils.env import getenv_or_action
 
+from prefect_rj_iplanrio.state import load_state, save_state
+
 from pipelines.rj_iplanrio__betterstack_api.constants import BetterStackConstants
 
 
@@ -34,139 +39,239 @@ def get_betterstack_credentials() -> str:
     return token
 
 
-@task
-def get_betterstack_monitor_id() -> str:
+def build_session(token: str, pool_size: int) -> requests.Session:
     """
-    Recupera o ID do monitor da BetterStack do Infisical.
+    Sessão autenticada com pool de conexões do tamanho da concorrência e retentativas em 429/5xx.
     """
-    log("Recuperando MONITOR_ID do BetterStack")
-    monitor_id = getenv_or_action("MONITOR_ID")
-    return monitor_id
-
-
-
-@task
-def calculate_date_range(from_date: str = None, to_date: str = None) -> Dict[str, str]:
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    retry = Retry(
+        total=BetterStackConstants.MAX_RETRIES.value,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_all_pages(session: requests.Session, url: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Calcula o range de datas.
-    Se não fornecido, as default é D-1 (ontem).
+    Segue pagination.next até a última página e devolve a concatenação de `data`.
     """
-    if from_date and to_date:
-        return {"from": from_date, "to": to_date}
-
-    # Default logic: get yesterday's data
-    yesterday = datetime.now() - timedelta(days=1)
-    yesterday_str = yesterday.strftime("%Y-%m-%d")
-
-    # Se quiser pegar apenas o dia de ontem, o range é ontem -> hoje (exclusive) ou ontem -> ontem?
-    # BetterStack API docs: "from" and "to" are timestamps or dates.
-    # Usually "from" inclusive, "to" exclusive or inclusive depending on API.
-    # User said: "pegar o D-1 e ir adicionando de forma incremental"
-
-    return {"from": yesterday_str, "to": yesterday_str}
-
-
-
-
-
-@task(retries=3, retry_delay_seconds=60)
-def fetch_incidents(token: str, monitor_id: str, date_range: Dict[str, str]) -> List[Dict[str, Any]]:
-
-    """
-    Busca dados de incidents da API v3.
-    """
-    url = f"{BetterStackConstants.BASE_URL_V3.value}/incidents"
-
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {
-        "from": date_range["from"],
-        "to": date_range["to"],
-        "monitor_id": monitor_id,
-        "per_page": 50 # Maximize page size just in case
-    }
-
-
-    log(f"Fetching incidents from {url} with params {params}")
-
-    all_incidents = []
-
+    items = []
     while url:
         try:
-            response = requests.get(
-                url,
-                headers=headers,
-                params=params,
-                timeout=BetterStackConstants.TIMEOUT.value,
-            )
+            response = session.get(url, params=params, timeout=BetterStackConstants.TIMEOUT.value)
             response.raise_for_status()
             data = response.json()
         except requests.exceptions.Timeout as e:
-            log(f"Timeout ao buscar incidents: {e}")
+            log(f"Timeout ao buscar {url}: {e}")
             raise
         except requests.exceptions.RequestException as e:
-            log(f"Erro de requisição ao buscar incidents: {e}")
+            log(f"Erro de requisição ao buscar {url}: {e}")
             if hasattr(e, "response") and e.response is not None:
                 log(f"Response status: {e.response.status_code}")
                 log(f"Response text: {e.response.text[:500]}")
             raise
         except json.JSONDecodeError as e:
-            log(f"Error decoding incidents JSON: {e}")
+            log(f"Error decoding JSON from {url}: {e}")
             raise
 
-        # Structure: data (list), pagination (dict)
-        try:
-            incidents = data.get("data", [])
-            all_incidents.extend(incidents)
+        items.extend(data.get("data", []))
 
-            # Pagination handling
-            pagination = data.get("pagination", {})
-            next_url = pagination.get("next")
+        # params are encoded in the next_url
+        url = (data.get("pagination") or {}).get("next")
+        params = None
 
-            if next_url:
-                url = next_url
-                params = {} # params are usually encoded in the next_url
-            else:
-                url = None
-        except KeyError as e:
-            log(f"Error parsing incidents structure: {e}")
-            url = None # Stop loop if structure is broken
+    return items
 
-    return all_incidents
 
+@task(retries=3, retry_delay_seconds=60)
+def get_betterstack_monitor_ids(token: str, monitor_ids: Optional[List[str]] = None) -> List[str]:
+    """
+    Lista os IDs de todos os monitores da conta (ou devolve os informados).
+    """
+    if monitor_ids:
+        return [str(monitor_id) for monitor_id in monitor_ids]
 
+    log("Listando monitores do BetterStack")
+    with build_session(token, pool_size=1) as session:
+        monitors = _get_all_pages(
+            session,
+            f"{BetterStackConstants.BASE_URL_V2.value}/monitors",
+            {"per_page": BetterStackConstants.MONITORS_PER_PAGE.value},
+        )
 
+    ids = [str(monitor["id"]) for monitor in monitors]
+    log(f"{len(ids)} monitores encontrados")
+    return ids
 
 
 @task
-def transform_incidents(data: List[Dict[str, Any]]) -> pd.DataFrame:
+def load_incidents_state_task(bucket_name: str, blob_name: str) -> Dict[str, str]:
     """
-    Transforma dados de incidents.
+    Carrega o cursor (último started_at coletado) de cada monitor.
     """
-    if not data:
-        return pd.DataFrame()
+    state = load_state(bucket_name, blob_name)
+    log(f"Estado carregado de gs://{bucket_name}/{blob_name}: {len(state)} monitores")
+    return state
 
-    df = pd.DataFrame(data)
 
-    if not df.empty:
-        # Dynamic partitioning based on started_at in attributes
-        # First, ensure we can access attributes easily if it's a dict
-        def extract_date(row):
-            try:
-                attrs = row.get("attributes", {})
-                ts = attrs.get("started_at") or attrs.get("created_at")
-                if ts:
-                    return ts[:10] # YYYY-MM-DD
-            except Exception:
-                pass
-            return datetime.now().strftime("%Y-%m-%d")
+@task
+def save_incidents_state_task(state: Dict[str, str], bucket_name: str, blob_name: str) -> None:
+    """
+    Grava o cursor de cada monitor após o upload dos incidents.
+    """
+    save_state(state, bucket_name, blob_name)
+    log(f"Estado salvo em gs://{bucket_name}/{blob_name}")
 
-        df["data_particao"] = df.apply(extract_date, axis=1)
 
-        # Cast all columns to string to avoid schema mismatches in BigQuery brutos layer
-        for col in df.columns:
-            if col != "data_particao":
-                df[col] = df[col].astype(str)
+@task
+def calculate_date_ranges(
+    monitor_ids: List[str],
+    cursors: Dict[str, str],
+    from_date: str = None,
+    to_date: str = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Dict[str, str]]:
+    """
+    Calcula o range de datas de cada monitor.
+
+    Com from_date e to_date, o mesmo range vale para todos os monitores. Caso contrário,
+    cada monitor retoma do dia do seu cursor (último started_at coletado) até D-1; sem
+    cursor, a coleta começa em D-1. O dia corrente fica de fora porque seus incidentes
+    ainda podem estar abertos, e o cursor não deixa que sejam coletados de novo depois
+    de resolvidos.
+    """
+    if from_date and to_date:
+        return {monitor_id: {"from": from_date, "to": to_date} for monitor_id in monitor_ids}
+
+    today = now or datetime.now()
+    default_from = (today - timedelta(days=BetterStackConstants.INITIAL_LOOKBACK_DAYS.value)).strftime("%Y-%m-%d")
+    to = (today - timedelta(days=BetterStackConstants.SETTLED_LAG_DAYS.value)).strftime("%Y-%m-%d")
 
-    return df
+    date_ranges = {}
+    for monitor_id in monitor_ids:
+        cursor = cursors.get(monitor_id)
+        date_ranges[monitor_id] = {"from": min(cursor[:10], to) if cursor else default_from, "to": to}
+    return date_ranges
 
 
+@task(retries=3, retry_delay_seconds=60)
+def fetch_incidents(
+    token: str,
+    date_ranges: Dict[str, Dict[str, str]],
+    max_workers: int = BetterStackConstants.MAX_CONCURRENT_MONITORS.value,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Busca os incidents de todos os monitores da API v3, com os monitores em paralelo
+    sobre uma sessão compartilhada (a paginação de cada monitor é sequencial).
+
+    Returns:
+        Incidents por monitor
+    """
+    url = f"{BetterStackConstants.BASE_URL_V3.value}/incidents"
+    if not date_ranges:
+        return {}
+
+    workers = max(1, min(max_workers, len(date_ranges)))
+    log(f"Fetching incidents from {url} for {len(date_ranges)} monitors ({workers} in parallel)")
+
+    incidents = {}
+    with build_session(token, pool_size=workers) as session:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    _get_all_pages,
+                    session,
+                    url,
+                    {
+                        "from": date_range["from"],
+                        "to": date_range["to"],
+                        "monitor_id": monitor_id,
+                        "per_page": BetterStackConstants.INCIDENTS_PER_PAGE.value,
+                    },
+                ): monitor_id
+                for monitor_id, date_range in date_ranges.items()
+            }
+            for future in as_completed(futures):
+                incidents[futures[future]] = future.result()
+
+    log(f"{sum(len(items) for items in incidents.values())} incidents fetched")
+    return incidents
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return value
+
+
+@task
+def transform_incidents(
+    data: Dict[str, List[Dict[str, Any]]],
+    cursors: Optional[Dict[str, str]] = None,
+) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """
+    Achata `attributes` dos incidents em colunas tipadas.
+
+    Incidents com started_at até o cursor do monitor já foram gravados e são descartados.
+    data_particao é a data (UTC) de started_at, ou a data atual quando não houver.
+
+    Returns:
+        Tupla (DataFrame de incidents, cursores atualizados por monitor)
+    """
+    cursors = dict(cursors or {})
+    frames = []
+    for monitor_id, incidents in data.items():
+        if not incidents:
+            continue
+        frame = pd.json_normalize(incidents, max_level=1)
+        frame.insert(0, "monitor_id", monitor_id)
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame(), cursors
+
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop(columns=[column for column in df.columns if column.startswith("relationships.")])
+    df.columns = [column.removeprefix("attributes.") for column in df.columns]
+
+    for column in BetterStackConstants.TIMESTAMP_COLUMNS.value:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], utc=True, errors="coerce").astype("datetime64[us, UTC]")
+
+    if "started_at" not in df.columns:
+        df["started_at"] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[us, UTC]")
+
+    # Descarta o que já foi coletado em execuções anteriores
+    cursor = pd.to_datetime(df["monitor_id"].map(cursors), utc=True, errors="coerce")
+    df = df[cursor.isna() | df["started_at"].isna() | (df["started_at"] > cursor)].reset_index(drop=True)
+
+    # Novos cursores: maior started_at por monitor
+    for monitor_id, latest in df.groupby("monitor_id")["started_at"].max().dropna().items():
+        cursors[monitor_id] = latest.isoformat()
+
+    if df.empty:
+        return df, cursors
+
+    for column in df.columns:
+        if column in BetterStackConstants.TIMESTAMP_COLUMNS.value:
+            continue
+        if column in BetterStackConstants.INTEGER_COLUMNS.value:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+        elif column in BetterStackConstants.BOOLEAN_COLUMNS.value:
+            df[column] = df[column].astype("boolean")
+        else:
+            values = df[column]
+            if values.dtype == object:
+                values = values.map(_to_json, na_action="ignore")
+            df[column] = values.astype("string")
+
+    df["data_particao"] = df["started_at"].dt.strftime("%Y-%m-%d").fillna(datetime.now().strftime("%Y-%m-%d"))
+
+    return df, cursors
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pandas as pd
+
+from pipelines.rj_iplanrio__betterstack_api.tasks import calculate_date_ranges, transform_incidents
+
+NOW = datetime(2025, 12, 3, 3, 0)
+
+
+def _incident(incident_id: str, started_at: str, resolved_at: str | None = None) -> dict:
+    return {
+        "id": incident_id,
+        "type": "incident",
+        "attributes": {"name": f"incident {incident_id}", "started_at": started_at, "resolved_at": resolved_at},
+    }
+
+
+def test_monitor_without_cursor_collects_only_previous_day():
+    ranges = calculate_date_ranges.fn(["1"], {}, now=NOW)
+
+    assert ranges == {"1": {"from": "2025-12-02", "to": "2025-12-02"}}
+
+
+def test_cursor_resumes_from_its_day_up_to_previous_day():
+    ranges = calculate_date_ranges.fn(["1"], {"1": "2025-11-28T10:00:00+00:00"}, now=NOW)
+
+    assert ranges == {"1": {"from": "2025-11-28", "to": "2025-12-02"}}
+
+
+def test_cursor_in_current_day_never_widens_past_previous_day():
+    ranges = calculate_date_ranges.fn(["1"], {"1": "2025-12-03T01:00:00+00:00"}, now=NOW)
+
+    assert ranges == {"1": {"from": "2025-12-02", "to": "2025-12-02"}}
+
+
+def test_manual_range_applies_to_every_monitor():
+    ranges = calculate_date_ranges.fn(["1", "2"], {"1": "2025-12-02T00:00:00+00:00"}, "2025-01-01", "2025-01-31")
+
+    assert ranges == {monitor_id: {"from": "2025-01-01", "to": "2025-01-31"} for monitor_id in ("1", "2")}
+
+
+def test_incidents_up_to_cursor_are_dropped_and_cursor_advances():
+    data = {
+        "1": [
+            _incident("a", "2025-12-01T10:00:00Z", "2025-12-01T10:05:00Z"),
+            _incident("b", "2025-12-02T08:00:00Z", "2025-12-02T08:30:00Z"),
+        ],
+        "2": [_incident("c", "2025-12-02T09:00:00Z", "2025-12-02T09:10:00Z")],
+    }
+
+    df, cursors = transform_incidents.fn(data, cursors={"1": "2025-12-01T10:00:00+00:00"})
+
+    assert sorted(df["id"]) == ["b", "c"]
+    assert cursors == {"1": "2025-12-02T08:00:00+00:00", "2": "2025-12-02T09:00:00+00:00"}
+    assert df["started_at"].dtype == "datetime64[us, UTC]"
+    assert list(df.sort_values("id")["data_particao"]) == ["2025-12-02", "2025-12-02"]
+
+
+def test_monitor_without_new_incidents_keeps_its_cursor():
+    df, cursors = transform_incidents.fn(
+        {"1": [_incident("a", "2025-12-01T10:00:00Z")], "2": []},
+        cursors={"1": "2025-12-01T10:00:00+00:00", "2": "2025-11-30T00:00:00+00:00"},
+    )
+
+    assert df.empty
+    assert cursors == {"1": "2025-12-01T10:00:00+00:00", "2": "2025-11-30T00:00:00+00:00"}
+    assert isinstance(df, pd.DataFrame)
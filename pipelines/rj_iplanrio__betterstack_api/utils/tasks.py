@@ -41,11 +41,9 @@ def create_date_partitions(
             log("Aviso: Algumas linhas têm data_particao nula e serão descartadas.")
             df = df.dropna(subset=["data_particao"])
 
-    dates = df["data_particao"].unique()
-
-    # Save partitions
-    for date in dates:
-        partition_df = df[df["data_particao"] == date].drop(columns=["data_particao"])
+    # Save partitions (single pass over the rows)
+    for date, partition_df in df.groupby("data_particao", sort=False):
+        partition_df = partition_df.drop(columns=["data_particao"])
 
         partition_folder = os.path.join(
             root_folder,
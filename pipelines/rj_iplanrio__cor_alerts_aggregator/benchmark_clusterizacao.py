@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark offline da clusterizacao de alertas (cluster_alerts_by_location).
+
+Le a fixture do cenario de carga gerada por
+pipelines/rj_iplanrio__cor_alerts_test_writer/gerar_fixture_carga.py, aplica o mesmo
+filtro de bairros de fetch_pending_alerts e executa cluster_alerts_by_location com
+query_bigquery substituida por uma emulacao local de ST_CLUSTERDBSCAN(raio, 1) por
+tipo de alerta. Mede o tempo da parte Python (montagem da query e dos AlertCluster),
+separado do tempo da emulacao, e o tamanho da query frente ao limite do BigQuery.
+
+Uso:
+    python -m pipelines.rj_iplanrio__cor_alerts_aggregator.benchmark_clusterizacao \\
+        --fixture ./data_cor_alerts_test/fixtures/load_alerts.csv
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipelines.rj_iplanrio__cor_alerts_aggregator import tasks
+from pipelines.rj_iplanrio__cor_alerts_aggregator.constants import (
+    CORAlertAggregatorConstants,
+)
+
+METERS_PER_DEGREE_LAT = 111_320
+BIGQUERY_MAX_QUERY_LENGTH = 1_024_000  # Caracteres de uma query nao resolvida
+
+
+def dbscan_min_pts_1(lat: np.ndarray, lng: np.ndarray, radius_meters: float) -> np.ndarray:
+    """
+    Componentes conexas de pontos a ate radius_meters uns dos outros (DBSCAN com minPts=1).
+
+    Usa projecao equiretangular local e uma grade de lado raio/sqrt(2): pontos da mesma
+    celula estao sempre no mesmo cluster, entao so pares de celulas vizinhas sao comparados.
+    """
+    y = lat * METERS_PER_DEGREE_LAT
+    x = lng * METERS_PER_DEGREE_LAT * math.cos(math.radians(float(np.mean(lat))))
+    side = radius_meters / math.sqrt(2)
+    cells, cell_of_point = np.unique(
+        np.stack([np.floor(x / side), np.floor(y / side)], axis=1).astype(np.int64),
+        axis=0,
+        return_inverse=True,
+    )
+    cell_of_point = cell_of_point.ravel()
+    order = np.argsort(cell_of_point, kind="stable")
+    members = np.split(order, np.cumsum(np.bincount(cell_of_point, minlength=len(cells)))[:-1])
+    cell_index = {(int(cx), int(cy)): i for i, (cx, cy) in enumerate(cells)}
+
+    parent = list(range(len(cells)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # Metade das vizinhancas (cada par de celulas e visto uma vez) que podem estar a menos de um raio
+    offsets = [
+        (dx, dy)
+        for dx in range(-2, 3)
+        for dy in range(-2, 3)
+        if (dx, dy) > (0, 0) and math.hypot(max(abs(dx) - 1, 0), max(abs(dy) - 1, 0)) * side <= radius_meters
+    ]
+    for i, (cx, cy) in enumerate(cells):
+        for dx, dy in offsets:
+            j = cell_index.get((int(cx) + dx, int(cy) + dy))
+            if j is None or find(i) == find(j):
+                continue
+            a, b = members[i], members[j]
+            distances = (x[a, None] - x[None, b]) ** 2 + (y[a, None] - y[None, b]) ** 2
+            if distances.min() <= radius_meters**2:
+                parent[find(j)] = find(i)
+
+    roots = np.array([find(i) for i in range(len(cells))])
+    return np.unique(roots, return_inverse=True)[1].ravel()[cell_of_point]
+
+
+def emulate_cluster_query(alerts_df: pd.DataFrame, radius_meters: float) -> pd.DataFrame:
+    """Resultado equivalente a query de cluster_alerts_by_location, calculado localmente."""
+    clustered = alerts_df[["alert_id", "alert_type", "latitude", "longitude", "created_at"]].copy()
+    clustered["cluster_id"] = 0
+    for _, group in clustered.groupby("alert_type"):
+        clustered.loc[group.index, "cluster_id"] = dbscan_min_pts_1(
+            group["latitude"].to_numpy(float), group["longitude"].to_numpy(float), radius_meters
+        )
+
+    return (
+        clustered.groupby(["alert_type", "cluster_id"], as_index=False)
+        .agg(
+            alert_ids=("alert_id", list),
+            alert_count=("alert_id", "size"),
+            oldest_alert=("created_at", "min"),
+            centroid_lat=("latitude", "mean"),
+            centroid_lng=("longitude", "mean"),
+        )
+        .sort_values(["alert_type", "oldest_alert"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def load_fixture(path: str, apply_neighborhood_filter: bool = True) -> pd.DataFrame:
+    """Le a fixture no formato retornado por fetch_pending_alerts."""
+    alerts = pd.read_csv(path, dtype=str, keep_default_na=False)
+    alerts["latitude"] = alerts["latitude"].astype(float)
+    alerts["longitude"] = alerts["longitude"].astype(float)
+    alerts["created_at"] = pd.to_datetime(alerts["created_at"])
+    if apply_neighborhood_filter:
+        allowed = CORAlertAggregatorConstants.ALLOWED_NEIGHBORHOODS.value
+        alerts = alerts[alerts["bairro_normalizado"].isin(allowed)]
+    return alerts.sort_values("created_at", kind="stable").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default="./data_cor_alerts_test/fixtures/load_alerts.csv")
+    parser.add_argument("--raio", type=float, default=CORAlertAggregatorConstants.RADIUS_METERS.value)
+    parser.add_argument("--todos-bairros", action="store_true", help="Nao aplica o filtro de bairros")
+    args = parser.parse_args()
+
+    alerts = load_fixture(args.fixture, apply_neighborhood_filter=not args.todos_bairros)
+
+    stats = {"query_length": 0, "emulation": 0.0}
+
+    def _query_bigquery(query: str, billing_project_id: str, bucket_name: str) -> pd.DataFrame:
+        stats["query_length"] = len(query)
+        start = time.perf_counter()
+        result = emulate_cluster_query(alerts, args.raio)
+        stats["emulation"] += time.perf_counter() - start
+        return result
+
+    tasks.query_bigquery = _query_bigquery
+    start = time.perf_counter()
+    clusters = tasks.cluster_alerts_by_location.fn(alerts, radius_meters=args.raio)
+    total = time.perf_counter() - start
+
+    clustered = sum(cluster.alert_count for cluster in clusters)
+    print(f"{len(alerts)} alertas elegiveis -> {len(clusters)} clusters ({clustered} alertas agrupados)")
+    print(f"  cluster_alerts_by_location (parte Python): {total - stats['emulation']:.2f}s")
+    print(f"  emulacao do ST_CLUSTERDBSCAN: {stats['emulation']:.2f}s")
+    print(
+        f"  tamanho da query: {stats['query_length']} caracteres "
+        f"({stats['query_length'] / BIGQUERY_MAX_QUERY_LENGTH:.0%} do limite do BigQuery)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,23 @@ class CORTestWriterConstants(Enum):
     # Diretorio temporario para arquivos CSV
     ROOT_FOLDER = "./data_cor_alerts_test/"
 
+    # Teste de carga (cenario sintetico parametrizado)
+    LOAD_SCENARIO = "load"
+    LOAD_BATCH_SIZE = 10000  # Alertas por carga no BigQuery
+    LOAD_FIXTURE_PATH = "./data_cor_alerts_test/fixtures/load_alerts.csv"
+    LOAD_NOISE_SPREAD_METERS = 3000  # Raio do ruido em volta de cada bairro
+    LOAD_CRITICAL_FRACTION = 0.1
+
+
+# Bairros em volta dos quais o cenario de carga sorteia os clusters
+# (os tres primeiros estao na whitelist do agregador, os demais devem ser filtrados)
+LOAD_TEST_HOTSPOTS = [
+    {"lat": -22.8668, "lng": -43.2913, "bairro_raw": "Acari", "bairro_normalizado": "acari"},
+    {"lat": -22.8668, "lng": -43.3670, "bairro_raw": "Jardim América", "bairro_normalizado": "jardim america"},
+    {"lat": -22.8932, "lng": -43.5512, "bairro_raw": "Guaratiba", "bairro_normalizado": "guaratiba"},
+    {"lat": -22.9711, "lng": -43.1822, "bairro_raw": "Copacabana", "bairro_normalizado": "copacabana"},
+    {"lat": -22.9324, "lng": -43.2462, "bairro_raw": "Tijuca", "bairro_normalizado": "tijuca"},
+]
 
 # Definicao de cenarios de teste
 TEST_SCENARIOS = {
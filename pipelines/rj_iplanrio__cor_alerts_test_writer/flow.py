@@ -13,11 +13,14 @@ from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow
 
 from pipelines.rj_iplanrio__cor_alerts_test_writer.constants import (
+    CORTestWriterConstants,
     TEST_SCENARIOS,
 )
 from pipelines.rj_iplanrio__cor_alerts_test_writer.tasks import (
     cleanup_test_alerts,
+    generate_load_test_alerts,
     generate_mock_alerts,
+    insert_alert_batches_to_bigquery,
     insert_alerts_to_bigquery,
 )
 
@@ -30,17 +33,34 @@ def rj_iplanrio__cor_alerts_test_writer(
     cleanup_after: bool = False,
     delay_between_alerts: int = 10,
     cleanup_delay_seconds: int = 300,
+    load_alerts: int = 20000,
+    load_clusters: int = 200,
+    load_cluster_radius_meters: float = 250,
+    load_noise_fraction: float = 0.1,
+    load_arrival_rate_per_minute: float = 2000,
+    load_batch_size: int = CORTestWriterConstants.LOAD_BATCH_SIZE.value,
+    load_seed: int = 0,
+    load_fixture_path: str = CORTestWriterConstants.LOAD_FIXTURE_PATH.value,
 ):
     """
     Gera e insere alertas mockados na fila do COR para testes.
 
     Args:
         environment: Ambiente alvo (staging ou prod, recomendado staging)
-        scenario: Cenario pre-definido ("single", "small_cluster", "large_cluster", "mixed", "neighborhood_filter", "edge_cases")
+        scenario: Cenario pre-definido ("single", "small_cluster", "large_cluster", "mixed", "neighborhood_filter",
+            "edge_cases") ou "load" para o cenario de carga sintetico
         cleanup_before: Remove dados de teste existentes antes de inserir
         cleanup_after: Remove dados apos insercao (util para testes temporarios)
         delay_between_alerts: Delay em segundos entre cada alerta (default: 10s)
         cleanup_delay_seconds: Tempo de espera antes do cleanup final (default: 300s = 5min)
+        load_alerts: Cenario "load" - numero total de alertas
+        load_clusters: Cenario "load" - numero de clusters espaciais
+        load_cluster_radius_meters: Cenario "load" - espalhamento de cada cluster em metros
+        load_noise_fraction: Cenario "load" - fracao de alertas fora dos clusters
+        load_arrival_rate_per_minute: Cenario "load" - alertas por minuto (os created_at terminam agora)
+        load_batch_size: Cenario "load" - alertas por carga no BigQuery
+        load_seed: Cenario "load" - semente do gerador
+        load_fixture_path: Cenario "load" - CSV local com os alertas gerados (vazio para nao gravar)
     """
     run_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     rename_current_flow_run_task(
@@ -50,8 +70,10 @@ def rj_iplanrio__cor_alerts_test_writer(
     log(f"=== Iniciando geracao de dados de teste - Cenario: {scenario} ===")
     log(f"Ambiente: {environment}")
 
+    is_load_test = scenario == CORTestWriterConstants.LOAD_SCENARIO.value
+
     # Validar cenario
-    if scenario not in TEST_SCENARIOS:
+    if scenario not in TEST_SCENARIOS and not is_load_test:
         available = list(TEST_SCENARIOS.keys())
         raise ValueError(
             f"Cenario '{scenario}' nao encontrado. Disponiveis: {available}"
@@ -65,17 +87,33 @@ def rj_iplanrio__cor_alerts_test_writer(
         removed = cleanup_test_alerts(environment=environment)
         log(f"Cleanup inicial: {removed} alertas de teste removidos")
 
-    # 2. Gerar configuracoes de alertas baseado no cenario
-    alert_configs = generate_mock_alerts(scenario=scenario, environment=environment)
-    log(f"Preparados {len(alert_configs)} alertas para cenario '{scenario}'")
+    if is_load_test:
+        # 2-3. Gerar o cenario de carga e inserir em poucas cargas
+        alerts = generate_load_test_alerts(
+            n_alerts=load_alerts,
+            n_clusters=load_clusters,
+            cluster_radius_meters=load_cluster_radius_meters,
+            noise_fraction=load_noise_fraction,
+            arrival_rate_per_minute=load_arrival_rate_per_minute,
+            environment=environment,
+            seed=load_seed,
+            fixture_path=load_fixture_path or None,
+        )
+        alerts_generated = len(alerts)
+        inserted = insert_alert_batches_to_bigquery(alerts=alerts, batch_size=load_batch_size)
+    else:
+        # 2. Gerar configuracoes de alertas baseado no cenario
+        alert_configs = generate_mock_alerts(scenario=scenario, environment=environment)
+        alerts_generated = len(alert_configs)
+        log(f"Preparados {alerts_generated} alertas para cenario '{scenario}'")
 
-    # 3. Inserir no BigQuery (tabela cor_alerts_queue) com delay entre alertas
-    inserted = insert_alerts_to_bigquery(
-        alert_configs=alert_configs,
-        scenario=scenario,
-        environment=environment,
-        delay_seconds=delay_between_alerts,
-    )
+        # 3. Inserir no BigQuery (tabela cor_alerts_queue) com delay entre alertas
+        inserted = insert_alerts_to_bigquery(
+            alert_configs=alert_configs,
+            scenario=scenario,
+            environment=environment,
+            delay_seconds=delay_between_alerts,
+        )
     log(f"Inseridos {inserted} alertas na fila do BigQuery")
 
     log(
@@ -96,6 +134,6 @@ def rj_iplanrio__cor_alerts_test_writer(
     return {
         "scenario": scenario,
         "environment": environment,
-        "alerts_generated": len(alert_configs),
+        "alerts_generated": alerts_generated,
         "alerts_inserted": inserted,
     }
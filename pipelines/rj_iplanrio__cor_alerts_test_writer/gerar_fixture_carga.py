@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Gera a fixture local do cenario de carga, sem BigQuery.
+
+O CSV tem as colunas da tabela cor_alerts_queue e serve de entrada para
+pipelines/rj_iplanrio__cor_alerts_aggregator/benchmark_clusterizacao.py.
+
+Uso:
+    python -m pipelines.rj_iplanrio__cor_alerts_test_writer.gerar_fixture_carga --alertas 50000 --clusters 500
+"""
+
+import argparse
+
+from pipelines.rj_iplanrio__cor_alerts_test_writer.constants import CORTestWriterConstants
+from pipelines.rj_iplanrio__cor_alerts_test_writer.tasks import generate_load_alerts, write_alerts_fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alertas", type=int, default=20000)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--raio", type=float, default=250, help="Espalhamento de cada cluster em metros")
+    parser.add_argument("--ruido", type=float, default=0.1, help="Fracao de alertas fora dos clusters")
+    parser.add_argument("--taxa", type=float, default=2000, help="Alertas por minuto")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--saida", default=CORTestWriterConstants.LOAD_FIXTURE_PATH.value)
+    args = parser.parse_args()
+
+    alerts = generate_load_alerts(
+        n_alerts=args.alertas,
+        n_clusters=args.clusters,
+        cluster_radius_meters=args.raio,
+        noise_fraction=args.ruido,
+        arrival_rate_per_minute=args.taxa,
+        seed=args.seed,
+    )
+    path = write_alerts_fixture(alerts, args.saida)
+    print(f"{len(alerts)} alertas gravados em {path}")
+
+
+if __name__ == "__main__":
+    main()
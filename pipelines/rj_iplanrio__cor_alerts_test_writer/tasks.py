@@ -3,13 +3,15 @@
 Tasks para pipeline de geracao de dados de teste COR
 """
 
+import math
 import os
 import uuid
 from datetime import datetime
 from pathlib import Path
 from time import sleep
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 from basedosdados import Base
 from google.cloud import bigquery
@@ -19,9 +21,13 @@ from prefect import task
 
 from pipelines.rj_iplanrio__cor_alerts_test_writer.constants import (
     CORTestWriterConstants,
+    LOAD_TEST_HOTSPOTS,
     TEST_SCENARIOS,
 )
 
+METERS_PER_DEGREE_LAT = 111_320
+ALERT_TYPES = ["alagamento", "enchente", "bolsao"]
+
 
 def validate_environment(environment: str) -> str:
     """
@@ -111,6 +117,226 @@ def save_alert_to_csv(alert: Dict[str, Any], data_path: str) -> str:
     return filepath
 
 
+def generate_load_alerts(
+    n_alerts: int,
+    n_clusters: int,
+    cluster_radius_meters: float,
+    noise_fraction: float,
+    arrival_rate_per_minute: float,
+    environment: str = "staging",
+    seed: int = 0,
+    end: Optional[datetime] = None,
+) -> pd.DataFrame:
+    """
+    Gera alertas sinteticos agrupados espacialmente, com as mesmas colunas de generate_single_alert.
+
+    Os centros dos clusters sao sorteados em volta de LOAD_TEST_HOTSPOTS, cada um com um
+    tipo de alerta; cada alerta de cluster fica a uma distancia normal (desvio de
+    cluster_radius_meters / 2) do centro. A fracao noise_fraction e ruido uniforme em
+    volta dos bairros. As chegadas seguem um processo de Poisson com a taxa pedida e
+    terminam em `end` (default: agora), para caberem na janela do agregador.
+
+    Args:
+        n_alerts: Numero total de alertas
+        n_clusters: Numero de clusters
+        cluster_radius_meters: Espalhamento de cada cluster (controla a densidade)
+        noise_fraction: Fracao de alertas fora dos clusters (0 a 1)
+        arrival_rate_per_minute: Alertas por minuto
+        environment: Ambiente (staging ou prod)
+        seed: Semente do gerador (mesma semente, mesmos alertas)
+        end: Horario do ultimo alerta
+
+    Returns:
+        DataFrame com um alerta por linha, em ordem de chegada
+    """
+    env_validated = validate_environment(environment)
+    if n_alerts < 1 or n_clusters < 1:
+        raise ValueError("n_alerts e n_clusters devem ser maiores que zero")
+    if not 0 <= noise_fraction <= 1:
+        raise ValueError(f"noise_fraction deve estar entre 0 e 1, recebeu: {noise_fraction}")
+    if arrival_rate_per_minute <= 0:
+        raise ValueError("arrival_rate_per_minute deve ser maior que zero")
+
+    rng = np.random.default_rng(seed)
+    hotspots = pd.DataFrame(LOAD_TEST_HOTSPOTS)
+    spread = CORTestWriterConstants.LOAD_NOISE_SPREAD_METERS.value
+
+    def _offset(lat: np.ndarray, lng: np.ndarray, dx: np.ndarray, dy: np.ndarray):
+        """Desloca (lat, lng) de dx metros a leste e dy metros ao norte."""
+        return (
+            lat + dy / METERS_PER_DEGREE_LAT,
+            lng + dx / (METERS_PER_DEGREE_LAT * np.cos(np.radians(lat))),
+        )
+
+    # Centros dos clusters: bairro em rodizio, posicao uniforme em volta do bairro
+    cluster_hotspot = np.arange(n_clusters) % len(hotspots)
+    cluster_lat, cluster_lng = _offset(
+        hotspots["lat"].to_numpy()[cluster_hotspot],
+        hotspots["lng"].to_numpy()[cluster_hotspot],
+        rng.uniform(-spread, spread, n_clusters),
+        rng.uniform(-spread, spread, n_clusters),
+    )
+    cluster_type = rng.integers(0, len(ALERT_TYPES), n_clusters)
+
+    is_noise = rng.random(n_alerts) < noise_fraction
+    cluster = rng.integers(0, n_clusters, n_alerts)
+    hotspot = cluster_hotspot[cluster]
+    alert_type = cluster_type[cluster]
+
+    sigma = cluster_radius_meters / 2
+    lat, lng = _offset(
+        cluster_lat[cluster],
+        cluster_lng[cluster],
+        rng.normal(0, sigma, n_alerts),
+        rng.normal(0, sigma, n_alerts),
+    )
+
+    noise_hotspot = rng.integers(0, len(hotspots), n_alerts)
+    noise_lat, noise_lng = _offset(
+        hotspots["lat"].to_numpy()[noise_hotspot],
+        hotspots["lng"].to_numpy()[noise_hotspot],
+        rng.uniform(-spread, spread, n_alerts),
+        rng.uniform(-spread, spread, n_alerts),
+    )
+    lat = np.where(is_noise, noise_lat, lat)
+    lng = np.where(is_noise, noise_lng, lng)
+    hotspot = np.where(is_noise, noise_hotspot, hotspot)
+    alert_type = np.where(is_noise, rng.integers(0, len(ALERT_TYPES), n_alerts), alert_type)
+
+    # Processo de Poisson: intervalos exponenciais, ultimo alerta em `end`
+    arrivals = np.cumsum(rng.exponential(60 / arrival_rate_per_minute, n_alerts))
+    end = pd.Timestamp(end or datetime.now())
+    created_at = end - pd.to_timedelta(arrivals[-1] - arrivals, unit="s")
+
+    severity = np.where(
+        rng.random(n_alerts) < CORTestWriterConstants.LOAD_CRITICAL_FRACTION.value, "critica", "alta"
+    )
+    prefix = CORTestWriterConstants.TEST_ALERT_PREFIX.value
+    scenario = CORTestWriterConstants.LOAD_SCENARIO.value
+    run_id = uuid.uuid4().hex[:8]
+    index = pd.Series(np.arange(n_alerts)).astype(str).str.zfill(len(str(n_alerts)))
+    types = np.asarray(ALERT_TYPES)[alert_type]
+    label = np.where(is_noise, "ruido", "cluster " + cluster.astype(str))
+    bairro_raw = hotspots["bairro_raw"].to_numpy()[hotspot]
+
+    return pd.DataFrame(
+        {
+            "alert_id": f"{prefix}{scenario}_{run_id}_" + index,
+            "user_id": CORTestWriterConstants.TEST_USER_ID.value,
+            "alert_type": types,
+            "severity": severity,
+            "description": pd.Series(types) + " sintetico (" + label + ")",
+            "address": "Endereco sintetico " + index + ", " + bairro_raw,
+            "latitude": lat.round(6),
+            "longitude": lng.round(6),
+            "bairro_raw": bairro_raw,
+            "bairro_normalizado": hotspots["bairro_normalizado"].to_numpy()[hotspot],
+            "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "environment": env_validated,
+            "status": "pending",
+            "aggregation_group_id": None,
+            "sent_at": None,
+        }
+    )
+
+
+def write_alerts_fixture(alerts: pd.DataFrame, fixture_path: str) -> str:
+    """
+    Grava os alertas em um CSV local, no formato da tabela cor_alerts_queue.
+
+    O arquivo serve de entrada para benchmarks offline da clusterizacao do agregador.
+
+    Returns:
+        Caminho do arquivo gravado
+    """
+    path = Path(fixture_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    alerts.to_csv(path, index=False)
+    return str(path)
+
+
+@task
+def generate_load_test_alerts(
+    n_alerts: int,
+    n_clusters: int,
+    cluster_radius_meters: float,
+    noise_fraction: float,
+    arrival_rate_per_minute: float,
+    environment: str = "staging",
+    seed: int = 0,
+    fixture_path: Optional[str] = CORTestWriterConstants.LOAD_FIXTURE_PATH.value,
+) -> pd.DataFrame:
+    """
+    Gera o cenario de carga (ver generate_load_alerts) e grava a fixture local, se pedido.
+
+    Returns:
+        DataFrame com os alertas gerados
+    """
+    alerts = generate_load_alerts(
+        n_alerts=n_alerts,
+        n_clusters=n_clusters,
+        cluster_radius_meters=cluster_radius_meters,
+        noise_fraction=noise_fraction,
+        arrival_rate_per_minute=arrival_rate_per_minute,
+        environment=environment,
+        seed=seed,
+    )
+    log(
+        f"Gerados {len(alerts)} alertas em {n_clusters} clusters "
+        f"(raio {cluster_radius_meters}m, ruido {noise_fraction:.0%}, "
+        f"{arrival_rate_per_minute}/min de {alerts['created_at'].iloc[0]} a {alerts['created_at'].iloc[-1]})"
+    )
+
+    if fixture_path:
+        log(f"Fixture gravada em {write_alerts_fixture(alerts, fixture_path)}")
+    return alerts
+
+
+@task
+def insert_alert_batches_to_bigquery(
+    alerts: pd.DataFrame,
+    batch_size: int = CORTestWriterConstants.LOAD_BATCH_SIZE.value,
+) -> int:
+    """
+    Insere os alertas no BigQuery em poucas cargas, uma por lote de batch_size alertas.
+
+    Cada lote vira um unico CSV e um unico create_table_and_upload_to_gcs_task, em
+    ordem de chegada.
+
+    Returns:
+        Numero de alertas inseridos
+    """
+    if alerts.empty:
+        log("Nenhum alerta para inserir")
+        return 0
+
+    dataset_id = CORTestWriterConstants.DATASET_ID.value
+    table_id = CORTestWriterConstants.QUEUE_TABLE_ID.value
+    root_folder = CORTestWriterConstants.ROOT_FOLDER.value
+    run_folder = os.path.join(root_folder, f"load_{uuid.uuid4().hex[:8]}")
+
+    total_batches = math.ceil(len(alerts) / batch_size)
+    inserted_count = 0
+    for i, start in enumerate(range(0, len(alerts), batch_size)):
+        batch = alerts.iloc[start : start + batch_size]
+        data_path = os.path.join(run_folder, f"batch_{i}")
+        Path(data_path).mkdir(parents=True, exist_ok=True)
+        batch.to_csv(os.path.join(data_path, f"alerts_{i}.csv"), index=False)
+
+        create_table_and_upload_to_gcs_task(
+            data_path=data_path,
+            dataset_id=dataset_id,
+            table_id=table_id,
+            biglake_table=False,
+            dump_mode="append",
+        )
+        inserted_count += len(batch)
+        log(f"[{i+1}/{total_batches}] Carga com {len(batch)} alertas inserida")
+
+    log(f"Total inseridos: {inserted_count}/{len(alerts)} alertas")
+    return inserted_count
+
+
 @task
 def generate_mock_alerts(
     scenario: str,
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from iplanrio.pipelines_utils.prefect import create_schedules
 
-schedules_parameters = [
+LAYERS = [
     {
         "url": "https://pgeo3.rio.rj.gov.br/arcgis/rest/services/Cartografia/Limites_administrativos/MapServer/4",
         "crs": "EPSG:31983",
@@ -52,8 +52,32 @@ schedules_parameters = [
         "crs": "EPSG:31983",
         "table_id": "numero_porta",
     },
+    {
+        "url": "https://services5.arcgis.com/mgrvZxGU0bSJbVld/arcgis/rest/services/Quadras_Lotes_Edificacoes/FeatureServer/1/",
+        "crs": "EPSG:31983",
+        "table_id": "lote",
+    },
+    {
+        "url": "https://pgeo3.rio.rj.gov.br/arcgis/rest/services/Urbanismo/LBB_AEIS/FeatureServer/1",
+        "crs": "EPSG:31983",
+        "table_id": "aeis",
+    },
+    {
+        "url": "https://pgeo3.rio.rj.gov.br/arcgis/rest/services/Urbanismo/LBB_AEIS/FeatureServer/0",
+        "crs": "EPSG:31983",
+        "table_id": "aeis_bairro_maravilha",
+    },
+]
+
+# All layers are harvested in a single run; layers whose lastEditDate did not change are skipped
+schedules_parameters = [
+    {
+        "dataset_id": "brutos_dados_mestres",
+        "layers": LAYERS,
+    },
 ]
 
+
 # Schedule Settings
 BASE_ANCHOR_DATE = "2025-07-15T00:00:00"
 BASE_INTERVAL_SECONDS = 3600 * 24 * 7
@@ -63,7 +87,7 @@ TIMEZONE = "America/Sao_Paulo"
 
 schedules_config = create_schedules(
     schedules_parameters=schedules_parameters,
-    slug_field="table_id",
+    slug_field="dataset_id",
     base_interval_seconds=BASE_INTERVAL_SECONDS,
     base_anchor_date_str=BASE_ANCHOR_DATE,
     runs_interval_minutes=RUNS_SEPARATION_MINUTES,
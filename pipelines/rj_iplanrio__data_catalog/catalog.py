@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Build the data catalog from the INFORMATION_SCHEMA result without leaving the process."""
+
+import gzip
+import hashlib
+import json
+from typing import IO, Dict, Iterator, Tuple
+
+import polars as pl
+
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S%.f"
+
+
+def _strip_quotes(column: pl.Expr) -> pl.Expr:
+    """Remove one leading and one trailing double quote (descriptions come quoted from TABLE_OPTIONS)."""
+    return column.fill_null("").str.replace(r'^"', "").str.replace(r'"$', "")
+
+
+def iter_datasets(df: pl.DataFrame) -> Iterator[Tuple[str, str, dict]]:
+    """
+    Group the flat catalog rows by project, dataset and table.
+
+    Columns are aggregated into structs per table and tables into structs per dataset, so
+    only one dataset at a time is turned into Python objects. Ordering and field
+    semantics match the old transform.jq: projects, datasets and tables are sorted by
+    name, columns keep the query order, and a dataset's description is the one from its
+    first table.
+
+    Yields:
+        Tuples of (project, dataset, dataset payload)
+    """
+    tables = (
+        df.group_by("projeto", "dataset", "tabela", maintain_order=True)
+        .agg(
+            pl.col("criado_em").first().dt.to_string(CREATED_AT_FORMAT).alias("created_at"),
+            _strip_quotes(pl.col("descricao_tabela").first()).alias("description"),
+            pl.struct(
+                pl.col("coluna").alias("name"),
+                _strip_quotes(pl.col("descricao_coluna")).alias("description"),
+                pl.col("tipo_dado").alias("type"),
+            ).alias("columns"),
+        )
+        .sort("projeto", "dataset", "tabela", maintain_order=True)
+    )
+    datasets = tables.group_by("projeto", "dataset", maintain_order=True).agg(
+        _strip_quotes(pl.col("description").first()).alias("description"),
+        pl.struct(pl.col("tabela").alias("name"), "created_at", "columns").alias("tables"),
+    )
+
+    for row in datasets.iter_rows(named=True):
+        payload = {
+            "description": row["description"],
+            "tables": [
+                {
+                    "name": table["name"],
+                    "created_at": table["created_at"],
+                    "schema": {
+                        column["name"]: {"description": column["description"], "type": column["type"]}
+                        for column in table["columns"]
+                    },
+                }
+                for table in row["tables"]
+            ],
+        }
+        yield row["projeto"], row["dataset"], payload
+
+
+def write_catalog(df: pl.DataFrame, fileobj: IO[bytes]) -> Dict[str, str]:
+    """
+    Stream the catalog as gzip-compressed JSON ({project: {dataset: {...}}}) into `fileobj`.
+
+    Each dataset is serialized exactly once; the same bytes are hashed and written.
+
+    Returns:
+        Manifest mapping "project.dataset" to the SHA-256 of its serialized payload
+    """
+    manifest = {}
+    current_project = None
+    with gzip.GzipFile(fileobj=fileobj, mode="wb", mtime=0) as gz:
+        gz.write(b"{")
+        for project, dataset, payload in iter_datasets(df):
+            if project != current_project:
+                if current_project is not None:
+                    gz.write(b"},")
+                gz.write(json.dumps(project).encode() + b":{")
+                current_project = project
+            else:
+                gz.write(b",")
+
+            encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            manifest[f"{project}.{dataset}"] = hashlib.sha256(encoded).hexdigest()
+            gz.write(json.dumps(dataset).encode() + b":" + encoded)
+        if current_project is not None:
+            gz.write(b"}")
+        gz.write(b"}")
+    return manifest
+
+
+def diff_manifests(previous: Dict[str, str], current: Dict[str, str]) -> Tuple[list, list]:
+    """Return the datasets that changed (or are new) and the ones that were removed."""
+    changed = sorted(key for key, digest in current.items() if previous.get(key) != digest)
+    removed = sorted(key for key in previous if key not in current)
+    return changed, removed
@@ -1,14 +1,19 @@
 # -*- coding: utf-8 -*-
-import subprocess
 from json import dumps, loads
 from os import environ
 from pathlib import Path
+from tempfile import TemporaryFile
 
 import polars as pl
 from google.cloud import bigquery, storage
 from google.oauth2 import service_account
 from prefect import flow
 
+from pipelines.rj_iplanrio__data_catalog.catalog import diff_manifests, write_catalog
+
+CATALOG_BLOB_NAME = "catalog.json"
+MANIFEST_BLOB_NAME = "catalog.manifest.json"
+
 
 def pull_secret_to_file() -> None:
     """Pull the service account JSON from an environment variable and save it to a file."""
@@ -20,54 +25,54 @@ def get_credentials() -> service_account.Credentials:
     return service_account.Credentials.from_service_account_file("/tmp/sa.json")
 
 
-def get_catalog():
-    """Query BigQuery to get the data catalog and save it as a raw JSON file."""
+def get_catalog() -> pl.DataFrame:
+    """Query BigQuery to get the flat data catalog (one row per column)."""
     credentials = get_credentials()
     client = bigquery.Client(credentials=credentials)
     query = (Path(__file__).parent / "bigquery.sql").read_text()
     result = client.query_and_wait(query).to_arrow()
 
     df = pl.from_arrow(result)
-    df = df.filter(
+    return df.filter(
         ~pl.col("dataset").str.contains("staging"),
         ~pl.col("dataset").str.contains("airbyte"),
         ~pl.col("dataset").str.contains("logs"),
     )
 
-    df.write_json(Path("/tmp/catalog-raw.json"))
-
-
-def transform_catalog():
-    """Transform the raw catalog JSON using jq."""
-    result = subprocess.run(
-        [
-            "jq",
-            "-f",
-            (Path(__file__).parent / "transform.jq").as_posix(),
-            "/tmp/catalog-raw.json",
-        ],
-        capture_output=True,
-        text=True,
-        check=True,
-    )
-
-    transformed_json = loads(result.stdout)
-
-    Path("/tmp/catalog.json").write_text(dumps(result.stdout))
 
+def publish_catalog(df: pl.DataFrame) -> None:
+    """
+    Build the catalog and upload it gzip-compressed to the Google Cloud Storage bucket.
 
-def upload_catalog_to_bucket():
-    """Upload the transformed catalog JSON to a Google Cloud Storage bucket."""
+    A manifest with one hash per dataset is kept next to the catalog. When no dataset
+    changed since the last published version, the upload is skipped.
+    """
     credentials = get_credentials()
     client = storage.Client(credentials=credentials)
     bucket = client.bucket(environ["DATA_CATALOG__BUCKET_NAME"])
-    blob = bucket.blob("catalog.json")
-    blob.upload_from_filename("/tmp/catalog.json")
+    manifest_blob = bucket.blob(MANIFEST_BLOB_NAME)
+
+    with TemporaryFile() as catalog_file:
+        manifest = write_catalog(df, catalog_file)
+
+        previous = loads(manifest_blob.download_as_bytes()) if manifest_blob.exists() else {}
+        changed, removed = diff_manifests(previous, manifest)
+        if not changed and not removed:
+            print(f"Catalog unchanged ({len(manifest)} datasets); skipping upload.")
+            return
+        print(f"{len(changed)} datasets changed, {len(removed)} removed: {', '.join(changed + removed)}")
+
+        catalog_file.seek(0)
+        blob = bucket.blob(CATALOG_BLOB_NAME)
+        # Served decompressed to clients that do not accept gzip (decompressive transcoding)
+        blob.content_encoding = "gzip"
+        blob.upload_from_file(catalog_file, content_type="application/json", rewind=True)
+
+    manifest_blob.upload_from_string(dumps(manifest), content_type="application/json")
 
 
 @flow(log_prints=True)
 def rj_iplanrio__data_catalog():
     pull_secret_to_file()
-    get_catalog()
-    transform_catalog()
-    upload_catalog_to_bucket()
\ No newline at end of file
+    df = get_catalog()
+    publish_catalog(df)
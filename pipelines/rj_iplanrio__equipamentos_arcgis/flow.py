@@ -3,13 +3,13 @@
 This flow is used to download the equipamentos from the ARCGIS and upload to BIGQUERY.
 """
 
-from iplanrio.pipelines_templates.dump_arcgis.tasks import (
-    download_data_from_arcgis_task,
-)
+from typing import Any, Dict, List, Optional
+
 from iplanrio.pipelines_utils.bd import create_table_and_upload_to_gcs_task
 from iplanrio.pipelines_utils.env import inject_bd_credentials_task
 from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow
+from prefect_rj_iplanrio.arcgis import harvest_arcgis_layers_task, save_arcgis_state_task
 
 
 @flow(log_prints=True)
@@ -18,15 +18,56 @@ def rj_iplanrio__equipamentos_arcgis(
     crs: str = "EPSG:3857",
     dataset_id: str = "brutos_equipamentos",
     table_id: str = "unidades_saude_poligonos_datario",
+    layers: Optional[List[Dict[str, Any]]] = None,
+    force_refresh: bool = False,
+    state_bucket: str = "rj-iplanrio",
+    max_workers: int = 4,
+    page_workers: int = 4,
 ):
-    rename_flow_run = rename_current_flow_run_task(new_name=table_id)
+    """
+    Coleta camadas do ArcGIS em GeoParquet e sobe para o BigQuery.
+
+    Args:
+        url: URL da camada, usada quando `layers` não é informado
+        crs: CRS da camada, usado quando `layers` não é informado
+        dataset_id: Dataset padrão das camadas
+        table_id: Tabela da camada, usada quando `layers` não é informado
+        layers: Lista de camadas ({"url", "crs", "table_id"[, "dataset_id"]}) coletadas
+            na mesma execução
+        force_refresh: Coleta mesmo as camadas cujo lastEditDate não mudou
+        state_bucket: Bucket do estado com o lastEditDate de cada camada
+        max_workers: Camadas coletadas em paralelo
+        page_workers: Páginas baixadas em paralelo por camada
+    """
+    if layers is None:
+        layers = [{"url": url, "crs": crs, "table_id": table_id}]
+    state_blob = "state/rj_iplanrio__equipamentos_arcgis/arcgis.json"
+
+    rename_flow_run = rename_current_flow_run_task(
+        new_name=layers[0]["table_id"] if len(layers) == 1 else f"{len(layers)} camadas"
+    )
     crd = inject_bd_credentials_task(environment="prod", wait_for=[rename_flow_run])
-    path = download_data_from_arcgis_task(url=url, crs=crs, wait_for=[crd])
-    create_table_and_upload_to_gcs_task(
-        data_path=path,
-        dataset_id=dataset_id,
-        table_id=table_id,
-        dump_mode="overwrite",
-        biglake_table=True,
-        source_format="csv",
+    harvested, state, failures = harvest_arcgis_layers_task(
+        layers=layers,
+        state_bucket=state_bucket,
+        state_blob=state_blob,
+        output_dir="/tmp/rj_iplanrio__equipamentos_arcgis",
+        ignore_state=force_refresh,
+        max_workers=max_workers,
+        page_workers=page_workers,
+        wait_for=[crd],
     )
+    for layer in harvested:
+        create_table_and_upload_to_gcs_task(
+            data_path=layer["path"],
+            dataset_id=layer.get("dataset_id", dataset_id),
+            table_id=layer["table_id"],
+            dump_mode="overwrite",
+            biglake_table=True,
+            source_format="parquet",
+        )
+    save_arcgis_state_task(state=state, state_bucket=state_bucket, state_blob=state_blob)
+
+    # As camadas com falha são tentadas de novo na próxima execução, mas a atual falha
+    if failures:
+        raise RuntimeError(f"Falha na coleta de {len(failures)} camadas: {', '.join(failures)}")
@@ -3,7 +3,7 @@
 Flow para extração de dados da API SOAP do SICI e upload para BigQuery.
 
 Este flow busca dados de unidades administrativas do SICI via API SOAP,
-converte os dados de XML para CSV, e faz upload para o BigQuery.
+converte os dados de XML para Parquet, e faz upload para o BigQuery.
 """
 
 from prefect import flow
@@ -33,7 +33,7 @@ def rj_iplanrio__sici(
     1. Renomeia o flow run com o nome da tabela
     2. Injeta credenciais do BigQuery (Base dos Dados)
     3. Busca credenciais da API SICI no Infisical
-    4. Faz a chamada SOAP e obtém dados em CSV
+    4. Faz a chamada SOAP e obtém dados em Parquet
     5. Cria tabela no BigQuery e faz upload dos dados
 
     Args:
@@ -70,6 +70,7 @@ def rj_iplanrio__sici(
         table_id=table_id,
         dump_mode=dump_mode,
         biglake_table=biglake_table,
+        source_format="parquet",
     )
 
     logger.info("Flow concluído com sucesso!")
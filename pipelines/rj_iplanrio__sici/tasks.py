@@ -2,12 +2,35 @@
 """
 Tasks específicas para a pipeline SICI.
 """
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
 from prefect import task
 from prefect.logging import get_run_logger
 from zeep import Client
+from zeep.cache import SqliteCache
+from zeep.transports import Transport
 
 from iplanrio.pipelines_utils.env import getenv_or_action
-from pipelines.rj_iplanrio__sici.utils import xml_to_dataframe
+from pipelines.rj_iplanrio__sici.utils import parse_ua_tree, ua_tree_to_dataframe
+
+WSDL_CACHE_PATH = "/tmp/rj_iplanrio__sici/zeep_cache.db"
+WSDL_CACHE_TIMEOUT_SECONDS = 7 * 24 * 3600
+OUTPUT_PATH = "/tmp/rj_iplanrio__sici/data/sici_data.parquet"
+
+
+@lru_cache(maxsize=None)
+def get_soap_client(wsdl: str, cache_path: str = WSDL_CACHE_PATH) -> Client:
+    """
+    Cria (uma vez por processo) o cliente SOAP do SICI.
+
+    O WSDL e os XSDs importados ficam em um cache SQLite em disco, então execuções
+    seguintes no mesmo worker não baixam os documentos de novo.
+    """
+    Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+    transport = Transport(cache=SqliteCache(path=cache_path, timeout=WSDL_CACHE_TIMEOUT_SECONDS))
+    return Client(wsdl=wsdl, transport=transport)
 
 
 @task
@@ -51,14 +74,14 @@ def get_data_from_api_soap_sici(
     params: dict = None,
 ) -> str:
     """
-    Busca dados da API SOAP do SICI e salva em arquivo CSV.
+    Busca dados da API SOAP do SICI e salva em arquivo Parquet.
 
     Args:
         wsdl: URL do WSDL da API SOAP
         params: Dicionário com parâmetros para a chamada da API
 
     Returns:
-        Caminho do arquivo CSV gerado
+        Caminho do arquivo Parquet gerado
     """
     logger = get_run_logger()
 
@@ -72,23 +95,23 @@ def get_data_from_api_soap_sici(
         }
 
     try:
-        # Criar cliente SOAP
-        client = Client(wsdl=wsdl)
+        client = get_soap_client(wsdl)
 
-        # Chamar o serviço
-        response = client.service.Get_Arvore_UA(**params)
+        # Resposta bruta: o XML é lido em streaming em vez de virar uma árvore do zeep
+        with client.settings(raw_response=True):
+            response = client.service.Get_Arvore_UA(**params)
+        response.raise_for_status()
 
-        # Transformar em DataFrame
-        df = xml_to_dataframe(response)
+        df = ua_tree_to_dataframe(parse_ua_tree(BytesIO(response.content)))
 
         logger.info(f"Dados obtidos com sucesso da API SICI. Shape: {df.shape}")
         logger.info(f"Amostra dos dados: {df.head(5)}")
 
-        # Salvar o DataFrame em arquivo CSV
-        df.to_csv("sici_data.csv", index=False)
+        output_path = Path(OUTPUT_PATH)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(output_path, index=False)
 
-        # Retornar o caminho do arquivo CSV
-        return "sici_data.csv"
+        return str(output_path)
 
     except Exception as e:
         logger.error(f"Erro inesperado ao buscar dados da API SICI: {e}")
@@ -3,33 +3,76 @@
 Funções utilitárias para a pipeline SICI.
 """
 from datetime import datetime
+from typing import IO, Dict, List, Optional
 
 import pandas as pd
 import pytz
+from lxml import etree
 
+SOAP_RESULT_TAG = "Get_Arvore_UAResult"
 
-def xml_to_dataframe(xml: object) -> pd.DataFrame:
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_ua_tree(source: IO[bytes]) -> Dict[str, List[Optional[str]]]:
     """
-    Converte um objeto XML em um DataFrame do pandas.
+    Lê a resposta SOAP do SICI em streaming e devolve os dados em colunas.
+
+    A resposta tem o formato Get_Arvore_UAResult > raiz > linha > campo. O documento é
+    percorrido com iterparse e cada linha é descartada da árvore assim que seus valores
+    são copiados para as listas de colunas, então nem a árvore completa nem um dict por
+    linha ficam em memória.
+
+    As colunas são as tags dos campos da primeira linha; campos ausentes em uma linha
+    viram None e tags que não estão na primeira linha são ignoradas.
 
     Args:
-        xml: Objeto XML retornado pela API SOAP do SICI
+        source: Arquivo (ou buffer) com o envelope SOAP da resposta
 
     Returns:
-        DataFrame contendo os dados do XML com coluna updated_at adicionada
+        Dicionário coluna -> lista de valores
     """
-    # Parse the XML string
-    root = xml
+    columns: Optional[Dict[str, List[Optional[str]]]] = None
+    row_values: Dict[str, Optional[str]] = {}
+    result_depth = None
+    depth = 0
 
-    # Extract the data
-    data = []
-    columns = [element.tag for element in root[0]]
+    for event, element in etree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if result_depth is None and _local_name(element.tag) == SOAP_RESULT_TAG:
+                result_depth = depth
+            continue
 
-    for table in root:
-        row = {element.tag: element.text for element in table}
-        data.append(row)
+        if result_depth is not None:
+            relative_depth = depth - result_depth
+            if relative_depth == 3:
+                # Campo de uma linha
+                row_values[element.tag] = element.text
+            elif relative_depth == 2:
+                # Fim de uma linha
+                if columns is None:
+                    columns = {tag: [] for tag in row_values}
+                for tag, values in columns.items():
+                    values.append(row_values.get(tag))
+                row_values = {}
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+        depth -= 1
 
-    # Create the DataFrame
-    df = pd.DataFrame(data, columns=columns)
-    df["updated_at"] = datetime.now(pytz.timezone("America/Sao_Paulo"))
+    return columns or {}
+
+
+def ua_tree_to_dataframe(columns: Dict[str, List[Optional[str]]]) -> pd.DataFrame:
+    """
+    Monta o DataFrame a partir das colunas e adiciona a coluna updated_at.
+
+    updated_at é gravado como texto no mesmo formato que o CSV anterior usava, para não
+    mudar o tipo da coluna na tabela de staging.
+    """
+    df = pd.DataFrame(columns, dtype="string")
+    df["updated_at"] = datetime.now(pytz.timezone("America/Sao_Paulo")).isoformat(sep=" ")
     return df
@@ -27,6 +27,16 @@ class SisbichoImagesConstants(Enum):
     IMAGE_PREFIX = "raw/sisbicho/fotos"
     STORAGE_PROJECT = "rj-iplanrio"
 
+    # Paralelismo da decodificação/upload das fotos (threads e conexões HTTP por lote)
+    UPLOAD_MAX_WORKERS = 16
+
+    # Leitura dos QRCodes: pool de processos, redução de imagens grandes e cache por SHA-1
+    QRCODE_MAX_WORKERS = 4
+    QRCODE_POOL_MIN_IMAGES = 32
+    QRCODE_MAX_SIDE = 1280
+    QRCODE_CACHE_BLOB = "_cache/qrcode_payloads.json.gz"
+    QRCODE_CACHE_SAVE_INTERVAL_SECONDS = 600
+
     # Projeto de faturamento do BigQuery / Storage
     BILLING_PROJECT = "rj-iplanrio"
 
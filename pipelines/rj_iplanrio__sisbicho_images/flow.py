@@ -10,6 +10,7 @@ from prefect import flow
 from pipelines.rj_iplanrio__sisbicho_images.constants import SisbichoImagesConstants
 from pipelines.rj_iplanrio__sisbicho_images.tasks import (
     fetch_sisbicho_media_task,
+    load_qrcode_cache,
     process_single_batch,
 )
 from pipelines.rj_iplanrio__sisbicho_images.utils.tasks import create_date_partitions
@@ -30,6 +31,7 @@ def rj_iplanrio__sisbicho_images(
     credential_bucket: str | None = None,
     batch_size: int = 1000,
     max_records: int | None = None,
+    upload_max_workers: int | None = None,
 ):
     constants = SisbichoImagesConstants
 
@@ -43,6 +45,7 @@ def rj_iplanrio__sisbicho_images(
     billing_project_id = billing_project_id or constants.BILLING_PROJECT.value
     storage_project_id = storage_project_id or constants.STORAGE_PROJECT.value
     credential_bucket = credential_bucket or constants.CREDENTIAL_BUCKET.value
+    upload_max_workers = upload_max_workers or constants.UPLOAD_MAX_WORKERS.value
     source_dataset_id = source_dataset_id or constants.SOURCE_DATASET.value
     source_table_id = source_table_id or constants.SOURCE_TABLE.value
     materialize_after_dump = (
@@ -88,76 +91,89 @@ def rj_iplanrio__sisbicho_images(
     log(f"Processando {total_count} registros em lotes de {batch_size}")
     total_processed = 0
 
-    for offset in range(0, total_count, batch_size):
-        log(
-            f"Processando lote {offset // batch_size + 1} de {(total_count + batch_size - 1) // batch_size}"
-        )
+    qrcode_cache = load_qrcode_cache(
+        storage_bucket=storage_bucket,
+        storage_prefix=storage_prefix,
+        storage_project_id=storage_project_id,
+    )
 
-        batch_output = process_single_batch(
-            client=client,
-            source_table=source_table,
-            target_table=target_table,
-            identifier_field=identifier_field,
-            offset=offset,
-            batch_size=batch_size,
-            storage_bucket=storage_bucket,
-            storage_prefix=storage_prefix,
-            billing_project_id=billing_project_id,
-            storage_project_id=storage_project_id,
-        )
+    try:
+        for offset in range(0, total_count, batch_size):
+            log(
+                f"Processando lote {offset // batch_size + 1} de {(total_count + batch_size - 1) // batch_size}"
+            )
 
-        if not batch_output.empty:
-            partitions_path = create_date_partitions(
-                dataframe=batch_output,
-                partition_column=constants.PARTITION_COLUMN.value,
-                file_format=constants.FILE_FORMAT.value,
-                root_folder=constants.ROOT_FOLDER.value,
-                append_mode=True,
+            batch_output = process_single_batch(
+                client=client,
+                source_table=source_table,
+                target_table=target_table,
+                identifier_field=identifier_field,
+                offset=offset,
+                batch_size=batch_size,
+                storage_bucket=storage_bucket,
+                storage_prefix=storage_prefix,
+                billing_project_id=billing_project_id,
+                storage_project_id=storage_project_id,
+                upload_max_workers=upload_max_workers,
+                qrcode_cache=qrcode_cache,
             )
-            try:
-                create_table_and_upload_to_gcs_task(
-                    data_path=partitions_path,
-                    dataset_id=dataset_id_for_upload,
-                    table_id=table_id,
-                    dump_mode=dump_mode,
-                    source_format=constants.FILE_FORMAT.value,
-                    biglake_table=False,
+            # Persiste periodicamente para que falhas posteriores não descartem todo o cache
+            qrcode_cache.checkpoint(constants.QRCODE_CACHE_SAVE_INTERVAL_SECONDS.value)
+
+            if not batch_output.empty:
+                partitions_path = create_date_partitions(
+                    dataframe=batch_output,
+                    partition_column=constants.PARTITION_COLUMN.value,
+                    file_format=constants.FILE_FORMAT.value,
+                    root_folder=constants.ROOT_FOLDER.value,
+                    append_mode=True,
                 )
-            except Exception as exc:
-                error_msg = str(exc).lower()
-                # Detecta tabela vazia que causa erro no basedosdados
-                if (
-                    "cannot query hive partitioned data" in error_msg
-                    and "without any associated files" in error_msg
-                ):
-                    log(
-                        "[RECOVERY] Erro de tabela vazia detectado em create_table. Deletando tabela..."
+                try:
+                    create_table_and_upload_to_gcs_task(
+                        data_path=partitions_path,
+                        dataset_id=dataset_id_for_upload,
+                        table_id=table_id,
+                        dump_mode=dump_mode,
+                        source_format=constants.FILE_FORMAT.value,
+                        biglake_table=False,
                     )
-                    try:
-                        client.delete_table(target_table, not_found_ok=True)
+                except Exception as exc:
+                    error_msg = str(exc).lower()
+                    # Detecta tabela vazia que causa erro no basedosdados
+                    if (
+                        "cannot query hive partitioned data" in error_msg
+                        and "without any associated files" in error_msg
+                    ):
                         log(
-                            f"[RECOVERY] Tabela {target_table} deletada. Tentando criar novamente..."
-                        )
-                        create_table_and_upload_to_gcs_task(
-                            data_path=partitions_path,
-                            dataset_id=dataset_id_for_upload,
-                            table_id=table_id,
-                            dump_mode=dump_mode,
-                            source_format=constants.FILE_FORMAT.value,
-                            biglake_table=False,
+                            "[RECOVERY] Erro de tabela vazia detectado em create_table. Deletando tabela..."
                         )
-                        log("[RECOVERY] Tabela criada com sucesso após recovery.")
-                    except Exception as retry_exc:
-                        log(f"[ERRO] Falha no retry após deletar tabela: {retry_exc}")
+                        try:
+                            client.delete_table(target_table, not_found_ok=True)
+                            log(
+                                f"[RECOVERY] Tabela {target_table} deletada. Tentando criar novamente..."
+                            )
+                            create_table_and_upload_to_gcs_task(
+                                data_path=partitions_path,
+                                dataset_id=dataset_id_for_upload,
+                                table_id=table_id,
+                                dump_mode=dump_mode,
+                                source_format=constants.FILE_FORMAT.value,
+                                biglake_table=False,
+                            )
+                            log("[RECOVERY] Tabela criada com sucesso após recovery.")
+                        except Exception as retry_exc:
+                            log(f"[ERRO] Falha no retry após deletar tabela: {retry_exc}")
+                            raise
+                    else:
                         raise
-                else:
-                    raise
 
-            total_processed += len(batch_output)
+                total_processed += len(batch_output)
 
-            log(
-                f"Lote gravado no BigQuery. Total acumulado: {total_processed} registros."
-            )
+                log(
+                    f"Lote gravado no BigQuery. Total acumulado: {total_processed} registros."
+                )
+    finally:
+        qrcode_cache.save()
 
     if total_processed == 0:
         log("Após processamento não há dados para gravar. Fluxo encerrado.")
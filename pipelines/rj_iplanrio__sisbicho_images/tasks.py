@@ -5,18 +5,27 @@ from __future__ import annotations
 
 import hashlib
 import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Iterable
 
 import cv2
 import numpy as np
 import pandas as pd
 from basedosdados import Base
+from google.api_core.exceptions import PreconditionFailed
 from google.cloud import bigquery, storage
 from google.cloud.exceptions import NotFound
 from iplanrio.pipelines_utils.logging import log
 from prefect import task
+from requests.adapters import HTTPAdapter
 
+from pipelines.rj_iplanrio__sisbicho_images.constants import SisbichoImagesConstants
+from pipelines.rj_iplanrio__sisbicho_images.utils.qrcode_cache import QRCodePayloadCache
 from pipelines.rj_iplanrio__sisbicho_images.utils.tasks import (
     MAGIC_NUMBERS,
     PdfDetectedError,
@@ -24,6 +33,16 @@ from pipelines.rj_iplanrio__sisbicho_images.utils.tasks import (
 )
 
 
+@dataclass(frozen=True)
+class _DecodedImage:
+    """Foto decodificada e pronta para upload."""
+
+    blob_name: str
+    image_bytes: bytes
+    digest: str
+    content_type: str
+
+
 def _ensure_staging_dataset(dataset_id: str) -> str:
     """Garante que o dataset termine com _staging."""
 
@@ -123,17 +142,38 @@ def _sanitize_identifier(identifier: object) -> str:
     return "".join(ch if ch.isalnum() or ch in {"-", "_"} else "_" for ch in text)
 
 
+_QRCODE_DETECTOR: cv2.QRCodeDetector | None = None
+
+
+def _get_qrcode_detector() -> cv2.QRCodeDetector:
+    """Detector reaproveitado por processo (um por worker do pool)."""
+
+    global _QRCODE_DETECTOR  # noqa: PLW0603
+    if _QRCODE_DETECTOR is None:
+        _QRCODE_DETECTOR = cv2.QRCodeDetector()
+    return _QRCODE_DETECTOR
+
+
 def _decode_qrcode_bytes(image_bytes: bytes) -> str | None:
     """Lê o conteúdo textual presente em um QR Code representado como imagem."""
 
     array = np.frombuffer(image_bytes, dtype=np.uint8)
     image = cv2.imdecode(array, cv2.IMREAD_GRAYSCALE)
     if image is None:
-        log("[ERRO] Não foi possível decodificar bytes do QR Code em imagem.")
         return None
 
-    detector = cv2.QRCodeDetector()
-    payload, _, _ = detector.detectAndDecode(image)
+    # Fotos de celular chegam com vários megapixels; o detector não precisa disso
+    max_side = SisbichoImagesConstants.QRCODE_MAX_SIDE.value
+    height, width = image.shape[:2]
+    if max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        image = cv2.resize(
+            image,
+            (max(1, int(width * scale)), max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    payload, _, _ = _get_qrcode_detector().detectAndDecode(image)
     if not payload:
         return None
 
@@ -193,7 +233,9 @@ def _normalize_qrcode_payload(text: str) -> str | None:
     return cleaned
 
 
-def _extract_qrcode_payload(value: str) -> str | None:
+def _decode_qrcode_image_bytes(value: object) -> bytes | None:
+    """Converte o valor Base64 da coluna qrcode_dados nos bytes da imagem."""
+
     if value is None:
         return None
 
@@ -206,7 +248,7 @@ def _extract_qrcode_payload(value: str) -> str | None:
         return None
 
     try:
-        image_bytes = detect_and_decode(cleaned)
+        return detect_and_decode(cleaned)
     except PdfDetectedError:
         log("[QRCode] PDF detectado - registro ignorado")
         return None
@@ -214,6 +256,10 @@ def _extract_qrcode_payload(value: str) -> str | None:
         log(f"[QRCode] Falha ao decodificar: {exc}")
         return None
 
+
+def _qrcode_payload_from_bytes(image_bytes: bytes) -> str | None:
+    """Lê e normaliza o payload a partir dos bytes da imagem. Roda nos workers do pool."""
+
     payload = _decode_qrcode_bytes(image_bytes)
     if payload:
         normalized_payload = _normalize_qrcode_payload(payload)
@@ -233,6 +279,27 @@ def _extract_qrcode_payload(value: str) -> str | None:
     return None
 
 
+def _extract_qrcode_payload(value: str) -> str | None:
+    image_bytes = _decode_qrcode_image_bytes(value)
+    if image_bytes is None:
+        return None
+    return _qrcode_payload_from_bytes(image_bytes)
+
+
+def load_qrcode_cache(
+    storage_bucket: str,
+    storage_prefix: str,
+    storage_project_id: str,
+) -> QRCodePayloadCache:
+    """Carrega o cache de payloads de QR Code guardado junto às fotos no GCS."""
+
+    storage_client = _get_storage_client(storage_project_id, SisbichoImagesConstants.UPLOAD_MAX_WORKERS.value)
+    return QRCodePayloadCache.load(
+        bucket=storage_client.bucket(storage_bucket),
+        blob_name=f"{storage_prefix}/{SisbichoImagesConstants.QRCODE_CACHE_BLOB.value}",
+    )
+
+
 def _infer_extension(image_bytes: bytes) -> str:
     for magic, extension in MAGIC_NUMBERS.items():
         if image_bytes.startswith(magic):
@@ -484,13 +551,7 @@ def fetch_batch(
 def extract_qrcode_payload_task(dataframe: pd.DataFrame) -> pd.DataFrame:
     """Cria coluna com o payload do QRCode a partir da coluna codificada."""
 
-    if dataframe.empty:
-        return dataframe.assign(qrcode_payload=pd.Series(dtype="string"))
-
-    df = dataframe.copy()
-    df["qrcode_payload"] = df["qrcode_dados"].apply(_extract_qrcode_payload)
-
-    return df
+    return _extract_qrcode_payload_batch(dataframe)
 
 
 @task
@@ -499,78 +560,17 @@ def upload_pet_images_task(
     storage_bucket: str,
     storage_prefix: str,
     storage_project_id: str,
+    max_workers: int = SisbichoImagesConstants.UPLOAD_MAX_WORKERS.value,
 ) -> pd.DataFrame:
     """Faz o upload das imagens dos pets para o GCS e retorna a URL final."""
 
-    if dataframe.empty:
-        return dataframe.assign(foto_url=pd.Series(dtype="string"), foto_blob_path=pd.Series(dtype="string"))
-
-    storage_client = storage.Client(project=storage_project_id)
-    bucket = storage_client.bucket(storage_bucket)
-
-    foto_urls: list[str | None] = []
-    blob_paths: list[str | None] = []
-    uploaded_count = 0
-    skipped_count = 0
-    pdf_count = 0
-
-    for _, row in dataframe.iterrows():
-        raw_value = row.get("foto_dados")
-        identifier = row.get("animal_identifier")
-        safe_identifier = _sanitize_identifier(identifier)
-
-        if raw_value is None or str(raw_value).strip() == "":
-            foto_urls.append(None)
-            blob_paths.append(None)
-            continue
-
-        raw_text = _coerce_to_base64_text(raw_value)
-        cleaned = _strip_data_uri_prefix(raw_text)
-
-        try:
-            image_bytes = detect_and_decode(cleaned)
-        except PdfDetectedError:
-            log(f"[Foto] PDF detectado para animal {identifier} - registro ignorado")
-            foto_urls.append(None)
-            blob_paths.append(None)
-            pdf_count += 1
-            continue
-        except ValueError as exc:
-            log(f"[ERRO] Falha ao decodificar Base64 do animal {identifier}: {exc}")
-            raise ValueError(
-                f"Decode de Base64 falhou para animal {identifier}. "
-                f"Batch abortado para evitar transferência de dados incompletos."
-            ) from exc
-
-        extension = _infer_extension(image_bytes)
-        content_type = _extension_to_content_type(extension)
-        digest = hashlib.sha1(image_bytes).hexdigest()
-        blob_name = f"{storage_prefix}/animal_id={safe_identifier}/{digest}.{extension}"
-        blob = bucket.blob(blob_name)
-
-        try:
-            exists = blob.exists(storage_client)
-        except NotFound:
-            exists = False
-
-        if not exists:
-            blob.upload_from_string(image_bytes, content_type=content_type)
-            blob.metadata = {"sha1": digest}
-            blob.patch()
-            uploaded_count += 1
-        else:
-            skipped_count += 1
-
-        public_url = f"https://storage.googleapis.com/{storage_bucket}/{blob_name}"
-        foto_urls.append(public_url)
-        blob_paths.append(blob_name)
-
-    log(f"[Upload] {uploaded_count} imagens enviadas, {skipped_count} já existiam, {pdf_count} PDFs ignorados")
-
-    df = dataframe.copy()
-    df["foto_url"] = foto_urls
-    df["foto_blob_path"] = blob_paths
-    return df
+    return _upload_batch_images(
+        dataframe,
+        storage_bucket,
+        storage_prefix,
+        storage_project_id,
+        max_workers=max_workers,
+    )
 
 
 @task
@@ -609,6 +609,8 @@ def process_single_batch(
     storage_prefix: str,
     billing_project_id: str,
     storage_project_id: str,
+    upload_max_workers: int = SisbichoImagesConstants.UPLOAD_MAX_WORKERS.value,
+    qrcode_cache: QRCodePayloadCache | None = None,
 ) -> pd.DataFrame:
     """
     Processa um único lote: busca dados, extrai QR code, faz upload de imagens.
@@ -623,7 +625,7 @@ def process_single_batch(
         return pd.DataFrame()
 
     # Extract QR code payload
-    batch_df = _extract_qrcode_payload_batch(batch_df)
+    batch_df = _extract_qrcode_payload_batch(batch_df, qrcode_cache=qrcode_cache)
 
     # Upload images
     batch_df = _upload_batch_images(
@@ -631,6 +633,7 @@ def process_single_batch(
         storage_bucket,
         storage_prefix,
         storage_project_id,
+        max_workers=upload_max_workers,
     )
 
     # Build output
@@ -639,91 +642,218 @@ def process_single_batch(
     return output_df
 
 
-def _extract_qrcode_payload_batch(dataframe: pd.DataFrame) -> pd.DataFrame:
-    """Versão sem @task para processar QR codes em lote."""
+def _extract_qrcode_payload_batch(
+    dataframe: pd.DataFrame,
+    qrcode_cache: QRCodePayloadCache | None = None,
+    max_workers: int = SisbichoImagesConstants.QRCODE_MAX_WORKERS.value,
+) -> pd.DataFrame:
+    """
+    Extrai os payloads de QR Code do lote.
+
+    O Base64 é decodificado no processo principal para obter o SHA-1 da imagem; imagens
+    já vistas saem do cache e apenas as novas são enviadas ao pool de processos.
+    """
     if dataframe.empty:
         return dataframe.assign(qrcode_payload=pd.Series(dtype="string"))
 
+    qrcode_cache = qrcode_cache if qrcode_cache is not None else QRCodePayloadCache()
+
+    digests: list[str | None] = []
+    pending: dict[str, bytes] = {}
+    for value in dataframe["qrcode_dados"].tolist():
+        image_bytes = _decode_qrcode_image_bytes(value)
+        if image_bytes is None:
+            digests.append(None)
+            continue
+        digest = hashlib.sha1(image_bytes).hexdigest()
+        digests.append(digest)
+        if digest not in qrcode_cache:
+            pending[digest] = image_bytes
+
+    if len(pending) >= SisbichoImagesConstants.QRCODE_POOL_MIN_IMAGES.value:
+        # spawn: o processo do flow tem várias threads (Prefect, pools de upload) e um
+        # fork dele pode travar nos filhos. Cada worker cria seu próprio detector.
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_get_qrcode_detector,
+        ) as pool:
+            payloads = list(pool.map(_qrcode_payload_from_bytes, pending.values(), chunksize=16))
+    else:
+        payloads = map(_qrcode_payload_from_bytes, pending.values())
+
+    for digest, payload in zip(pending.keys(), payloads):
+        qrcode_cache.put(digest, payload)
+
+    hits = sum(1 for digest in digests if digest is not None) - len(pending)
+    log(f"[QRCode] {len(pending)} imagens decodificadas, {hits} vindas do cache")
+
     df = dataframe.copy()
-    df["qrcode_payload"] = df["qrcode_dados"].apply(_extract_qrcode_payload)
+    df["qrcode_payload"] = [qrcode_cache[digest] if digest is not None else None for digest in digests]
     return df
 
 
+def _has_image_value(raw_value: object) -> bool:
+    return raw_value is not None and str(raw_value).strip() != ""
+
+
+def _decode_pet_image(raw_value: object, identifier: object, storage_prefix: str) -> _DecodedImage | None:
+    """Decodifica a foto de um animal e monta o caminho do blob. Retorna None para PDFs."""
+
+    raw_text = _coerce_to_base64_text(raw_value)
+    cleaned = _strip_data_uri_prefix(raw_text)
+
+    try:
+        image_bytes = detect_and_decode(cleaned)
+    except PdfDetectedError:
+        log(f"[Foto] PDF detectado para animal {identifier} - registro ignorado")
+        return None
+    except ValueError as exc:
+        log(f"[ERRO] Falha ao decodificar Base64 do animal {identifier}: {exc}")
+        raise ValueError(
+            f"Decode de Base64 falhou para animal {identifier}. "
+            f"Batch abortado para evitar transferência de dados incompletos."
+        ) from exc
+
+    extension = _infer_extension(image_bytes)
+    digest = hashlib.sha1(image_bytes).hexdigest()
+    return _DecodedImage(
+        blob_name=f"{_animal_blob_prefix(storage_prefix, identifier)}{digest}.{extension}",
+        image_bytes=image_bytes,
+        digest=digest,
+        content_type=_extension_to_content_type(extension),
+    )
+
+
+def _animal_blob_prefix(storage_prefix: str, identifier: object) -> str:
+    return f"{storage_prefix}/animal_id={_sanitize_identifier(identifier)}/"
+
+
+@lru_cache(maxsize=None)
+def _get_storage_client(storage_project_id: str, max_workers: int) -> storage.Client:
+    """Cliente do GCS compartilhado entre lotes, com pool HTTP do tamanho dos uploads paralelos."""
+
+    storage_client = storage.Client(project=storage_project_id)
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    storage_client._http.mount("https://", adapter)
+    return storage_client
+
+
+def _list_prefix_blob_names(bucket: storage.Bucket, animal_prefix: str) -> list[str]:
+    blobs = bucket.list_blobs(prefix=animal_prefix, fields="items(name),nextPageToken")
+    return [blob.name for blob in blobs]
+
+
+def _list_existing_blob_names(
+    bucket: storage.Bucket,
+    animal_prefixes: Iterable[str],
+    executor: ThreadPoolExecutor,
+) -> set[str]:
+    """
+    Lista os blobs já presentes nos prefixos animal_id= do lote.
+
+    Cada prefixo é listado separadamente (em geral uma única página, com poucos blobs),
+    em paralelo no executor do lote: o custo acompanha o tamanho do lote, e não o total
+    de fotos no bucket, já que os ids de um lote se espalham por todo o espaço de chaves.
+    """
+
+    futures = [
+        executor.submit(_list_prefix_blob_names, bucket, animal_prefix) for animal_prefix in set(animal_prefixes)
+    ]
+    return {name for future in futures for name in future.result()}
+
+
+def _upload_pet_image(bucket: storage.Bucket, image: _DecodedImage) -> bool:
+    """Envia a imagem com metadados na mesma requisição. Retorna False se o blob já existia."""
+
+    blob = bucket.blob(image.blob_name)
+    blob.metadata = {"sha1": image.digest}
+    try:
+        blob.upload_from_string(
+            image.image_bytes,
+            content_type=image.content_type,
+            if_generation_match=0,
+        )
+    except PreconditionFailed:
+        return False
+    return True
+
+
 def _upload_batch_images(
     dataframe: pd.DataFrame,
     storage_bucket: str,
     storage_prefix: str,
     storage_project_id: str,
+    max_workers: int = SisbichoImagesConstants.UPLOAD_MAX_WORKERS.value,
 ) -> pd.DataFrame:
-    """Versão sem @task para upload de imagens em lote."""
+    """
+    Decodifica e envia as imagens do lote para o GCS em paralelo.
+
+    A decodificação roda em um pool de threads, a existência dos blobs é verificada
+    listando os prefixos animal_id= do lote e os uploads (já com metadados) são feitos
+    concorrentemente sobre um cliente compartilhado.
+    """
     if dataframe.empty:
         return dataframe.assign(foto_url=pd.Series(dtype="string"), foto_blob_path=pd.Series(dtype="string"))
 
-    storage_client = storage.Client(project=storage_project_id)
+    started_at = time.monotonic()
+    storage_client = _get_storage_client(storage_project_id, max_workers)
     bucket = storage_client.bucket(storage_bucket)
 
-    foto_urls: list[str | None] = []
-    blob_paths: list[str | None] = []
-    uploaded_count = 0
-    skipped_count = 0
-    pdf_count = 0
+    raw_values = dataframe["foto_dados"].tolist()
+    identifiers = dataframe["animal_identifier"].tolist()
 
-    for _, row in dataframe.iterrows():
-        raw_value = row.get("foto_dados")
-        identifier = row.get("animal_identifier")
-        safe_identifier = _sanitize_identifier(identifier)
-
-        if raw_value is None or str(raw_value).strip() == "":
-            foto_urls.append(None)
-            blob_paths.append(None)
-            continue
-
-        raw_text = _coerce_to_base64_text(raw_value)
-        cleaned = _strip_data_uri_prefix(raw_text)
-
-        try:
-            image_bytes = detect_and_decode(cleaned)
-        except PdfDetectedError:
-            log(f"[Foto] PDF detectado para animal {identifier} - registro ignorado")
-            foto_urls.append(None)
-            blob_paths.append(None)
-            pdf_count += 1
-            continue
-        except ValueError as exc:
-            log(f"[ERRO] Falha ao decodificar Base64 do animal {identifier}: {exc}")
-            raise ValueError(
-                f"Decode de Base64 falhou para animal {identifier}. "
-                f"Batch abortado para evitar transferência de dados incompletos."
-            ) from exc
-
-        extension = _infer_extension(image_bytes)
-        content_type = _extension_to_content_type(extension)
-        digest = hashlib.sha1(image_bytes).hexdigest()
-        blob_name = f"{storage_prefix}/animal_id={safe_identifier}/{digest}.{extension}"
-        blob = bucket.blob(blob_name)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_decode_pet_image, raw_value, identifier, storage_prefix)
+            if _has_image_value(raw_value)
+            else None
+            for raw_value, identifier in zip(raw_values, identifiers)
+        ]
+        decoded = [future.result() if future is not None else None for future in futures]
 
-        try:
-            exists = blob.exists(storage_client)
-        except NotFound:
-            exists = False
-
-        if not exists:
-            blob.upload_from_string(image_bytes, content_type=content_type)
-            blob.metadata = {"sha1": digest}
-            blob.patch()
-            uploaded_count += 1
-        else:
-            skipped_count += 1
+        pdf_count = sum(
+            1 for future, image in zip(futures, decoded) if future is not None and image is None
+        )
 
-        public_url = f"https://storage.googleapis.com/{storage_bucket}/{blob_name}"
-        foto_urls.append(public_url)
-        blob_paths.append(blob_name)
+        animal_prefixes = [
+            _animal_blob_prefix(storage_prefix, identifier)
+            for identifier, image in zip(identifiers, decoded)
+            if image is not None
+        ]
+        existing = _list_existing_blob_names(bucket, animal_prefixes, executor)
+
+        pending = {
+            image.blob_name: image
+            for image in decoded
+            if image is not None and image.blob_name not in existing
+        }
+        upload_futures = {
+            executor.submit(_upload_pet_image, bucket, image): image for image in pending.values()
+        }
+
+        uploaded_count = 0
+        uploaded_bytes = 0
+        for future in as_completed(upload_futures):
+            if future.result():
+                uploaded_count += 1
+                uploaded_bytes += len(upload_futures[future].image_bytes)
+
+    skipped_count = sum(1 for image in decoded if image is not None) - uploaded_count
+    elapsed = max(time.monotonic() - started_at, 1e-9)
 
     log(f"[Upload] {uploaded_count} imagens enviadas, {skipped_count} já existiam, {pdf_count} PDFs ignorados")
+    log(
+        f"[Upload] Vazão: {uploaded_count / elapsed:.1f} imagens/s, "
+        f"{uploaded_bytes / elapsed / 1024**2:.2f} MB/s ({elapsed:.1f}s)"
+    )
 
     df = dataframe.copy()
-    df["foto_url"] = foto_urls
-    df["foto_blob_path"] = blob_paths
+    df["foto_url"] = [
+        f"https://storage.googleapis.com/{storage_bucket}/{image.blob_name}" if image is not None else None
+        for image in decoded
+    ]
+    df["foto_blob_path"] = [image.blob_name if image is not None else None for image in decoded]
     return df
 
 
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Cache persistente dos payloads de QR Code do SISBICHO."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import time
+
+from google.cloud import storage
+from google.cloud.exceptions import NotFound
+from iplanrio.pipelines_utils.logging import log
+
+
+class QRCodePayloadCache:
+    """
+    Payloads de QR Code já decodificados, indexados pelo SHA-1 dos bytes da imagem.
+
+    O cache é carregado uma vez por execução a partir de um JSON gzipado no GCS e
+    regravado periodicamente (`checkpoint`) e ao final, de modo que recargas da tabela
+    de origem com as mesmas imagens não passem novamente pelo detector. Imagens sem QR
+    Code legível também são guardadas (payload None), já que o resultado é determinístico.
+    """
+
+    def __init__(
+        self,
+        entries: dict[str, str | None] | None = None,
+        bucket: storage.Bucket | None = None,
+        blob_name: str | None = None,
+    ):
+        self._entries: dict[str, str | None] = entries or {}
+        self._bucket = bucket
+        self._blob_name = blob_name
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, bucket: storage.Bucket, blob_name: str) -> QRCodePayloadCache:
+        """Carrega o cache salvo no GCS; começa vazio se o blob não existir ou estiver inválido."""
+
+        entries: dict[str, str | None] = {}
+        try:
+            raw = bucket.blob(blob_name).download_as_bytes()
+            entries = json.loads(gzip.decompress(raw))
+        except NotFound:
+            log(f"[QRCode] Cache {blob_name} não encontrado. Iniciando cache vazio.")
+        except (OSError, ValueError) as exc:
+            log(f"[QRCode] Cache {blob_name} inválido ({exc}). Iniciando cache vazio.")
+
+        log(f"[QRCode] Cache carregado com {len(entries)} entradas")
+        return cls(entries=entries, bucket=bucket, blob_name=blob_name)
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def __getitem__(self, digest: str) -> str | None:
+        return self._entries[digest]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, digest: str, payload: str | None) -> None:
+        self._entries[digest] = payload
+        self._dirty = True
+
+    def save(self) -> None:
+        """Regrava o cache no GCS caso haja entradas novas."""
+
+        if not self._dirty or self._bucket is None or self._blob_name is None:
+            return
+
+        data = gzip.compress(json.dumps(self._entries, ensure_ascii=False).encode("utf-8"))
+        self._bucket.blob(self._blob_name).upload_from_string(data, content_type="application/gzip")
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        log(f"[QRCode] Cache salvo com {len(self._entries)} entradas em {self._blob_name}")
+
+    def checkpoint(self, min_interval_seconds: float) -> None:
+        """
+        Regrava o cache se a última gravação foi há pelo menos min_interval_seconds.
+
+        Cada gravação reserializa o cache inteiro; o intervalo limita esse custo a algumas
+        gravações por execução, mesmo em cargas grandes.
+        """
+
+        if time.monotonic() - self._saved_at >= min_interval_seconds:
+            self.save()
@@ -11,13 +11,13 @@ from typing import Optional
 
 from iplanrio.pipelines_templates.dump_db.tasks import (
     dump_upload_batch_task,
-    format_partitioned_query_task,
     get_database_username_and_password_from_secret_task,
     parse_comma_separated_string_to_list_task,
 )
 from iplanrio.pipelines_utils.env import inject_bd_credentials_task
 from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow
+from prefect_rj_iplanrio.dump_db import format_range_partitioned_query_task
 
 
 @flow(log_prints=True)
@@ -44,6 +44,8 @@ def rj_pgm__divida_ativa(
     biglake_table: bool = True,
     log_number_of_batches: int = 100,
     max_concurrency: int = 1,
+    range_column: Optional[str] = None,
+    range_count: int = 8,
     only_staging_dataset: bool = False,
     add_timestamp_column: bool = True,
 ):
@@ -101,6 +103,9 @@ def rj_pgm__divida_ativa(
         log_number_of_batches: Intervalo de batches para logging de progresso.
             Default: 100
         max_concurrency: Número máximo de uploads concorrentes.
+        range_column: Coluna numérica (ex.: chave primária) ou de data usada para dividir
+            a query em faixas extraídas em paralelo. None mantém a query única
+        range_count: Número de faixas (e de conexões simultâneas) quando range_column é informado
             Default: 1
         only_staging_dataset: Se True, carrega apenas no dataset de staging (não em produção).
             Default: False
@@ -127,7 +132,7 @@ def rj_pgm__divida_ativa(
     secrets = get_database_username_and_password_from_secret_task(infisical_secret_path=infisical_secret_path)
     partition_columns_list = parse_comma_separated_string_to_list_task(text=partition_columns)
 
-    formated_query = format_partitioned_query_task(
+    formated_query = format_range_partitioned_query_task(
         query=execute_query,
         dataset_id=dataset_id,
         table_id=table_id,
@@ -138,6 +143,13 @@ def rj_pgm__divida_ativa(
         break_query_start=break_query_start,
         break_query_end=break_query_end,
         break_query_frequency=break_query_frequency,
+        range_column=range_column,
+        range_count=range_count,
+        hostname=db_host,
+        port=db_port,
+        user=secrets["DB_USERNAME"],
+        password=secrets["DB_PASSWORD"],
+        database=db_database,
     )
 
     dump_upload_batch_task(
@@ -158,7 +170,7 @@ def rj_pgm__divida_ativa(
         password=secrets["DB_PASSWORD"],
         database=db_database,
         charset=db_charset,
-        max_concurrency=max_concurrency,
+        max_concurrency=max(max_concurrency, range_count) if range_column else max_concurrency,
         only_staging_dataset=only_staging_dataset,
         add_timestamp_column=add_timestamp_column,
     )
@@ -7,13 +7,17 @@ from typing import Optional
 
 from iplanrio.pipelines_templates.dump_db.tasks import (
     dump_upload_batch_task,
-    format_partitioned_query_task,
     get_database_username_and_password_from_secret_task,
     parse_comma_separated_string_to_list_task,
 )
 from iplanrio.pipelines_utils.env import inject_bd_credentials_task
 from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow
+from prefect_rj_iplanrio.dump_db import (
+    format_range_partitioned_query_task,
+    merge_incremental_dump_task,
+    plan_incremental_dump_task,
+)
 
 
 @flow(log_prints=True)
@@ -40,6 +44,14 @@ def rj_segovi__dump_db_1746(  # noqa
     biglake_table: bool = True,
     log_number_of_batches: int = 100,
     max_concurrency: int = 1,
+    range_column: Optional[str] = None,
+    range_count: int = 8,
+    incremental_column: Optional[str] = None,
+    merge_keys: Optional[str] = None,
+    full_refresh_interval_days: int = 7,
+    force_full_refresh: bool = False,
+    state_bucket: str = "rj-iplanrio",
+    bigquery_project: str = "rj-iplanrio",
     only_staging_dataset: bool = True,
 ):
     rename_current_flow_run_task(new_name=table_id)
@@ -51,37 +63,82 @@ def rj_segovi__dump_db_1746(  # noqa
         text=partition_columns
     )
 
-    formated_query = format_partitioned_query_task(
-        query=execute_query,
-        dataset_id=dataset_id,
-        table_id=table_id,
-        database_type=db_type,
-        partition_columns=partition_columns_list,
-        lower_bound_date=lower_bound_date,
-        date_format=partition_date_format,
-        break_query_start=break_query_start,
-        break_query_end=break_query_end,
-        break_query_frequency=break_query_frequency,
-    )
+    extract_query = execute_query
+    dump_table_id = table_id
+    state_blob = f"state/rj_segovi__dump_db_1746/{table_id}.json"
+    plan = None
+    if incremental_column:
+        plan = plan_incremental_dump_task(
+            query=execute_query,
+            table_id=table_id,
+            database_type=db_type,
+            incremental_column=incremental_column,
+            state_bucket=state_bucket,
+            state_blob=state_blob,
+            full_refresh_interval_days=full_refresh_interval_days,
+            force_full_refresh=force_full_refresh,
+            hostname=db_host,
+            port=db_port,
+            user=secrets["DB_USERNAME"],
+            password=secrets["DB_PASSWORD"],
+            database=db_database,
+        )
+        extract_query = plan["query"]
+        dump_table_id = plan["table_id"]
+        # No modo incremental o destino final é a tabela nativa atualizada pelo MERGE
+        dump_mode = "overwrite"
+        only_staging_dataset = True
 
-    dump_upload = dump_upload_batch_task(  # noqa
-        queries=formated_query,
-        batch_size=batch_size,
-        dataset_id=dataset_id,
-        table_id=table_id,
-        dump_mode=dump_mode,
-        partition_columns=partition_columns_list,
-        batch_data_type=batch_data_type,
-        biglake_table=biglake_table,
-        log_number_of_batches=log_number_of_batches,
-        retry_dump_upload_attempts=retry_dump_upload_attempts,
-        database_type=db_type,
-        hostname=db_host,
-        port=db_port,
-        user=secrets["DB_USERNAME"],
-        password=secrets["DB_PASSWORD"],
-        database=db_database,
-        charset=db_charset,
-        max_concurrency=max_concurrency,
-        only_staging_dataset=only_staging_dataset,
-    )
+    if plan is None or plan["rows"] != 0:
+        formated_query = format_range_partitioned_query_task(
+            query=extract_query,
+            dataset_id=dataset_id,
+            table_id=dump_table_id,
+            database_type=db_type,
+            partition_columns=partition_columns_list,
+            lower_bound_date=lower_bound_date,
+            date_format=partition_date_format,
+            break_query_start=break_query_start,
+            break_query_end=break_query_end,
+            break_query_frequency=break_query_frequency,
+            range_column=range_column,
+            range_count=range_count,
+            hostname=db_host,
+            port=db_port,
+            user=secrets["DB_USERNAME"],
+            password=secrets["DB_PASSWORD"],
+            database=db_database,
+        )
+
+        dump_upload = dump_upload_batch_task(  # noqa
+            queries=formated_query,
+            batch_size=batch_size,
+            dataset_id=dataset_id,
+            table_id=dump_table_id,
+            dump_mode=dump_mode,
+            partition_columns=partition_columns_list,
+            batch_data_type=batch_data_type,
+            biglake_table=biglake_table,
+            log_number_of_batches=log_number_of_batches,
+            retry_dump_upload_attempts=retry_dump_upload_attempts,
+            database_type=db_type,
+            hostname=db_host,
+            port=db_port,
+            user=secrets["DB_USERNAME"],
+            password=secrets["DB_PASSWORD"],
+            database=db_database,
+            charset=db_charset,
+            max_concurrency=max(max_concurrency, range_count) if range_column else max_concurrency,
+            only_staging_dataset=only_staging_dataset,
+        )
+
+    if plan is not None:
+        merge_incremental_dump_task(
+            plan=plan,
+            dataset_id=dataset_id,
+            table_id=table_id,
+            merge_keys=parse_comma_separated_string_to_list_task(text=merge_keys),
+            bigquery_project=bigquery_project,
+            state_bucket=state_bucket,
+            state_blob=state_blob,
+        )
@@ -317,6 +317,8 @@ _1746_queries = [
         "table_id": "pessoa",
         "dataset_id": "brutos_1746",
         "dump_mode": "overwrite",
+        "incremental_column": "COALESCE(dt_atualizacao, dt_insercao)",
+        "merge_keys": "id_pessoa",
         "execute_query": """
             select
                 id_pessoa,
@@ -1,9 +1,10 @@
-from typing import TypedDict
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
-import gspread
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
-from iplanrio.pipelines_templates.dump_url.flows import dump_url_flow
+from iplanrio.pipelines_utils.bd import create_table_and_upload_to_gcs
 from iplanrio.pipelines_utils.env import (
     get_credentials_from_env,
     inject_bd_credentials_task,
@@ -12,30 +13,22 @@ from iplanrio.pipelines_utils.logging import log
 from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow, task
 
+from prefect_rj_iplanrio.state import load_state, save_state
+
 from .utils import (
+    build_a1_range,
     build_drive_query,
     build_spreadsheet_url,
     extract_year_from_filename,
     get_base_table_name,
     get_google_api_scopes,
     get_worksheet_ranges_config,
+    hash_worksheet_ranges_config,
     normalize_to_bigquery_table_name,
+    values_to_dataframe,
 )
 
-
-class ExtractionJob(TypedDict):
-    """Represents a single extraction job from Google Sheets to BigQuery."""
-
-    spreadsheet_url: str
-    spreadsheet_name: str
-    spreadsheet_year: str
-    worksheet_index: int
-    worksheet_title: str
-    cell_range: str
-    table_suffix: str | None
-    dataset_id: str
-    dump_mode: str
-    biglake_table: bool
+OUTPUT_ROOT = "/tmp/rj_setur__turismo_fluxo_visitantes"
 
 
 @task
@@ -53,7 +46,7 @@ def list_spreadsheets_in_folder(
     """List all spreadsheets in a Google Drive folder matching a pattern."""
     service = build("drive", "v3", credentials=credentials)
     query = build_drive_query(folder_id)
-    results = service.files().list(q=query, fields="files(id, name)").execute()
+    results = service.files().list(q=query, fields="files(id, name, modifiedTime)").execute()
     files = results.get("files", [])
 
     spreadsheets = [
@@ -62,6 +55,7 @@ def list_spreadsheets_in_folder(
             "id": file["id"],
             "url": build_spreadsheet_url(file["id"]),
             "year": extract_year_from_filename(file["name"]),
+            "modified_time": file.get("modifiedTime"),
         }
         for file in files
         if name_pattern in file["name"]
@@ -70,58 +64,119 @@ def list_spreadsheets_in_folder(
     log(f"Found {len(spreadsheets)} spreadsheets matching pattern '{name_pattern}'")
 
     for sheet in spreadsheets:
-        log(f"  - {sheet['name']} (Year: {sheet['year']})")
+        log(f"  - {sheet['name']} (Year: {sheet['year']}, modified: {sheet['modified_time']})")
 
     return spreadsheets
 
 
-@task
-def get_worksheet_info(spreadsheet_url: str, credentials) -> list[dict[str, str | int]]:
-    """Get information about all worksheets in a spreadsheet."""
-    gspread_client = gspread.authorize(credentials)
-    sheet = gspread_client.open_by_url(spreadsheet_url)
-    worksheets = [{"title": worksheet.title, "index": idx} for idx, worksheet in enumerate(sheet.worksheets())]
-
-    log(f"Found {len(worksheets)} worksheets in spreadsheet")
+def extract_spreadsheet_to_bigquery(
+    spreadsheet: dict[str, str],
+    credentials,
+    worksheet_ranges_config: dict[str, list[tuple[str, str | None]]],
+    dataset_id: str,
+    dump_mode: str,
+    biglake_table: bool = False,
+) -> list[str]:
+    """
+    Extract every configured range of one spreadsheet and upload each one to BigQuery.
+
+    The worksheet titles come from a metadata-only spreadsheets.get and all configured
+    ranges of the worksheets that exist are read with a single values.batchGet.
+
+    Returns:
+        The table ids uploaded
+    """
+    # googleapiclient services are not thread-safe: one per spreadsheet
+    sheets = build("sheets", "v4", credentials=credentials, cache_discovery=False).spreadsheets()
+
+    metadata = sheets.get(spreadsheetId=spreadsheet["id"], fields="sheets.properties.title").execute()
+    titles = [worksheet["properties"]["title"] for worksheet in metadata.get("sheets", [])]
+
+    jobs = [
+        (title, cell_range, table_suffix)
+        for title in titles
+        if title in worksheet_ranges_config
+        for cell_range, table_suffix in worksheet_ranges_config[title]
+    ]
+    if not jobs:
+        return []
+
+    response = (
+        sheets.values()
+        .batchGet(
+            spreadsheetId=spreadsheet["id"],
+            ranges=[build_a1_range(title, cell_range) for title, cell_range, _ in jobs],
+        )
+        .execute()
+    )
 
-    for ws in worksheets:
-        log(f"  - {ws['title']} (index: {ws['index']})")
+    run_folder = Path(OUTPUT_ROOT) / uuid.uuid4().hex
+    table_ids = []
+    for (title, cell_range, table_suffix), value_range in zip(jobs, response.get("valueRanges", []), strict=True):
+        table_id = normalize_to_bigquery_table_name(get_base_table_name(title, table_suffix))
+        table_id_with_year = f"{table_id}_{spreadsheet['year']}"
 
-    return worksheets
+        dataframe = values_to_dataframe(value_range.get("values", []))
+        table_folder = run_folder / dataset_id / table_id_with_year
+        table_folder.mkdir(parents=True, exist_ok=True)
+        dataframe.to_csv(table_folder / "data.csv", index=False)
 
+        print(f"  {spreadsheet['name']} → {title} → {cell_range}: {len(dataframe)} rows → {table_id_with_year}")
+        create_table_and_upload_to_gcs(
+            data_path=str(table_folder),
+            dataset_id=dataset_id,
+            table_id=table_id_with_year,
+            dump_mode=dump_mode,
+            biglake_table=biglake_table,
+            source_format="csv",
+        )
+        table_ids.append(table_id_with_year)
 
-@task
-def normalize_table_name(worksheet_title: str, suffix: str | None = None) -> str:
-    """Normalize worksheet title to a valid BigQuery table name using pyjanitor."""
-    base_name = get_base_table_name(worksheet_title, suffix)
-    normalized_name = normalize_to_bigquery_table_name(base_name)
-    log(f"Normalized '{base_name}' to '{normalized_name}'")
-    return normalized_name
+    return table_ids
 
 
 @task
-def extract_range_to_bigquery(job: ExtractionJob) -> None:
-    """Extract a specific range from a spreadsheet worksheet and upload to BigQuery."""
-    table_id = normalize_table_name(job["worksheet_title"], job["table_suffix"])
-    table_id_with_year = f"{table_id}_{job['spreadsheet_year']}"
-
-    log(f"Processing: {job['spreadsheet_name']} → {job['worksheet_title']} → {job['cell_range']}")
-    log(f"  Uploading to {job['dataset_id']}.{table_id_with_year}")
-
-    dump_url_flow(
-        url=job["spreadsheet_url"],
-        url_type="google_sheet",
-        gsheets_sheet_order=job["worksheet_index"],
-        gsheets_sheet_name=job["worksheet_title"],
-        gsheets_sheet_range=job["cell_range"],
-        dataset_id=job["dataset_id"],
-        table_id=table_id_with_year,
-        dump_mode=job["dump_mode"],
-        partition_columns="",
-        biglake_table=job["biglake_table"],
-    )
+def extract_spreadsheets_to_bigquery(
+    spreadsheets: list[dict[str, str]],
+    credentials,
+    dataset_id: str,
+    dump_mode: str,
+    max_workers: int = 4,
+) -> tuple[dict[str, str], list[str]]:
+    """
+    Extract independent spreadsheets concurrently.
+
+    Returns:
+        Tuple (modifiedTime of each spreadsheet extracted successfully, names that failed)
+    """
+    worksheet_ranges_config = get_worksheet_ranges_config()
+    extracted, failures = {}, []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(spreadsheets)))) as executor:
+        futures = {
+            executor.submit(
+                extract_spreadsheet_to_bigquery,
+                spreadsheet,
+                credentials,
+                worksheet_ranges_config,
+                dataset_id,
+                dump_mode,
+            ): spreadsheet
+            for spreadsheet in spreadsheets
+        }
+        for future in as_completed(futures):
+            spreadsheet = futures[future]
+            try:
+                table_ids = future.result()
+            except Exception as error:
+                log(f"✗ Failed {spreadsheet['name']}: {error}", level="error")
+                failures.append(spreadsheet["name"])
+                continue
+
+            log(f"✓ Completed {spreadsheet['name']}: {len(table_ids)} tables ({', '.join(table_ids)})")
+            extracted[spreadsheet["id"]] = spreadsheet["modified_time"]
 
-    log(f"  ✓ Completed {job['dataset_id']}.{table_id_with_year}")
+    return extracted, failures
 
 
 @flow(log_prints=True)
@@ -129,57 +184,63 @@ def rj_setur__turismo_fluxo_visitantes(
     folder_id: str = "1d_SxiMsXQd2JH1Ttik3OQDRJy7wLtX6S",
     dataset_id: str = "brutos_turismo_fluxo_visitante",
     dump_mode: str = "overwrite",
+    max_workers: int = 4,
+    force_refresh: bool = False,
+    state_bucket: str = "rj-iplanrio",
 ):
-    """Read tourism visitor flow data from multiple Google Sheets and upload to BigQuery."""
+    """
+    Read tourism visitor flow data from multiple Google Sheets and upload to BigQuery.
+
+    Spreadsheets whose Drive modifiedTime and worksheet ranges config did not change since
+    the last successful run are skipped (unless force_refresh); the others are extracted
+    concurrently.
+    """
     rename_current_flow_run_task(new_name=f"{dataset_id}_geodata_batch")
     inject_bd_credentials_task(environment="prod")
 
     credentials = get_google_credentials()
-    worksheet_ranges_config = get_worksheet_ranges_config()
     spreadsheets = list_spreadsheets_in_folder(folder_id=folder_id, credentials=credentials)
 
     if not spreadsheets:
         log("No spreadsheets found in folder")
         return
 
-    extraction_jobs: list[ExtractionJob] = []
+    state_blob = f"state/rj_setur__turismo_fluxo_visitantes/{dataset_id}.json"
+    state = load_state(state_bucket, state_blob)
+    config_hash = hash_worksheet_ranges_config(get_worksheet_ranges_config())
 
+    pending = [
+        spreadsheet
+        for spreadsheet in spreadsheets
+        if force_refresh
+        or spreadsheet["modified_time"] is None
+        or state.get(spreadsheet["id"]) != {"modified_time": spreadsheet["modified_time"], "config_hash": config_hash}
+    ]
     for spreadsheet in spreadsheets:
-        spreadsheet_url = spreadsheet["url"]
-        spreadsheet_name = spreadsheet["name"]
-        spreadsheet_year = spreadsheet["year"]
-        worksheets = get_worksheet_info(spreadsheet_url=spreadsheet_url, credentials=credentials)
+        if spreadsheet not in pending:
+            log(f"Skipping {spreadsheet['name']}: unchanged since {spreadsheet['modified_time']}")
 
-        for worksheet in worksheets:
-            worksheet_title = str(worksheet["title"])
-            worksheet_index = int(worksheet["index"])
+    if not pending:
+        log("No spreadsheet changed since the last run")
+        return
 
-            if worksheet_title not in worksheet_ranges_config:
-                continue
+    log(f"Extracting {len(pending)} spreadsheets with up to {max_workers} in parallel")
+    extracted, failures = extract_spreadsheets_to_bigquery(
+        spreadsheets=pending,
+        credentials=credentials,
+        dataset_id=dataset_id,
+        dump_mode=dump_mode,
+        max_workers=max_workers,
+    )
+
+    if extracted:
+        extracted_state = {
+            spreadsheet_id: {"modified_time": modified_time, "config_hash": config_hash}
+            for spreadsheet_id, modified_time in extracted.items()
+        }
+        save_state({**state, **extracted_state}, state_bucket, state_blob)
+
+    if failures:
+        raise RuntimeError(f"Failed to extract {len(failures)} spreadsheets: {', '.join(failures)}")
 
-            ranges_config = worksheet_ranges_config[worksheet_title]
-
-            for cell_range, table_suffix in ranges_config:
-                job: ExtractionJob = {
-                    "spreadsheet_url": spreadsheet_url,
-                    "spreadsheet_name": spreadsheet_name,
-                    "spreadsheet_year": spreadsheet_year,
-                    "worksheet_index": worksheet_index,
-                    "worksheet_title": worksheet_title,
-                    "cell_range": cell_range,
-                    "table_suffix": table_suffix,
-                    "dataset_id": dataset_id,
-                    "dump_mode": dump_mode,
-                    "biglake_table": False,
-                }
-                table_name = f"{worksheet_title}{'_' + table_suffix if table_suffix else ''}_{spreadsheet_year}"
-                log(f"  Queued: {table_name} from {cell_range}")
-                extraction_jobs.append(job)
-
-    log(f"\nPrepared {len(extraction_jobs)} extraction tasks")
-    log("Starting sequential extraction...\n")
-
-    for job in extraction_jobs:
-        extract_range_to_bigquery(job)
-
-    log(f"\n✓ All {len(extraction_jobs)} extractions completed successfully")
+    log(f"\n✓ All {len(extracted)} spreadsheets extracted successfully")
@@ -1,5 +1,9 @@
+import hashlib
+import json
 import re
+import unicodedata
 
+import pandas as pd
 from unidecode import unidecode
 
 
@@ -54,9 +58,55 @@ def get_worksheet_ranges_config() -> dict[str, list[tuple[str, str | None]]]:
     }
 
 
+def hash_worksheet_ranges_config(worksheet_ranges_config: dict[str, list[tuple[str, str | None]]]) -> str:
+    """Get a stable hash of the worksheet ranges config, to detect config changes between runs."""
+    serialized = json.dumps(worksheet_ranges_config, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
 def get_google_api_scopes() -> list[str]:
     """Get required Google API scopes for Drive and Sheets access."""
     return [
         "https://www.googleapis.com/auth/drive.readonly",
         "https://www.googleapis.com/auth/spreadsheets.readonly",
     ]
+
+
+def build_a1_range(worksheet_title: str, cell_range: str) -> str:
+    """Build an A1 range qualified by worksheet title (e.g. 'Dados atrativos'!A4:N17)."""
+    escaped_title = worksheet_title.replace("'", "''")
+    return f"'{escaped_title}'!{cell_range}"
+
+
+def _final_column_treatment(column: str) -> str:
+    try:
+        int(column)
+        return f"_{column}"
+    except ValueError:
+        return re.sub(r"[\W]+", "", column)
+
+
+def clean_column_names(columns: list[str]) -> list[str]:
+    """Clean header names the same way dump_url does (no accents, snake_case, lowercase)."""
+    cleaned = []
+    for column in columns:
+        name = unicodedata.normalize("NFKD", column).encode("ascii", errors="ignore").decode("utf-8").strip()
+        name = re.sub(r"[ /\-\a\b\n\t\v\f\r]", "_", name).lower()
+        cleaned.append(_final_column_treatment(name))
+    return cleaned
+
+
+def values_to_dataframe(values: list[list[str]]) -> pd.DataFrame:
+    """
+    Turn the values of a Sheets range into a DataFrame using the first row as header.
+
+    The Sheets API omits trailing empty cells, so rows are padded to the widest row.
+    Header cells left empty are named "Unnamed: <position>", as pandas would.
+    """
+    if not values:
+        return pd.DataFrame()
+
+    width = max(len(row) for row in values)
+    rows = [list(row) + [""] * (width - len(row)) for row in values]
+    header = [str(name) if str(name).strip() else f"Unnamed: {position}" for position, name in enumerate(rows[0])]
+    return pd.DataFrame(rows[1:], columns=clean_column_names(header))
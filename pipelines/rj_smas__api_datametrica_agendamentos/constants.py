@@ -26,3 +26,9 @@ class DatametricaConstants(Enum):
 
     # Configurações do BigQuery
     BIGLAKE_TABLE = False
+
+    # Requisições à API (via proxy)
+    MAX_CONCURRENT_REQUESTS = 4
+    MAX_RETRIES = 3
+    BACKOFF_FACTOR = 2
+    REQUEST_TIMEOUT = 30
@@ -13,15 +13,16 @@ from pipelines.rj_smas__api_datametrica_agendamentos.constants import (
     DatametricaConstants,
 )
 from pipelines.rj_smas__api_datametrica_agendamentos.tasks import (
+    calculate_date_window,
     calculate_target_date,
-    convert_agendamentos_to_dataframe,
-    fetch_agendamentos_from_api,
+    fetch_agendamentos_for_dates,
     get_bigquery_config,
     get_datametrica_credentials,
     transform_agendamentos_data,
 )
 from pipelines.rj_smas__api_datametrica_agendamentos.utils.tasks import (
     create_date_partitions,
+    replace_staging_partitions,
 )
 
 
@@ -33,6 +34,9 @@ def rj_smas__api_datametrica_agendamentos(
     materialize_after_dump: bool | None = None,
     date: str | None = None,
     infisical_secret_path: str | None = "/api-datametrica",
+    start_date: str | None = None,
+    end_date: str | None = None,
+    max_concurrent_requests: int = DatametricaConstants.MAX_CONCURRENT_REQUESTS.value,
 ):
     """
     Flow para extrair agendamentos da API Datametrica e carregar no BigQuery.
@@ -41,6 +45,10 @@ def rj_smas__api_datametrica_agendamentos(
     - Dias normais: busca dados para 2 dias à frente
     - Quinta e sexta-feira: busca dados para 4 dias à frente (cobrindo fim de semana)
 
+    Com start_date, busca em paralelo todos os dias de start_date a end_date (recuperação
+    após indisponibilidade) e não dispara a campanha do CadÚnico. Em ambos os modos a
+    partição de cada dia recuperado é substituída, e não acrescentada, no upload.
+
     Args:
         dataset_id: ID do dataset no BigQuery (default: None = obtém do Infisical)
         table_id: ID da tabela no BigQuery (default: None = obtém do Infisical)
@@ -48,6 +56,9 @@ def rj_smas__api_datametrica_agendamentos(
         materialize_after_dump: Se deve materializar após dump (default: True)
         date: Data para buscar agendamentos no formato YYYY-MM-DD (default: None = usa regra de negócio)
         infisical_secret_path: Caminho dos secrets no Infisical (default: /api-datametrica)
+        start_date: Primeira data da janela no formato YYYY-MM-DD (default: None = data única)
+        end_date: Última data da janela no formato YYYY-MM-DD (default: None = start_date)
+        max_concurrent_requests: Datas buscadas em paralelo no modo janela (default: 4)
     """
 
     # Obter configuração do BigQuery do Infisical se não fornecida via parâmetros
@@ -79,23 +90,33 @@ def rj_smas__api_datametrica_agendamentos(
     credentials = get_datametrica_credentials(infisical_secret_path=infisical_secret_path)
 
     # Calcular data target baseada na regra de negócio (a menos que date seja fornecido explicitamente)
-    today_sp = datetime.now(ZoneInfo("America/Sao_Paulo")).date()
-    target_date = date if date is not None else calculate_target_date()
-    days_ahead = (datetime.strptime(target_date, "%Y-%m-%d").date() - today_sp).days
+    window_mode = start_date is not None
+    if window_mode:
+        dates = calculate_date_window(start_date=start_date, end_date=end_date)
+    else:
+        today_sp = datetime.now(ZoneInfo("America/Sao_Paulo")).date()
+        target_date = date if date is not None else calculate_target_date()
+        days_ahead = (datetime.strptime(target_date, "%Y-%m-%d").date() - today_sp).days
+        dates = [target_date]
 
     # Buscar dados da API
-    raw_data = fetch_agendamentos_from_api(credentials=credentials, date=target_date)
+    raw_data_by_date, failed_dates = fetch_agendamentos_for_dates(
+        credentials=credentials,
+        dates=dates,
+        max_workers=max_concurrent_requests,
+    )
+    if not raw_data_by_date:
+        raise RuntimeError(f"Falha ao buscar agendamentos de todas as datas: {', '.join(failed_dates)}")
 
     # Transformar os dados
-    processed_data = transform_agendamentos_data(raw_data)
-
-    # Converter para DataFrame
-    df = convert_agendamentos_to_dataframe(processed_data)
+    df = transform_agendamentos_data([record for records in raw_data_by_date.values() for record in records])
 
     # Encerrar o flow sem erro se não houver agendamentos para a data
-    if df.empty:
-        print(f"Nenhum agendamento encontrado para a data {target_date}. Encerrando sem upload.")
+    if df.empty and not failed_dates:
+        print(f"Nenhum agendamento encontrado para a(s) data(s) {', '.join(dates)}. Encerrando sem upload.")
         return
+    if df.empty:
+        raise RuntimeError(f"Falha ao buscar agendamentos das datas: {', '.join(failed_dates)}")
 
     # Criar partições por data
     partitions_path = create_date_partitions(
@@ -105,6 +126,14 @@ def rj_smas__api_datametrica_agendamentos(
         root_folder=root_folder,
     )
 
+    # Re-buscar um dia substitui a partição em vez de duplicar os agendamentos
+    replace_staging_partitions(
+        dataframe=df,
+        dataset_id=dataset_id,
+        table_id=table_id,
+        partition_column=partition_column,
+    )
+
     create_table_and_upload_to_gcs_task(
         data_path=partitions_path,
         dataset_id=dataset_id,
@@ -116,7 +145,14 @@ def rj_smas__api_datametrica_agendamentos(
     if materialize_after_dump:
         dbt_select = "raw_cadunico_agendamentos"
         execute_dbt_task(select=dbt_select, target="prod")
-    
+
+    if failed_dates:
+        raise RuntimeError(f"Falha ao buscar agendamentos das datas: {', '.join(failed_dates)}")
+
+    if window_mode:
+        print("Modo janela: disparo da campanha do CadÚnico não acionado.")
+        return
+
     print("\n\n******* Triggering cadunico dispatch flow... *******")
 
     cadunico_params = {
@@ -5,8 +5,9 @@ Tasks migradas do Prefect 1.4 para 3.0 - SMAS API Datametrica Agendamentos
 
 # pylint: disable=invalid-name
 # flake8: noqa: E501
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import json
 
@@ -14,12 +15,33 @@ import pandas as pd
 import requests
 import urllib3
 from prefect import task  # pylint: disable=E0611, E0401
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Disable SSL warnings for internal APIs
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 from iplanrio.pipelines_utils.env import getenv_or_action
 from iplanrio.pipelines_utils.logging import log  # pylint: disable=E0611, E0401
 
+from pipelines.rj_smas__api_datametrica_agendamentos.constants import (
+    DatametricaConstants,
+)
+
+# Campo de destino -> campo da API
+AGENDAMENTO_FIELDS = {
+    "id": "id",
+    "id_capacidade": "id_capacidade",
+    "nome_completo": "nome_completo",
+    "primeiro_nome": "primeiro_nome",
+    "cpf": "cpf",
+    "telefone": "telefone",
+    "tipo": "tipo",
+    "data_hora": "data_hora",
+    "unidade_nome": "nome",
+    "unidade_endereco": "endereco",
+    "unidade_bairro": "bairro",
+}
+
 
 @task
 def calculate_target_date() -> str:
@@ -49,6 +71,28 @@ def calculate_target_date() -> str:
     return target_date_str
 
 
+@task
+def calculate_date_window(start_date: str, end_date: str | None = None) -> List[str]:
+    """
+    Lista as datas de start_date a end_date (inclusive), para recuperar vários dias em uma execução.
+
+    Args:
+        start_date: Primeira data no formato YYYY-MM-DD
+        end_date: Última data no formato YYYY-MM-DD (default: start_date)
+
+    Returns:
+        Lista de datas no formato YYYY-MM-DD
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else start
+    if end < start:
+        raise ValueError(f"end_date ({end_date}) anterior a start_date ({start_date})")
+
+    dates = [(start + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range((end - start).days + 1)]
+    log(f"Janela de datas: {dates[0]} a {dates[-1]} ({len(dates)} dias)")
+    return dates
+
+
 @task
 def get_datametrica_credentials(
     infisical_secret_path: str | None = None,
@@ -84,18 +128,32 @@ def get_datametrica_credentials(
     }
 
 
-@task
-def fetch_agendamentos_from_api(credentials: Dict[str, str], date: str) -> List[Dict[str, Any]]:
+def build_datametrica_session(
+    pool_size: int = DatametricaConstants.MAX_CONCURRENT_REQUESTS.value,
+    max_retries: int = DatametricaConstants.MAX_RETRIES.value,
+    backoff_factor: float = DatametricaConstants.BACKOFF_FACTOR.value,
+) -> requests.Session:
     """
-    Busca os agendamentos da API da Datametrica usando proxy brasileiro.
-
-    Args:
-        credentials: Dict com 'url', 'token', 'proxy_url' e 'proxy_token'
-        date: Data no formato YYYY-MM-DD. Sempre obrigatória — use calculate_target_date() para obter a data correta.
-
-    Returns:
-        Lista de dicionários com os dados dos agendamentos
+    Sessão HTTP com pool de conexões do tamanho da concorrência e retentativas com backoff
+    exponencial em erros de conexão, 429 e 5xx do proxy.
     """
+    session = requests.Session()
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _fetch_agendamentos(session: requests.Session, credentials: Dict[str, str], date: str) -> List[Dict[str, Any]]:
+    """Busca os agendamentos de uma data via proxy brasileiro."""
     # Build Datametrica URL
     base_url = credentials["url"].rstrip("/")
     datametrica_url = f"{base_url}/{date}"
@@ -103,8 +161,6 @@ def fetch_agendamentos_from_api(credentials: Dict[str, str], date: str) -> List[
     # Build proxy URL
     proxy_url = f"{credentials['proxy_url'].rstrip('/')}/?url={datametrica_url}"
 
-    log("Buscando agendamentos via proxy brasileiro")
-
     # Headers incluindo o token do proxy e os headers originais da Datametrica
     headers = {
         "X-Proxy-Api-Token": credentials["proxy_token"],
@@ -115,69 +171,104 @@ def fetch_agendamentos_from_api(credentials: Dict[str, str], date: str) -> List[
     }
 
     try:
-        response = requests.get(proxy_url, headers=headers, timeout=30, verify=False)
+        response = session.get(
+            proxy_url,
+            headers=headers,
+            timeout=DatametricaConstants.REQUEST_TIMEOUT.value,
+            verify=False,
+        )
 
         # Log response details for debugging
-        log(f"Status code: {response.status_code}")
+        log(f"[{date}] Status code: {response.status_code}")
         if response.status_code == 403:
-            log(f"Response headers: {dict(response.headers)}")
-            log(f"Response body: {response.text[:500]}")  # First 500 chars
+            log(f"[{date}] Response headers: {dict(response.headers)}")
+            log(f"[{date}] Response body: {response.text[:500]}")  # First 500 chars
 
         response.raise_for_status()
 
         agendamentos_data = response.json()
-        log(f"Recuperados {len(agendamentos_data)} agendamentos")
+        log(f"[{date}] Recuperados {len(agendamentos_data)} agendamentos")
 
         return agendamentos_data
 
     except requests.exceptions.RequestException as e:
-        log(f"Erro ao buscar agendamentos via proxy: {e}")
+        log(f"[{date}] Erro ao buscar agendamentos via proxy: {e}")
         if hasattr(e, "response") and e.response is not None:
-            log(f"Response status: {e.response.status_code}")
-            log(f"Response text: {e.response.text[:500]}")
+            log(f"[{date}] Response status: {e.response.status_code}")
+            log(f"[{date}] Response text: {e.response.text[:500]}")
         raise
     except Exception as e:
-        log(f"Erro inesperado: {e}")
+        log(f"[{date}] Erro inesperado: {e}")
         raise
 
 
+@task
+def fetch_agendamentos_for_dates(
+    credentials: Dict[str, str],
+    dates: List[str],
+    max_workers: int = DatametricaConstants.MAX_CONCURRENT_REQUESTS.value,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    """
+    Busca os agendamentos de várias datas em paralelo, sobre uma sessão compartilhada.
+
+    Args:
+        credentials: Dict com 'url', 'token', 'proxy_url' e 'proxy_token'
+        dates: Datas no formato YYYY-MM-DD
+        max_workers: Requisições simultâneas ao proxy
+
+    Returns:
+        Tupla (agendamentos por data recuperada, datas que falharam após as retentativas)
+    """
+    workers = max(1, min(max_workers, len(dates)))
+    log(f"Buscando agendamentos de {len(dates)} datas via proxy brasileiro ({workers} em paralelo)")
+
+    results, failures = {}, []
+    with build_datametrica_session(pool_size=workers) as session:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_fetch_agendamentos, session, credentials, date): date for date in dates}
+            for future in as_completed(futures):
+                date = futures[future]
+                try:
+                    results[date] = future.result()
+                except Exception:  # pylint: disable=broad-except
+                    failures.append(date)
+
+    if failures:
+        log(f"Datas com falha: {', '.join(sorted(failures))}", level="warning")
+    return {date: results[date] for date in sorted(results)}, sorted(failures)
+
+
 @task
 def transform_agendamentos_data(
     agendamentos_data: List[Dict[str, Any]],
-) -> List[Dict[str, Any]]:
+) -> pd.DataFrame:
     """
     Transforma e valida os dados brutos dos agendamentos.
+
+    O mapeamento é feito por coluna (uma lista por campo de AGENDAMENTO_FIELDS) em vez
+    de montar um dicionário por registro.
+
+    Returns:
+        DataFrame com os dados dos agendamentos
     """
     log(f"Transformando {len(agendamentos_data)} registros")
 
-    agendamentos = []
-    for data in agendamentos_data:
-        try:
-            if isinstance(data, str):
-                data = json.loads(data)
-            agendamento = {
-                "id": data["id"],
-                "id_capacidade": data["id_capacidade"],
-                "nome_completo": data["nome_completo"],
-                "primeiro_nome": data["primeiro_nome"],
-                "cpf": data["cpf"],
-                "telefone": data["telefone"],
-                "tipo": data["tipo"],
-                "data_hora": data["data_hora"],
-                "unidade_nome": data["nome"],
-                "unidade_endereco": data["endereco"],
-                "unidade_bairro": data["bairro"],
-            }
-            agendamentos.append(agendamento)
-        except KeyError as e:
-            log(f"Erro ao processar registro: campo {e} não encontrado")
-            raise
-        except Exception as e:
-            log(f"Erro inesperado ao processar registro: {e}")
-            raise
-
-    log(f"Transformação concluída: {len(agendamentos)} registros processados")
-    return agendamentos
+    if not agendamentos_data:
+        log("Transformação concluída: 0 registros processados")
+        return pd.DataFrame()
+
+    records = [json.loads(data) if isinstance(data, str) else data for data in agendamentos_data]
+    try:
+        columns = {
+            target: [record[source] for record in records] for target, source in AGENDAMENTO_FIELDS.items()
+        }
+    except KeyError as e:
+        log(f"Erro ao processar registro: campo {e} não encontrado")
+        raise
+
+    df = pd.DataFrame(columns)
+    log(f"Transformação concluída: {len(df)} registros processados")
+    return df
 
 
 @task
@@ -205,22 +296,3 @@ def get_bigquery_config(
         "dataset_id": dataset_id,
         "table_id": table_id,
     }
-
-
-@task
-def convert_agendamentos_to_dataframe(
-    agendamentos: List[Dict[str, Any]],
-) -> pd.DataFrame:
-    """
-    Converte a lista de agendamentos para um DataFrame pandas.
-
-    Returns:
-        DataFrame com os dados dos agendamentos
-    """
-    log(f"Convertendo {len(agendamentos)} agendamentos para DataFrame")
-
-    df = pd.DataFrame(agendamentos)
-    log(f"DataFrame criado com {len(df)} registros e {len(df.columns)} colunas")
-
-    return df
-
@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Literal
 
 import pandas as pd
+from basedosdados.upload.storage import Storage
 from iplanrio.pipelines_utils.logging import log
 from prefect import task
 
@@ -59,3 +60,36 @@ def create_date_partitions(
 
     log(f"Files saved on {root_folder}")
     return root_folder
+
+
+@task
+def replace_staging_partitions(
+    dataframe: pd.DataFrame,
+    dataset_id: str,
+    table_id: str,
+    partition_column: str,
+) -> list[str]:
+    """
+    Delete the GCS staging files of every day partition present in the DataFrame.
+
+    Called right before the upload, so re-fetching a day replaces its partition instead
+    of appending duplicates. Days without data are left untouched.
+
+    Returns:
+        The partition dates that were cleared
+    """
+    partition_dates = pd.to_datetime(dataframe[partition_column], errors="coerce").dt.strftime("%Y-%m-%d")
+    dates = sorted(partition_dates.dropna().unique())
+
+    st = Storage(dataset_id=dataset_id, table_id=table_id)
+    for date in dates:
+        partitions = f"ano_particao={date[:4]}/mes_particao={date[5:7]}/data_particao={date}"
+        prefix = st._build_blob_name(filename="", mode="staging", partitions=partitions)
+        blobs = list(st.bucket.list_blobs(prefix=prefix))
+        if blobs:
+            with st.client["storage_staging"].batch():
+                for blob in blobs:
+                    blob.delete()
+        log(f"Partition {date} cleared ({len(blobs)} file(s) removed)")
+
+    return dates
@@ -33,6 +33,14 @@ class PicLembreteConstants(Enum):
     # Modo de teste - ativar por padrão para segurança
     PIC_TEST_MODE = True
 
+    # Espera pelos resultados do disparo: consulta status_disparo com backoff exponencial
+    # até que a fração de CPFs com status atinja o mínimo ou o prazo acabe
+    RESULTS_BILLING_PROJECT_ID = "rj-crm-registry"
+    RESULTS_MIN_COMPLETION_RATIO = 0.95
+    RESULTS_MAX_WAIT_MINUTES = 15
+    RESULTS_INITIAL_POLL_SECONDS = 30
+    RESULTS_MAX_POLL_SECONDS = 300
+
     # Query principal do PIC com saída em JSON (destination_data)
     PIC_QUERY = r"""
         WITH config AS (
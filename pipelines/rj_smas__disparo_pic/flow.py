@@ -43,6 +43,8 @@ from pipelines.rj_crm__disparo_template.utils.tasks import (
     skip_flow_if_empty,
     task_download_data_from_bigquery,
 )
+# pylint: disable=E0611, E0401
+from pipelines.rj_smas__disparo_pic.tasks import schedule_dispatch_run, wait_for_dispatch_results
 
 
 # forçando deploy do flow
@@ -64,6 +66,9 @@ def rj_smas__disparo_pic(
     filter_duplicated_cpfs: bool = True,
     test_mode: bool | None = True,
     sleep_minutes: int | None = 5,
+    skip_safety_wait: bool = False,
+    results_min_completion_ratio: float = PicLembreteConstants.RESULTS_MIN_COMPLETION_RATIO.value,
+    results_max_wait_minutes: int = PicLembreteConstants.RESULTS_MAX_WAIT_MINUTES.value,
     dispatch_approved_col: str | None = "APROVACAO_DISPARO_AVISO",
     dispatch_date_col: str | None = "DATA_DISPARO_AVISO",
     event_date_col: str | None = "DATA_ENTREGA",
@@ -135,8 +140,6 @@ def rj_smas__disparo_pic(
         query_replacements = {"event_date_placeholder": event_date, "id_hsm_placeholder": id_hsm}
         query_complete = format_query(raw_query=query, replacements=query_replacements)
         print(f"\nQuery dispatch approval:\n{query_complete}")
-        print(f"Sleep {sleep_minutes} minutes to check")
-        time.sleep(sleep_minutes * 60)
 
         api = access_api(
             infisical_secret_path,
@@ -168,6 +171,19 @@ def rj_smas__disparo_pic(
         # Log destination counts for tracking!!
         print(f"Total unique destinations to dispatch: {len(unique_destinations)}")
 
+        # Espera de segurança: em vez de segurar o worker, agenda a execução que fará o disparo
+        if sleep_minutes and not skip_safety_wait:
+            print(
+                f"⚠️  Dispatch in {sleep_minutes} minutes for id_hsm={id_hsm}, event_date={event_date}, "
+                f"example data {unique_destinations[:5]}. Check if event date and id_hsm is correct!!"
+            )
+            scheduled_run_id = schedule_dispatch_run(wait_minutes=sleep_minutes)
+            if scheduled_run_id:
+                print(f"Dispatch scheduled on flow run {scheduled_run_id}. Cancel it in the UI to abort.")
+                return
+            # Fora de um deployment não há como reagendar
+            time.sleep(sleep_minutes * 60)
+
         # Add contacts to whitelist if percentage is set
         if whitelist_percentage > 0:
             whitelist_group_name = f"citizen-hsm-{campaign_name}-{pendulum.now('America/Sao_Paulo').to_date_string()}"
@@ -193,8 +209,6 @@ def rj_smas__disparo_pic(
                 f"\nStarting dispatch for id_hsm={id_hsm}, campaign_name={campaign_name}, example data {unique_destinations[:5]}\n"
             )
             # TODO: adicionar print da hsm
-            print(f"⚠️  Sleep {sleep_minutes} minutes before dispatch. Check if event date and id_hsm is correct!!")
-            time.sleep(sleep_minutes * 60)
 
             dispatch_date = dispatch(
                 api=api,
@@ -258,17 +272,20 @@ def rj_smas__disparo_pic(
                     biglake_table=False,
                 )
 
-            # Wait 15 minutes before querying results
-            print("⚠️  Waiting 15 minutes before checking dispatch results...")
-            time.sleep(15 * 60)  # 15 minutes in seconds
+            # Wait until the callbacks land (or the deadline) before querying results
+            wait_for_dispatch_results(
+                campaign_name=campaign_name,
+                dispatch_date=dispatch_date,
+                total_dispatches=len(unique_destinations),
+                min_completion_ratio=results_min_completion_ratio,
+                max_wait_minutes=results_max_wait_minutes,
+            )
 
             # Send results notification with BigQuery data
             send_dispatch_result_notification(
                 total_dispatches=len(unique_destinations),
                 dispatch_date=dispatch_date,
-                id_hsm=id_hsm,
                 campaign_name=campaign_name,
-                cost_center_id=cost_center_id,
                 total_batches=total_batches,
                 test_mode=test_mode,
             )
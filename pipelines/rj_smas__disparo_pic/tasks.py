@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa:E501
+# pylint: disable='line-too-long'
+"""
+Tasks específicas do disparo PIC: espera de segurança antes do disparo e espera
+pelos resultados (callbacks) depois do disparo.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from iplanrio.pipelines_utils.logging import log  # pylint: disable=E0611, E0401
+from prefect import task  # pylint: disable=E0611, E0401
+from prefect.deployments import run_deployment  # pylint: disable=E0611, E0401
+from prefect.runtime import deployment, flow_run  # pylint: disable=E0611, E0401
+
+# pylint: disable=E0611, E0401
+from pipelines.rj_crm__disparo_template.utils.tasks import download_data_from_bigquery
+from pipelines.rj_smas__disparo_pic.constants import PicLembreteConstants
+
+
+@task
+def schedule_dispatch_run(wait_minutes: int) -> Optional[str]:
+    """
+    Agenda uma nova execução do próprio deployment para daqui a wait_minutes, com os
+    mesmos parâmetros e skip_safety_wait=True, no lugar de segurar o worker dormindo.
+
+    Para abortar o disparo basta cancelar a execução agendada na UI. Como a nova execução
+    refaz as checagens de status e aprovação, uma reprovação durante a espera também
+    impede o disparo.
+
+    Returns:
+        Id da execução agendada, ou None quando o flow não roda a partir de um deployment
+    """
+    if deployment.id is None:
+        return None
+
+    scheduled_run = run_deployment(
+        name=deployment.id,
+        parameters={**flow_run.parameters, "skip_safety_wait": True},
+        scheduled_time=datetime.now(timezone.utc) + timedelta(minutes=wait_minutes),
+        timeout=0,
+        as_subflow=False,
+    )
+    log(f"Disparo agendado para daqui a {wait_minutes} minutos na execução {scheduled_run.id}")
+    return str(scheduled_run.id)
+
+
+def _count_dispatch_results(campaign_name: str, dispatch_date: str, billing_project_id: str) -> int:
+    """Quantidade de CPFs da campanha com algum status em status_disparo desde dispatch_date."""
+    query = f"""
+        SELECT COUNT(DISTINCT cpf) AS total_com_status
+        FROM `rj-crm-registry.brutos_salesforce.status_disparo`
+        WHERE nome_hsm = '{campaign_name}'
+          AND envio_datahora >= '{dispatch_date}'
+          AND data_particao >= DATE('{dispatch_date}')
+    """
+    df = download_data_from_bigquery(query=query, billing_project_id=billing_project_id, bucket_name=billing_project_id)
+    return int(df.iloc[0]["total_com_status"]) if not df.empty else 0
+
+
+@task
+def wait_for_dispatch_results(
+    campaign_name: str,
+    dispatch_date: str,
+    total_dispatches: int,
+    min_completion_ratio: float = PicLembreteConstants.RESULTS_MIN_COMPLETION_RATIO.value,
+    max_wait_minutes: int = PicLembreteConstants.RESULTS_MAX_WAIT_MINUTES.value,
+    initial_poll_seconds: int = PicLembreteConstants.RESULTS_INITIAL_POLL_SECONDS.value,
+    max_poll_seconds: int = PicLembreteConstants.RESULTS_MAX_POLL_SECONDS.value,
+    billing_project_id: str = PicLembreteConstants.RESULTS_BILLING_PROJECT_ID.value,
+) -> float:
+    """
+    Consulta status_disparo com backoff exponencial (initial_poll_seconds, dobrando até
+    max_poll_seconds) até que a fração dos disparos com status atinja min_completion_ratio
+    ou até max_wait_minutes. Falhas na consulta não interrompem a espera.
+
+    Returns:
+        Fração dos disparos com status na última consulta
+    """
+    deadline = time.monotonic() + max_wait_minutes * 60
+    interval = initial_poll_seconds
+    ratio = 0.0
+
+    while True:
+        try:
+            completed = _count_dispatch_results(campaign_name, dispatch_date, billing_project_id)
+            ratio = completed / total_dispatches if total_dispatches else 1.0
+            print(f"🔍 {completed}/{total_dispatches} disparos com status ({ratio:.1%})")
+        except Exception as e:  # pylint: disable=broad-except
+            log(f"Erro ao consultar resultados do disparo: {e}", level="warning")
+
+        remaining = deadline - time.monotonic()
+        if ratio >= min_completion_ratio:
+            print(f"✅ {ratio:.1%} dos disparos com status (mínimo {min_completion_ratio:.0%})")
+            break
+        if remaining <= 0:
+            print(f"⚠️  Prazo de {max_wait_minutes} minutos atingido com {ratio:.1%} dos disparos com status")
+            break
+
+        wait = min(interval, remaining)
+        print(f"⏳ Nova consulta em {wait:.0f}s")
+        time.sleep(wait)
+        interval = min(interval * 2, max_poll_seconds)
+
+    return ratio
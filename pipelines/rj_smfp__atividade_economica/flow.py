@@ -12,13 +12,13 @@ from typing import Optional
 
 from iplanrio.pipelines_templates.dump_db.tasks import (
     dump_upload_batch_task,
-    format_partitioned_query_task,
     get_database_username_and_password_from_secret_task,
     parse_comma_separated_string_to_list_task,
 )
 from iplanrio.pipelines_utils.env import inject_bd_credentials_task
 from iplanrio.pipelines_utils.prefect import rename_current_flow_run_task
 from prefect import flow
+from prefect_rj_iplanrio.dump_db import format_range_partitioned_query_task
 
 from pipelines.rj_smfp__atividade_economica.constants import (
     TABLE_CONFIGS,
@@ -49,6 +49,8 @@ def rj_smfp__atividade_economica(
     biglake_table: Optional[bool] = None,
     log_number_of_batches: int = 100,
     max_concurrency: int = 1,
+    range_column: Optional[str] = None,
+    range_count: int = 8,
     only_staging_dataset: bool = False,
     add_timestamp_column: bool = True,
 ):
@@ -81,6 +83,9 @@ def rj_smfp__atividade_economica(
         biglake_table: Se deve criar tabela BigLake. Se None, usa configuração da tabela
         log_number_of_batches: Número de batches para log
         max_concurrency: Número máximo de processos concorrentes
+        range_column: Coluna numérica (ex.: chave primária) ou de data usada para dividir
+            a query em faixas extraídas em paralelo. None mantém a query única
+        range_count: Número de faixas (e de conexões simultâneas) quando range_column é informado
         only_staging_dataset: Se deve usar apenas dataset de staging
         add_timestamp_column: Se deve adicionar coluna de timestamp
 
@@ -122,7 +127,7 @@ def rj_smfp__atividade_economica(
     partition_columns_list = parse_comma_separated_string_to_list_task(text=partition_columns)
 
     # Formatar query com particionamento se necessário
-    formatted_query = format_partitioned_query_task(
+    formatted_query = format_range_partitioned_query_task(
         query=config.execute_query,
         dataset_id=dataset_id,
         table_id=table_id,
@@ -133,6 +138,13 @@ def rj_smfp__atividade_economica(
         break_query_start=break_query_start,
         break_query_end=break_query_end,
         break_query_frequency=break_query_frequency,
+        range_column=range_column,
+        range_count=range_count,
+        hostname=db_host,
+        port=db_port,
+        user=secrets["DB_USERNAME"],
+        password=secrets["DB_PASSWORD"],
+        database=db_database,
     )
 
     # Executar dump e upload para BigQuery
@@ -154,7 +166,7 @@ def rj_smfp__atividade_economica(
         password=secrets["DB_PASSWORD"],
         database=db_database,
         charset=db_charset,
-        max_concurrency=max_concurrency,
+        max_concurrency=max(max_concurrency, range_count) if range_column else max_concurrency,
         only_staging_dataset=only_staging_dataset,
         add_timestamp_column=add_timestamp_column,
     )
@@ -28,7 +28,9 @@ class SisregConstants(Enum):
     # Infisical configuration for Wetalkie credentials
     INFISICAL_SECRET_PATH = "/wetalkie"
 
-    # BigQuery query to get SISREG appointments for next day
+    # BigQuery query to get SISREG appointments for next day.
+    # One column per field: the phone (PHONE_COLUMN) and, in order, the HSM vars
+    PHONE_COLUMN = "celular_disparo"
     QUERY = """
     WITH sisreg AS (
         SELECT
@@ -69,21 +71,17 @@ class SisregConstants(Enum):
         )
 
         SELECT
-        TO_JSON_STRING(STRUCT(
-                    CONCAT(
-                        IFNULL(pf.telefone.principal.ddi, "55"),
-                        IFNULL(pf.telefone.principal.ddd, "21"),
-                        pf.telefone.principal.valor) AS celular_disparo,
-                    STRUCT(
-                        sisreg.NOME,
-                        sisreg.TIPO_AGENDAMENTO,
-                        sisreg.DATA,
-                        sisreg.HORA,
-                        sisreg.UNIDADE,
-                        sisreg.ENDERECO,
-                        sisreg.NUMERO
-                    ) as vars
-                )) as destination_data
+            CONCAT(
+                IFNULL(pf.telefone.principal.ddi, "55"),
+                IFNULL(pf.telefone.principal.ddd, "21"),
+                pf.telefone.principal.valor) AS celular_disparo,
+            sisreg.NOME,
+            sisreg.TIPO_AGENDAMENTO,
+            sisreg.DATA,
+            CAST(sisreg.HORA AS STRING) AS HORA,
+            sisreg.UNIDADE,
+            sisreg.ENDERECO,
+            sisreg.NUMERO
         FROM sisreg
         INNER JOIN `rj-crm-registry.crm_dados_mestres.pessoa_fisica` as pf USING(cpf)
         WHERE pf.telefone.indicador = TRUE AND pf.obito.indicador = FALSE
@@ -14,6 +14,7 @@ from numpy import ceil
 from prefect import task
 from pytz import timezone
 
+from .constants import SisregConstants
 from .utils.tasks import download_data_from_bigquery
 
 
@@ -65,31 +66,19 @@ def create_dispatch_dfr(id_hsm: int, dispatch_payload: dict, dispatch_date: str)
     """
     Create DataFrame with dispatch information for storage
     """
-    data = []
-    for destination in dispatch_payload["destinations"]:
-        row = {
+    destinations = pd.DataFrame.from_records(dispatch_payload["destinations"])
+    dfr = pd.DataFrame(
+        {
             "id_hsm": id_hsm,
             "dispatch_date": dispatch_date,
             "campaignName": dispatch_payload["campaignName"],
             "costCenterId": dispatch_payload["costCenterId"],
-            "to": destination["to"],
-            "externalId": destination.get("externalId", None),
-            "vars": destination.get("vars", None),
-        }
-        data.append(row)
-
-    dfr = pd.DataFrame(data)
-    dfr = dfr[
-        [
-            "id_hsm",
-            "dispatch_date",
-            "campaignName",
-            "costCenterId",
-            "to",
-            "externalId",
-            "vars",
-        ]
-    ]
+            "to": destinations["to"],
+            "externalId": destinations["externalId"] if "externalId" in destinations else None,
+            "vars": destinations["vars"] if "vars" in destinations else None,
+        },
+        index=destinations.index,
+    )
     log(f"Created dispatch DataFrame with {len(dfr)} rows")
     return dfr
 
@@ -112,12 +101,41 @@ def check_api_status(api: object) -> bool:
         return False
 
 
+def _destinations_from_query_result(destinations_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the destinations from the query result.
+
+    The phone column becomes "to" and every other column, in query order, a key of
+    "vars". Results with a single column of JSON strings (queries written for the old
+    TO_JSON_STRING format) are still accepted.
+    """
+    phone_column = SisregConstants.PHONE_COLUMN.value
+    if phone_column not in destinations_df.columns and len(destinations_df.columns) == 1:
+        records = [json.loads(item) for item in destinations_df.iloc[:, 0]]
+        destinations = [
+            {("to" if key == phone_column else key): value for key, value in record.items()} for record in records
+        ]
+        return pd.DataFrame({"to": [item.get("to") for item in destinations], "destination": destinations})
+
+    var_columns = [column for column in destinations_df.columns if column != phone_column]
+    variables = destinations_df[var_columns].astype(object)
+    variables = variables.where(variables.notna(), None)
+    phones = destinations_df[phone_column].to_numpy(dtype=object, copy=True)
+    phones[destinations_df[phone_column].isna().to_numpy()] = None
+
+    payloads = pd.DataFrame({"to": pd.Series(phones, dtype=object), "vars": variables.to_dict("records")})
+    return pd.DataFrame({"to": payloads["to"], "destination": payloads.to_dict("records")})
+
+
 @task
 def get_destinations(
-    destinations: Union[None, List[str]], query: str, billing_project_id: str = "rj-crm-registry"
-) -> List[Dict]:
+    destinations: Union[None, List[Dict], str], query: str, billing_project_id: str = "rj-crm-registry"
+) -> pd.DataFrame:
     """
     Get destinations from BigQuery query or from parameter
+
+    Returns:
+        DataFrame with the phone ("to") and the dispatch payload ("destination") of each destination
     """
     if query:
         log("Query was found")
@@ -127,38 +145,35 @@ def get_destinations(
             bucket_name=billing_project_id,
         )
         log(f"Response from query: {len(destinations_df)} rows")
-        destinations = destinations_df.iloc[:, 0].tolist()
-        log(f"First 3 destinations: {destinations[:3] if destinations else 'None'}")
-        destinations = [json.loads(str(item).replace("celular_disparo", "to")) for item in destinations]
-    elif isinstance(destinations, str):
-        destinations = json.loads(destinations)
+        result = _destinations_from_query_result(destinations_df)
+        log(f"First 3 destinations: {result['destination'].head(3).tolist() if len(result) else 'None'}")
+        return result
 
-    return destinations if destinations else []
+    if isinstance(destinations, str):
+        destinations = json.loads(destinations)
+    destinations = destinations or []
+    return pd.DataFrame({"to": [item.get("to") for item in destinations], "destination": destinations})
 
 
 @task
-def remove_duplicate_phones(destinations: List[Dict]) -> List[Dict]:
+def remove_duplicate_phones(destinations: pd.DataFrame) -> List[Dict]:
     """
-    Remove duplicate phone numbers from destinations list.
-    Keeps only the first occurrence of each phone number.
+    Remove duplicate phone numbers from destinations.
+    Keeps only the first occurrence of each phone number; destinations without phone are dropped.
+
+    Returns:
+        Dispatch payload of each unique destination, in the original order
     """
-    if not destinations:
+    if destinations.empty:
         log("No destinations to process")
-        return destinations
-
-    seen_phones = set()
-    unique_destinations = []
-    duplicates_count = 0
+        return []
 
-    for destination in destinations:
-        phone = destination.get("to")
-        if phone and phone not in seen_phones:
-            seen_phones.add(phone)
-            unique_destinations.append(destination)
-        elif phone in seen_phones:
-            duplicates_count += 1
+    phones = destinations["to"]
+    has_phone = phones.notna() & phones.astype(bool)
+    duplicated = phones.duplicated(keep="first")
+    unique_destinations = destinations.loc[has_phone & ~duplicated, "destination"].tolist()
 
-    log(f"Removed {duplicates_count} duplicate phone numbers")
+    log(f"Removed {int((has_phone & duplicated).sum())} duplicate phone numbers")
     log(f"Total unique destinations: {len(unique_destinations)}")
 
     return unique_destinations
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+from prefect_rj_iplanrio.partitions import parse_date_columns, to_partitions
+from prefect_rj_iplanrio.state import load_state, save_state
+
+__all__ = ["load_state", "parse_date_columns", "save_state", "to_partitions"]
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Coleta de várias camadas ArcGIS (FeatureServer/MapServer) em uma única execução.
+
+Cada camada é paginada com requisições simultâneas (resultOffset ou, quando o servidor
+não suporta paginação, lotes de objectIds) sobre uma sessão HTTP compartilhada. As
+geometrias Esri JSON são convertidas para shapely, reprojetadas em bloco com pyproj
+(GeoSeries.to_crs) e gravadas em GeoParquet. Camadas cujo editingInfo.lastEditDate não
+mudou desde a coleta anterior são puladas.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import requests
+import shapely
+from iplanrio.pipelines_utils.logging import log
+from prefect import task
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from prefect_rj_iplanrio.state import load_state, save_state
+
+ARCGIS_TIMEOUT_SECONDS = 120
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 2000
+OUTPUT_CRS = "EPSG:4326"
+
+
+def build_session(pool_size: int) -> requests.Session:
+    """Sessão com pool de conexões do tamanho da concorrência e retentativas em 429/5xx."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_json(session: requests.Session, url: str, params: Optional[dict] = None) -> dict:
+    response = session.get(url, params={**(params or {}), "f": "json"}, timeout=ARCGIS_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    payload = response.json()
+    if "error" in payload:
+        raise RuntimeError(f"Erro do ArcGIS em {url}: {payload['error']}")
+    return payload
+
+
+def _wkid(crs: str) -> int:
+    """Converte "EPSG:31983" em 31983 (formato aceito por outSR)."""
+    return int(str(crs).split(":")[-1])
+
+
+def _ring_is_clockwise(ring: np.ndarray) -> bool:
+    x, y = ring[:, 0], ring[:, 1]
+    return float(np.sum((x[1:] - x[:-1]) * (y[1:] + y[:-1]))) > 0
+
+
+def _esri_polygon(rings: List[list]):
+    """
+    Monta Polygon/MultiPolygon a partir dos anéis Esri.
+
+    No Esri JSON anéis externos são horários e buracos anti-horários; cada buraco é
+    associado ao anel externo que o contém (ou ao último, se nenhum contiver).
+    """
+    shells: List[Tuple[np.ndarray, list]] = []
+    orphan_holes = []
+    for ring in rings:
+        coords = np.asarray(ring, dtype=float)[:, :2]
+        if len(coords) < 4:
+            continue
+        if _ring_is_clockwise(coords):
+            shells.append((coords, []))
+        else:
+            orphan_holes.append(coords)
+
+    if not shells:
+        # Orientação inconsistente: trata todos os anéis como externos
+        shells = [(hole, []) for hole in orphan_holes]
+        orphan_holes = []
+
+    shell_polygons = [shapely.Polygon(shell) for shell, _ in shells]
+    for hole in orphan_holes:
+        point = shapely.Point(hole[0])
+        owner = next((index for index, polygon in enumerate(shell_polygons) if polygon.contains(point)), -1)
+        shells[owner][1].append(hole)
+
+    polygons = [shapely.Polygon(shell, holes) for shell, holes in shells]
+    return polygons[0] if len(polygons) == 1 else shapely.MultiPolygon(polygons)
+
+
+def esri_geometries_to_shapely(geometries: List[Optional[dict]], geometry_type: Optional[str]) -> np.ndarray:
+    """
+    Converte geometrias Esri JSON em um array de geometrias shapely.
+
+    Pontos são montados de uma vez com shapely.points; as demais geometrias, uma a uma.
+    """
+    result = np.full(len(geometries), None, dtype=object)
+    if geometry_type == "esriGeometryPoint":
+        mask = np.array([bool(g) and g.get("x") is not None for g in geometries], dtype=bool)
+        if mask.any():
+            coords = np.array([(g["x"], g["y"]) for g, valid in zip(geometries, mask, strict=True) if valid])
+            result[mask] = shapely.points(coords)
+        return result
+
+    for index, geometry in enumerate(geometries):
+        if not geometry:
+            continue
+        if "rings" in geometry and geometry["rings"]:
+            result[index] = _esri_polygon(geometry["rings"])
+        elif "paths" in geometry and geometry["paths"]:
+            paths = [np.asarray(path, dtype=float)[:, :2] for path in geometry["paths"]]
+            result[index] = shapely.LineString(paths[0]) if len(paths) == 1 else shapely.MultiLineString(paths)
+        elif "points" in geometry and geometry["points"]:
+            result[index] = shapely.MultiPoint(np.asarray(geometry["points"], dtype=float)[:, :2])
+        elif geometry.get("x") is not None:
+            result[index] = shapely.Point(geometry["x"], geometry["y"])
+    return result
+
+
+def _page_requests(session: requests.Session, url: str, info: dict, page_size: Optional[int]) -> List[dict]:
+    """Lista os parâmetros de cada página da camada."""
+    query_url = f"{url}/query"
+    object_id_field = info.get("objectIdField") or next(
+        (field["name"] for field in info.get("fields", []) if field.get("type") == "esriFieldTypeOID"),
+        None,
+    )
+    page_size = min(page_size or info.get("maxRecordCount") or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    supports_pagination = info.get("advancedQueryCapabilities", {}).get("supportsPagination", False)
+
+    if supports_pagination:
+        count = _get_json(session, query_url, {"where": "1=1", "returnCountOnly": "true"})["count"]
+        params = {"where": "1=1", "resultRecordCount": page_size}
+        if object_id_field:
+            # Ordem estável entre as páginas
+            params["orderByFields"] = object_id_field
+        return [{**params, "resultOffset": offset} for offset in range(0, count, page_size)]
+
+    # Sem paginação: lotes de objectIds
+    object_ids = sorted(_get_json(session, query_url, {"where": "1=1", "returnIdsOnly": "true"}).get("objectIds") or [])
+    return [
+        {"objectIds": ",".join(map(str, object_ids[start : start + page_size]))}
+        for start in range(0, len(object_ids), page_size)
+    ]
+
+
+def harvest_layer(
+    session: requests.Session,
+    url: str,
+    crs: str,
+    output_path: Path,
+    info: dict,
+    page_workers: int = 4,
+    page_size: Optional[int] = None,
+    output_crs: str = OUTPUT_CRS,
+) -> int:
+    """
+    Baixa todas as feições de uma camada e grava em GeoParquet.
+
+    Args:
+        session: Sessão HTTP compartilhada
+        url: URL da camada (.../FeatureServer/N ou .../MapServer/N)
+        crs: CRS em que as geometrias são pedidas ao servidor (outSR)
+        output_path: Arquivo .parquet de saída
+        info: Metadados da camada (resposta de {url}?f=json)
+        page_workers: Páginas baixadas em paralelo
+        page_size: Feições por página (padrão: maxRecordCount da camada)
+        output_crs: CRS das geometrias gravadas
+
+    Returns:
+        Número de feições gravadas
+    """
+    query_url = f"{url}/query"
+    common = {"outFields": "*", "returnGeometry": "true", "outSR": _wkid(crs)}
+    pages = _page_requests(session, url, info, page_size)
+
+    results: Dict[int, List[dict]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(page_workers, len(pages) or 1))) as executor:
+        futures = {
+            executor.submit(_get_json, session, query_url, {**common, **params}): index
+            for index, params in enumerate(pages)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result().get("features", [])
+
+    features = [feature for index in sorted(results) for feature in results[index]]
+    attributes = pd.DataFrame.from_records([feature.get("attributes") or {} for feature in features])
+    geometries = esri_geometries_to_shapely([feature.get("geometry") for feature in features], info.get("geometryType"))
+
+    geometry = gpd.GeoSeries(geometries, crs=crs)
+    if output_crs and geometry.crs != output_crs:
+        geometry = geometry.to_crs(output_crs)
+    gdf = gpd.GeoDataFrame(attributes, geometry=geometry.values, crs=geometry.crs)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    gdf.to_parquet(output_path, index=False)
+    return len(gdf)
+
+
+@task
+def harvest_arcgis_layers_task(
+    layers: List[Dict[str, Any]],
+    state_bucket: str,
+    state_blob: str,
+    output_dir: str = "/tmp/arcgis",
+    ignore_state: bool = False,
+    max_workers: int = 4,
+    page_workers: int = 4,
+) -> Tuple[List[Dict[str, Any]], dict, List[str]]:
+    """
+    Coleta várias camadas ArcGIS em paralelo, pulando as que não foram editadas.
+
+    Args:
+        layers: Camadas a coletar, cada uma com "url", "crs" e "table_id" (e
+            opcionalmente "dataset_id")
+        state_bucket: Bucket do estado com o lastEditDate de cada camada (por table_id)
+        state_blob: Blob JSON do estado
+        output_dir: Pasta local dos arquivos GeoParquet
+        ignore_state: Coleta todas as camadas, mesmo as não editadas
+        max_workers: Camadas coletadas em paralelo
+        page_workers: Páginas baixadas em paralelo por camada
+
+    Returns:
+        Tupla (camadas coletadas com "path" e "rows", novo estado, table_ids que falharam).
+        Camadas que falharam mantêm o lastEditDate anterior no estado; cabe ao flow subir
+        as coletadas, gravar o estado e então falhar listando as camadas com falha.
+    """
+    state = {} if ignore_state else load_state(state_bucket, state_blob)
+    new_state = dict(state)
+    session = build_session(max_workers * page_workers)
+
+    def _harvest(layer: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        url = layer["url"].rstrip("/")
+        info = _get_json(session, url)
+        last_edit = (info.get("editingInfo") or {}).get("lastEditDate")
+        if last_edit is not None and state.get(layer["table_id"]) == last_edit:
+            log(f"{layer['table_id']}: sem edições desde {last_edit}; camada pulada")
+            return None
+
+        output_path = Path(output_dir) / layer["table_id"] / "data.parquet"
+        rows = harvest_layer(session, url, layer["crs"], output_path, info, page_workers=page_workers)
+        log(f"{layer['table_id']}: {rows} feições gravadas em {output_path}")
+        return {**layer, "path": str(output_path.parent), "rows": rows, "last_edit_date": last_edit}
+
+    harvested, failures = [], []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(layers)))) as executor:
+        futures = {executor.submit(_harvest, layer): layer for layer in layers}
+        for future in as_completed(futures):
+            layer = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                log(f"{layer['table_id']}: falha na coleta ({exc!r})", level="error")
+                failures.append(layer["table_id"])
+                continue
+            if result is not None:
+                harvested.append(result)
+
+    for layer in harvested:
+        if layer["last_edit_date"] is not None:
+            new_state[layer["table_id"]] = layer["last_edit_date"]
+    return harvested, new_state, sorted(failures)
+
+
+@task
+def save_arcgis_state_task(state: dict, state_bucket: str, state_blob: str) -> None:
+    """Grava o lastEditDate das camadas coletadas, depois do upload."""
+    save_state(state, state_bucket, state_blob)
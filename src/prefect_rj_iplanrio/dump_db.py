@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+"""
+Modo paralelo por faixas para os flows de dump_db.
+
+O `dump_upload_batch_task` do iplanrio já executa uma lista de queries com até
+`max_concurrency` conexões simultâneas, mas a lista só tem mais de um item quando o
+flow recebe `break_query_*`. Aqui a query de origem é dividida em faixas contíguas de
+uma coluna (chave primária numérica ou data), calculadas a partir de MIN/MAX, e cada
+faixa passa pelo `format_partitioned_query_task` normalmente. Assim um dump completo
+escala com o número de conexões em vez de depender de um único cursor.
+
+Também concentra o modo incremental por watermark: só as linhas alteradas desde a
+última execução são extraídas para uma tabela de staging e incorporadas por chave
+(MERGE) a uma tabela nativa do BigQuery, com uma carga completa periódica para
+refletir exclusões.
+"""
+
+import hashlib
+import math
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from google.cloud import bigquery
+from google.cloud.exceptions import NotFound
+from iplanrio.pipelines_templates.dump_db.tasks import format_partitioned_query_task
+from iplanrio.pipelines_utils.env import get_bd_credentials_from_env
+from iplanrio.pipelines_utils.logging import log
+from prefect import task
+
+from prefect_rj_iplanrio.state import load_state, save_state
+
+SQL_SERVER_ODBC_DRIVER = "ODBC Driver 18 for SQL Server"
+
+
+def _connect(database_type: str, hostname: str, port: str, user: str, password: str, database: str):
+    """Abre uma conexão DB-API com os mesmos drivers usados pelo dump_db do iplanrio."""
+    if database_type == "sql_server":
+        import pyodbc
+
+        return pyodbc.connect(
+            f"DRIVER={{{SQL_SERVER_ODBC_DRIVER}}};SERVER={hostname},{port};DATABASE={database};"
+            f"UID={user};PWD={password};TrustServerCertificate=yes"
+        )
+    if database_type == "mysql":
+        import pymysql
+
+        return pymysql.connect(host=hostname, port=int(port), user=user, password=password, database=database)
+    if database_type == "oracle":
+        import oracledb
+
+        return oracledb.connect(user=user, password=password, dsn=f"{hostname}:{port}/{database}")
+    if database_type == "postgresql":
+        import psycopg2
+
+        return psycopg2.connect(host=hostname, port=int(port), user=user, password=password, dbname=database)
+    raise ValueError(f"Tipo de banco não suportado no modo por faixas: {database_type}")
+
+
+def _strip_query(query: str) -> str:
+    return query.strip().rstrip(";")
+
+
+def _as_datetime(value: date) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return datetime(value.year, value.month, value.day)
+
+
+def _sql_literal(value: Any, database_type: str) -> str:
+    """Formata o limite de uma faixa como literal SQL."""
+    if isinstance(value, date):
+        value = _as_datetime(value)
+        if database_type == "oracle":
+            return f"TO_TIMESTAMP('{value:%Y-%m-%d %H:%M:%S}', 'YYYY-MM-DD HH24:MI:SS')"
+        if database_type == "sql_server":
+            # Formato ISO 8601 não depende do idioma/DATEFORMAT da sessão
+            return f"'{value:%Y-%m-%dT%H:%M:%S}'"
+        return f"'{value:%Y-%m-%d %H:%M:%S}'"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _fetch_one(
+    sql: str,
+    database_type: str,
+    hostname: str,
+    port: str,
+    user: str,
+    password: str,
+    database: str,
+) -> tuple:
+    connection = _connect(database_type, hostname, port, user, password, database)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(sql)
+        row = cursor.fetchone()
+        cursor.close()
+    finally:
+        connection.close()
+    return tuple(row)
+
+
+def compute_range_bounds(lower: Any, upper: Any, range_count: int) -> List[Any]:
+    """
+    Calcula os limites internos que dividem [lower, upper] em até `range_count` faixas.
+
+    Returns:
+        Lista ordenada de limites (vazia se não houver o que dividir)
+    """
+    if range_count <= 1 or lower is None or upper is None:
+        return []
+
+    if isinstance(lower, (int, Decimal)) and isinstance(upper, (int, Decimal)):
+        lower, upper = int(lower), int(upper)
+        if lower >= upper:
+            return []
+        step = max(1, math.ceil((upper - lower + 1) / range_count))
+        return list(range(lower + step, upper + 1, step))
+
+    if isinstance(lower, date) and isinstance(upper, date):
+        lower, upper = _as_datetime(lower), _as_datetime(upper)
+        if lower >= upper:
+            return []
+        step = (upper - lower) / range_count
+        # Limites truncados ao segundo para gerar literais exatos
+        bounds = {(lower + step * index).replace(microsecond=0) for index in range(1, range_count)}
+        return sorted(bound for bound in bounds if lower < bound <= upper)
+
+    raise ValueError(
+        f"Coluna de faixa deve ser numérica ou de data; recebido {type(lower).__name__}/{type(upper).__name__}"
+    )
+
+
+def build_range_queries(query: str, range_column: str, bounds: List[Any], database_type: str) -> List[str]:
+    """
+    Envolve a query em uma subquery filtrada por faixas contíguas e disjuntas da coluna.
+
+    A primeira faixa também recebe as linhas com a coluna nula e a última não tem limite
+    superior, de modo que a união das faixas é exatamente o resultado da query original.
+    """
+    query = _strip_query(query)
+    if not bounds:
+        return [query]
+
+    limits = [None, *bounds, None]
+    queries = []
+    for index, (start, end) in enumerate(zip(limits[:-1], limits[1:], strict=True)):
+        conditions = []
+        if start is not None:
+            conditions.append(f"{range_column} >= {_sql_literal(start, database_type)}")
+        if end is not None:
+            conditions.append(f"{range_column} < {_sql_literal(end, database_type)}")
+        where = " AND ".join(conditions)
+        if index == 0:
+            where = f"({where} OR {range_column} IS NULL)"
+        queries.append(f"SELECT * FROM ({query}) range_{index} WHERE {where}")
+    return queries
+
+
+def get_range_column_bounds(
+    query: str,
+    range_column: str,
+    database_type: str,
+    hostname: str,
+    port: str,
+    user: str,
+    password: str,
+    database: str,
+) -> Tuple[Any, Any]:
+    """Executa MIN/MAX da coluna sobre a query de origem."""
+    return _fetch_one(
+        f"SELECT MIN({range_column}), MAX({range_column}) FROM ({_strip_query(query)}) range_bounds",
+        database_type,
+        hostname,
+        port,
+        user,
+        password,
+        database,
+    )
+
+
+@task
+def format_range_partitioned_query_task(
+    query: str,
+    dataset_id: str,
+    table_id: str,
+    database_type: str,
+    partition_columns: Optional[List[str]] = None,
+    lower_bound_date: Optional[str] = None,
+    date_format: Optional[str] = None,
+    break_query_start: Optional[str] = None,
+    break_query_end: Optional[str] = None,
+    break_query_frequency: Optional[str] = None,
+    range_column: Optional[str] = None,
+    range_count: int = 8,
+    hostname: Optional[str] = None,
+    port: Optional[str] = None,
+    user: Optional[str] = None,
+    password: Optional[str] = None,
+    database: Optional[str] = None,
+) -> list:
+    """
+    `format_partitioned_query_task` com divisão opcional da query em faixas.
+
+    Sem `range_column`, ou quando o flow já recebe `break_query_start`/`break_query_end`
+    (que o iplanrio usa para quebrar a query por datas), o comportamento é idêntico ao do
+    iplanrio. Caso contrário, a query é dividida em até `range_count` faixas de
+    `range_column` calculadas a partir de MIN/MAX, e cada faixa é formatada pelo iplanrio
+    (incluindo o filtro incremental de `lower_bound_date`).
+
+    A query de origem precisa poder ser usada como subquery (sem ORDER BY sem TOP no SQL
+    Server e sem CTE no início).
+
+    Returns:
+        Lista de queries no formato esperado pelo `dump_upload_batch_task`
+    """
+    format_kwargs = dict(
+        dataset_id=dataset_id,
+        table_id=table_id,
+        database_type=database_type,
+        partition_columns=partition_columns,
+        lower_bound_date=lower_bound_date,
+        date_format=date_format,
+        break_query_start=break_query_start,
+        break_query_end=break_query_end,
+        break_query_frequency=break_query_frequency,
+    )
+
+    bounds = []
+    if range_column and not (break_query_start or break_query_end):
+        lower, upper = get_range_column_bounds(
+            query, range_column, database_type, hostname, port, user, password, database
+        )
+        bounds = compute_range_bounds(lower, upper, range_count)
+        log(f"Faixas de {range_column}: MIN={lower}, MAX={upper}, {len(bounds) + 1} faixas")
+    elif range_column:
+        log("break_query_* informado; a divisão por datas do iplanrio é usada no lugar das faixas")
+
+    if not bounds:
+        return format_partitioned_query_task.fn(query=query, **format_kwargs)
+
+    queries = []
+    for range_query in build_range_queries(query, range_column, bounds, database_type):
+        formatted = format_partitioned_query_task.fn(query=range_query, **format_kwargs)
+        queries.extend(formatted if isinstance(formatted, list) else [formatted])
+    return queries
+
+
+INCREMENTAL_TABLE_SUFFIX = "_incremental"
+
+
+def _serialize_watermark(value: Any) -> Optional[dict]:
+    """Converte o watermark em um dicionário JSON que preserva o tipo original."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return {"type": "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {"type": "date", "value": value.isoformat()}
+    if isinstance(value, (int, Decimal)):
+        return {"type": "number", "value": str(value)}
+    return {"type": "string", "value": str(value)}
+
+
+def _parse_watermark(serialized: Optional[dict]) -> Any:
+    if not serialized:
+        return None
+    kind, value = serialized["type"], serialized["value"]
+    if kind == "datetime":
+        return datetime.fromisoformat(value)
+    if kind == "date":
+        return date.fromisoformat(value)
+    if kind == "number":
+        return Decimal(value)
+    return value
+
+
+def _query_hash(query: str, incremental_column: str) -> str:
+    return hashlib.sha256(f"{_strip_query(query)}\n{incremental_column}".encode("utf-8")).hexdigest()
+
+
+def build_incremental_query(query: str, incremental_column: str, watermark: Any, database_type: str) -> str:
+    """
+    Filtra a query de origem pelas linhas com `incremental_column` a partir do watermark.
+
+    O filtro usa `>=` para não perder linhas gravadas com o mesmo valor do watermark
+    depois da última leitura; a linha repetida é absorvida pelo MERGE por chave.
+    """
+    return (
+        f"SELECT * FROM ({_strip_query(query)}) incremental "
+        f"WHERE {incremental_column} >= {_sql_literal(watermark, database_type)}"
+    )
+
+
+def is_full_refresh_due(state: dict, query_hash: str, full_refresh_interval_days: int, now: datetime) -> bool:
+    """Carga completa na primeira execução, quando a query muda ou após o intervalo configurado."""
+    if not state.get("watermark") or state.get("query_hash") != query_hash:
+        return True
+    last_full_refresh = state.get("last_full_refresh")
+    if last_full_refresh is None:
+        return True
+    return now - datetime.fromisoformat(last_full_refresh) >= timedelta(days=full_refresh_interval_days)
+
+
+@task
+def plan_incremental_dump_task(
+    query: str,
+    table_id: str,
+    database_type: str,
+    incremental_column: str,
+    state_bucket: str,
+    state_blob: str,
+    full_refresh_interval_days: int = 7,
+    force_full_refresh: bool = False,
+    hostname: Optional[str] = None,
+    port: Optional[str] = None,
+    user: Optional[str] = None,
+    password: Optional[str] = None,
+    database: Optional[str] = None,
+) -> dict:
+    """
+    Decide entre carga completa e incremental e monta a query a ser extraída.
+
+    O novo watermark é o MAX de `incremental_column` lido antes da extração; ele só é
+    gravado no estado depois do MERGE (`merge_incremental_dump_task`), então uma
+    execução que falha no meio repete a mesma janela na próxima vez.
+
+    Args:
+        query: Query de origem (a mesma usada na carga completa)
+        table_id: Tabela de destino
+        database_type: Tipo do banco de origem
+        incremental_column: Coluna (ou expressão sobre as colunas da query) que cresce a
+            cada inserção/atualização, ex.: "COALESCE(dt_atualizacao, dt_insercao)"
+        state_bucket: Bucket do estado entre execuções
+        state_blob: Blob JSON com o watermark da tabela
+        full_refresh_interval_days: Dias entre cargas completas (para refletir exclusões)
+        force_full_refresh: Ignora o estado e faz carga completa
+
+    Returns:
+        Plano com a query, a tabela de staging, o modo ("full" ou "incremental"), o
+        número de linhas alteradas (None na carga completa) e o estado a gravar
+    """
+    now = datetime.now()
+    connection_kwargs = dict(
+        database_type=database_type,
+        hostname=hostname,
+        port=port,
+        user=user,
+        password=password,
+        database=database,
+    )
+    state = {} if force_full_refresh else load_state(state_bucket, state_blob)
+    query_hash = _query_hash(query, incremental_column)
+    (new_watermark,) = _fetch_one(
+        f"SELECT MAX({incremental_column}) FROM ({_strip_query(query)}) watermark", **connection_kwargs
+    )
+
+    new_state = {
+        "watermark": _serialize_watermark(new_watermark),
+        "query_hash": query_hash,
+        "last_full_refresh": state.get("last_full_refresh"),
+    }
+
+    if is_full_refresh_due(state, query_hash, full_refresh_interval_days, now):
+        log(f"Carga completa de {table_id}; novo watermark: {new_watermark}")
+        new_state["last_full_refresh"] = now.isoformat()
+        return {
+            "mode": "full",
+            "query": query,
+            "table_id": table_id,
+            "rows": None,
+            "state": new_state,
+        }
+
+    watermark = _parse_watermark(state["watermark"])
+    incremental_query = build_incremental_query(query, incremental_column, watermark, database_type)
+    (rows,) = _fetch_one(f"SELECT COUNT(*) FROM ({incremental_query}) changed", **connection_kwargs)
+    log(f"Carga incremental de {table_id}: {rows} linhas com {incremental_column} >= {watermark}")
+    return {
+        "mode": "incremental",
+        "query": incremental_query,
+        "table_id": f"{table_id}{INCREMENTAL_TABLE_SUFFIX}",
+        "rows": int(rows),
+        "state": new_state,
+    }
+
+
+def build_merge_query(
+    target: str,
+    source: str,
+    merge_keys: List[str],
+    columns: List[str],
+) -> str:
+    """MERGE por chave: atualiza as linhas existentes e insere as novas."""
+    on = " AND ".join(f"T.`{key}` = S.`{key}`" for key in merge_keys)
+    update = ", ".join(f"`{column}` = S.`{column}`" for column in columns if column not in merge_keys)
+    insert_columns = ", ".join(f"`{column}`" for column in columns)
+    insert_values = ", ".join(f"S.`{column}`" for column in columns)
+    merge = f"MERGE `{target}` T USING `{source}` S ON {on}"
+    if update:
+        merge += f" WHEN MATCHED THEN UPDATE SET {update}"
+    return merge + f" WHEN NOT MATCHED THEN INSERT ({insert_columns}) VALUES ({insert_values})"
+
+
+@task
+def merge_incremental_dump_task(
+    plan: dict,
+    dataset_id: str,
+    table_id: str,
+    merge_keys: List[str],
+    bigquery_project: str,
+    state_bucket: str,
+    state_blob: str,
+) -> None:
+    """
+    Atualiza a tabela nativa `{dataset_id}.{table_id}` a partir do staging e grava o watermark.
+
+    O BigQuery não permite DML em tabelas BigLake/externas, então o destino do modo
+    incremental é uma tabela nativa. Na carga completa ela é recriada a partir de
+    `{dataset_id}_staging.{table_id}` (substituindo a view criada pelo basedosdados, se
+    houver); na incremental, as linhas de `{dataset_id}_staging.{table_id}_incremental`
+    são incorporadas por `merge_keys`.
+    """
+    if plan["mode"] == "incremental" and plan["rows"] == 0:
+        log(f"Nenhuma linha alterada em {table_id}; tabela mantida")
+        save_state(plan["state"], state_bucket, state_blob)
+        return
+
+    credentials = get_bd_credentials_from_env(mode="prod")
+    client = bigquery.Client(credentials=credentials, project=bigquery_project)
+    target = f"{bigquery_project}.{dataset_id}.{table_id}"
+    source = f"{bigquery_project}.{dataset_id}_staging.{plan['table_id']}"
+
+    if plan["mode"] == "full":
+        try:
+            if client.get_table(target).table_type == "VIEW":
+                client.delete_table(target)
+        except NotFound:
+            pass
+        client.query(f"CREATE OR REPLACE TABLE `{target}` AS SELECT * FROM `{source}`").result()
+        log(f"Tabela {target} recriada a partir de {source}")
+    else:
+        if not merge_keys:
+            raise ValueError("merge_keys é obrigatório no modo incremental")
+        columns = [field.name for field in client.get_table(source).schema]
+        job = client.query(build_merge_query(target, source, merge_keys, columns))
+        job.result()
+        log(f"MERGE de {source} em {target}: {job.num_dml_affected_rows} linhas afetadas")
+
+    save_state(plan["state"], state_bucket, state_blob)
+
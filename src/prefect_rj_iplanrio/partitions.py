@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Particionamento Hive compartilhado pelas pipelines.
+
+Substitui as cópias de `parse_date_columns`/`to_partitions` mantidas em cada pipeline
+do COR. As chaves de partição são derivadas uma única vez por dia distinto (e não por
+linha) e cada partição é gravada em paralelo.
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from iplanrio.pipelines_utils.logging import log
+
+PartitionScheme = Literal["ano_mes_data", "ano_mes_dia", "data"]
+
+PARTITION_SCHEMES: Dict[str, Tuple[str, ...]] = {
+    "ano_mes_data": ("ano_particao", "mes_particao", "data_particao"),
+    "ano_mes_dia": ("ano", "mes", "dia"),
+}
+
+
+def _take(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Expande valores calculados por chave única para todas as linhas (código -1 vira None)."""
+    return np.append(values.astype(object), None)[codes]
+
+
+def parse_date_columns(
+    dataframe: pd.DataFrame,
+    partition_column: str,
+    scheme: PartitionScheme = "ano_mes_data",
+) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Cria as colunas de particionamento a partir de uma coluna de data.
+
+    Esquemas suportados:
+    - "ano_mes_data": ano_particao=YYYY, mes_particao=MM, data_particao=YYYY-MM-DD
+    - "ano_mes_dia": ano=YYYY, mes=MM, dia=DD
+    - "data": a própria coluna é convertida para YYYY-MM-DD e usada como partição
+
+    A formatação é feita apenas sobre os dias distintos (pd.factorize) e espalhada para
+    as linhas por indexação, em vez de um strftime por linha e por coluna.
+
+    Args:
+        dataframe: DataFrame com os dados (alterado in-place, como nas versões anteriores)
+        partition_column: Nome da coluna de data
+        scheme: Esquema de colunas de partição
+
+    Returns:
+        Tupla com o DataFrame e a lista de colunas de partição
+    """
+    if not pd.api.types.is_datetime64_any_dtype(dataframe[partition_column]):
+        dataframe[partition_column] = pd.to_datetime(dataframe[partition_column])
+    dates = dataframe[partition_column]
+
+    codes, unique_days = pd.factorize(dates.dt.normalize())
+    unique_iso = np.asarray(pd.DatetimeIndex(unique_days).strftime("%Y-%m-%d"), dtype=object)
+
+    if scheme == "data":
+        dataframe[partition_column] = _take(unique_iso, codes)
+        return dataframe, [partition_column]
+
+    if scheme not in PARTITION_SCHEMES:
+        raise ValueError(f"Esquema de partição desconhecido: {scheme}")
+
+    year = np.array([value[:4] for value in unique_iso], dtype=object)
+    month = np.array([value[5:7] for value in unique_iso], dtype=object)
+    last = unique_iso if scheme == "ano_mes_data" else np.array([value[8:10] for value in unique_iso], dtype=object)
+
+    partition_columns = list(PARTITION_SCHEMES[scheme])
+    for column, values in zip(partition_columns, (year, month, last), strict=True):
+        dataframe[column] = _take(values, codes)
+
+    return dataframe, partition_columns
+
+
+def resolve_data_type(data_type: str) -> str:
+    """Retorna "parquet" se houver engine disponível; caso contrário cai para "csv"."""
+    if data_type not in ("csv", "parquet"):
+        raise ValueError(f"data_type deve ser 'csv' ou 'parquet', recebido: {data_type}")
+    if data_type == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            log("pyarrow indisponível. Gravando partições em CSV.", level="warning")
+            return "csv"
+    return data_type
+
+
+def _write_partition(
+    frame: pd.DataFrame,
+    filepath: Path,
+    data_type: str,
+    append: bool,
+) -> Path:
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+
+    if data_type == "csv":
+        exists = filepath.exists()
+        frame.to_csv(
+            filepath,
+            index=False,
+            mode="a" if append and exists else "w",
+            header=not (append and exists),
+        )
+        return filepath
+
+    # Parquet não aceita append: uma nova parte ao lado da existente evita reler o arquivo
+    if append and filepath.exists():
+        filepath = filepath.with_name(f"{filepath.stem}_{uuid.uuid4().hex[:8]}{filepath.suffix}")
+    frame.to_parquet(filepath, index=False)
+    return filepath
+
+
+def to_partitions(
+    data: pd.DataFrame,
+    partition_columns: List[str],
+    savepath: str | Path,
+    data_type: str = "csv",
+    suffix: Optional[str] = None,
+    filename: Optional[str] = None,
+    directory_names: Optional[Dict[str, str]] = None,
+    strip_leading_zeros: bool = False,
+    append: bool = False,
+    max_workers: int = 4,
+) -> List[Path]:
+    """
+    Salva o DataFrame em partições Hive (coluna=valor/...), uma pasta por combinação.
+
+    Args:
+        data: DataFrame a ser particionado
+        partition_columns: Colunas usadas como partição (removidas dos arquivos)
+        savepath: Pasta raiz das partições
+        data_type: "csv" ou "parquet" (cai para CSV se não houver pyarrow)
+        suffix: Se informado, o arquivo se chama data_{suffix}
+        filename: Nome do arquivo sem extensão (padrão: data ou data_{suffix})
+        directory_names: Nome da pasta de cada coluna, quando diferente da coluna
+        strip_leading_zeros: Remove zeros à esquerda dos valores (mes_particao=5)
+        append: Acrescenta ao arquivo existente (CSV) ou grava uma nova parte (Parquet)
+            em vez de sobrescrever; indicado para feeds de alta frequência
+        max_workers: Número de partições gravadas em paralelo
+
+    Returns:
+        Lista dos arquivos gravados
+    """
+    if not isinstance(data, pd.DataFrame):
+        raise ValueError("Data need to be a pandas DataFrame")
+
+    data_type = resolve_data_type(data_type)
+    savepath = Path(savepath)
+    directory_names = directory_names or {}
+    if filename is None:
+        filename = f"data_{suffix}" if suffix is not None else "data"
+
+    if data.empty:
+        return []
+
+    # Índices posicionais de cada partição em uma única passada de hash
+    groups = data.groupby(partition_columns, sort=False, dropna=True).indices
+    skipped = len(data) - sum(len(positions) for positions in groups.values())
+    if skipped:
+        log(f"{skipped} linhas sem valor de partição foram descartadas", level="warning")
+    payload = data.drop(columns=partition_columns)
+
+    jobs = []
+    for key, positions in groups.items():
+        values = key if isinstance(key, tuple) else (key,)
+        partition_path = savepath
+        for column, value in zip(partition_columns, values, strict=True):
+            value = str(value)
+            if strip_leading_zeros:
+                value = value.lstrip("0")
+            partition_path = partition_path / f"{directory_names.get(column, column)}={value}"
+        jobs.append((payload.iloc[positions], partition_path / f"{filename}.{data_type}"))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as executor:
+        saved_files = list(
+            executor.map(lambda job: _write_partition(job[0], job[1], data_type, append), jobs)
+        )
+
+    log(f"{len(saved_files)} partições salvas em {savepath}")
+    return saved_files
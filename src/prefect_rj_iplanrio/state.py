@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Estado entre execuções guardado como JSON no GCS.
+
+Os pods das pipelines são efêmeros, então validadores HTTP, hashes de arquivos e
+watermarks que precisam sobreviver de um tick para o outro ficam em um blob.
+"""
+
+import json
+
+from google.cloud import storage
+from google.cloud.exceptions import NotFound
+
+
+def load_state(bucket_name: str, blob_name: str) -> dict:
+    """Lê o estado JSON salvo no GCS. Vazio se não existir."""
+    blob = storage.Client().bucket(bucket_name).blob(blob_name)
+    try:
+        return json.loads(blob.download_as_bytes())
+    except NotFound:
+        return {}
+
+
+def save_state(state: dict, bucket_name: str, blob_name: str) -> None:
+    """Grava o estado JSON no GCS."""
+    blob = storage.Client().bucket(bucket_name).blob(blob_name)
+    blob.upload_from_string(json.dumps(state), content_type="application/json")